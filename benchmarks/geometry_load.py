@@ -0,0 +1,149 @@
+"""
+Benchmark: server-side ST_MakePoint vs client-side EWKB geometry loading
+
+Writes a synthetic Gitter CSV file and imports it with both load modes of the create
+command, reporting rows per second for each:
+
+- staged: COPY into a TEXT staging table, then INSERT ... SELECT ST_SetSRID(ST_MakePoint(...))
+- direct: convert rows and encode the points as EWKB in Python, then binary COPY
+
+It also times the geometry step on its own (points only, no attribute columns) so the cost
+of `ST_MakePoint` per row can be compared with shipping pre-encoded EWKB.
+
+Requires a PostgreSQL database with the PostGIS extension installed.
+
+Usage:
+
+    python benchmarks/geometry_load.py --dsn postgresql://postgres@localhost/zensus --rows 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import asyncpg
+
+from zensus2pgsql.commands.create import DatabaseConfig, FetchManager, LoadMode
+from zensus2pgsql.geometry import encode_points_ewkb, register_geometry_codec
+
+SCHEMA = "zensus2pgsql_bench"
+SRID = 3035
+
+
+def write_csv(path: Path, rows: int) -> None:
+    """Write a synthetic 100m Gitter CSV file with coordinates and two value columns."""
+    rng = random.Random(42)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("GITTER_ID_100m;x_mp_100m;y_mp_100m;Einwohner;Durchschnittsalter\n")
+        for idx in range(rows):
+            x = 4000050 + (idx % 5000) * 100
+            y = 2650050 + (idx // 5000) * 100
+            f.write(f"100mN{y // 100}E{x // 100};{x};{y};{rng.randint(3, 400)};")
+            f.write(f"{rng.randint(18, 80)},{rng.randint(0, 9)}\n")
+
+
+async def import_file(conn: asyncpg.Connection, csv_file: Path, load_mode: LoadMode) -> float:
+    """Import `csv_file` with the given load mode and return the elapsed seconds."""
+    db_config = DatabaseConfig(
+        "", 0, "", "", None, SCHEMA, SRID, drop_existing=True, load_mode=load_mode
+    )
+    manager = FetchManager(MagicMock(), Path(), MagicMock(), MagicMock(), db_config)
+    try:
+        start = time.perf_counter()
+        await manager.import_csv(conn, csv_file)
+        return time.perf_counter() - start
+    finally:
+        manager.remove_temp_dir()
+
+
+async def geometry_only(conn: asyncpg.Connection, rows: int) -> tuple[float, float]:
+    """Time building `rows` points server-side vs shipping client-side EWKB."""
+    xs = [4000050.0 + (idx % 5000) * 100 for idx in range(rows)]
+    ys = [2650050.0 + (idx // 5000) * 100 for idx in range(rows)]
+
+    await conn.execute(f"CREATE TABLE {SCHEMA}.points_text (x TEXT, y TEXT)")
+    await conn.copy_records_to_table(
+        "points_text",
+        records=[(str(x).replace(".", ","), str(y).replace(".", ",")) for x, y in zip(xs, ys)],
+        schema_name=SCHEMA,
+    )
+    await conn.execute(f"CREATE TABLE {SCHEMA}.points_server (geom GEOMETRY(Point, {SRID}))")
+    await conn.execute(f"CREATE TABLE {SCHEMA}.points_client (geom GEOMETRY(Point, {SRID}))")
+
+    start = time.perf_counter()
+    await conn.execute(
+        f"""
+        INSERT INTO {SCHEMA}.points_server (geom)
+        SELECT ST_SetSRID(ST_MakePoint(
+            NULLIF(REPLACE(x, ',', '.'), '')::double precision,
+            NULLIF(REPLACE(y, ',', '.'), '')::double precision
+        ), {SRID})
+        FROM {SCHEMA}.points_text
+        """
+    )
+    server = time.perf_counter() - start
+
+    await register_geometry_codec(conn)
+    start = time.perf_counter()
+    batch_size = FetchManager.COPY_BATCH_SIZE
+    records = [
+        (ewkb,)
+        for offset in range(0, rows, batch_size)
+        for ewkb in encode_points_ewkb(
+            xs[offset : offset + batch_size], ys[offset : offset + batch_size], SRID
+        )
+    ]
+    await conn.copy_records_to_table(
+        "points_client", records=records, columns=["geom"], schema_name=SCHEMA
+    )
+    client = time.perf_counter() - start
+
+    differing = await conn.fetchval(
+        f"""
+        SELECT COUNT(*) FROM (
+            SELECT ST_AsEWKB(geom) FROM {SCHEMA}.points_server
+            EXCEPT ALL
+            SELECT ST_AsEWKB(geom) FROM {SCHEMA}.points_client
+        ) AS diff
+        """
+    )
+    assert differing == 0, "server and client geometries differ"
+
+    return server, client
+
+
+async def main(dsn: str, rows: int) -> None:
+    conn = await asyncpg.connect(dsn)
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_file = Path(tmpdir) / "Zensus2022_Benchmark_100m-Gitter.csv"
+            write_csv(csv_file, rows)
+
+            print(f"{rows:,} rows")
+            print(f"{'path':<34}{'seconds':>10}{'rows/s':>14}")
+            for load_mode in (LoadMode.staged, LoadMode.direct):
+                elapsed = await import_file(conn, csv_file, load_mode)
+                print(f"{'import, ' + load_mode.value:<34}{elapsed:>10.2f}{rows / elapsed:>14,.0f}")
+
+        server, client = await geometry_only(conn, rows)
+        print(f"{'geometry, INSERT ... ST_MakePoint':<34}{server:>10.2f}{rows / server:>14,.0f}")
+        print(f"{'geometry, client EWKB + COPY':<34}{client:>10.2f}{rows / client:>14,.0f}")
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--dsn", default="postgresql://postgres@localhost/zensus")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.dsn, args.rows))
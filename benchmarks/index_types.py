@@ -0,0 +1,147 @@
+"""
+Benchmark: GIST, SP-GiST and BRIN indexes on a grid table
+
+Fills a synthetic 100m grid table with point geometries (in grid order, as the Gitter CSV
+files store them, or shuffled with `--shuffled`) and builds each index type on it with
+`FetchManager.build_index`. For each type the script reports the build time, the index
+size and the median latency of bounding box queries over random 1 km x 1 km windows.
+"none" times the same queries with a sequential scan.
+
+Requires a PostgreSQL database with the PostGIS extension installed.
+
+Usage:
+
+    python benchmarks/index_types.py --dsn postgresql://postgres@localhost/zensus \\
+        --rows 5000000 --queries 200
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import asyncpg
+
+from zensus2pgsql.cache import format_size
+from zensus2pgsql.commands.create import DatabaseConfig, FetchManager, SpatialIndex
+
+SCHEMA = "zensus2pgsql_bench"
+TABLE = f"{SCHEMA}.grid"
+SRID = 3035
+
+#: Columns of the grid and origin of its cell centres
+WIDTH = 5000
+ORIGIN_X = 4000050
+ORIGIN_Y = 2650050
+
+#: Cell size and side of the query windows in metres
+CELL = 100
+WINDOW = 1000
+
+
+async def create_grid(conn: asyncpg.Connection, rows: int, shuffled: bool) -> None:
+    """Create `TABLE` with `rows` grid cells, stored in grid order unless `shuffled`."""
+    await conn.execute(
+        f"""
+        CREATE TABLE {TABLE} AS
+        SELECT
+            idx AS einwohner,
+            ST_SetSRID(
+                ST_MakePoint({ORIGIN_X} + (idx % {WIDTH}) * {CELL},
+                             {ORIGIN_Y} + (idx / {WIDTH}) * {CELL}),
+                {SRID}
+            )::geometry(Point, {SRID}) AS geom
+        FROM generate_series(0, {rows - 1}) AS idx
+        {"ORDER BY random()" if shuffled else ""}
+        """
+    )
+    await conn.execute(f"VACUUM ANALYZE {TABLE}")
+
+
+def query_windows(rows: int, count: int) -> list[tuple[int, int, int, int]]:
+    """`count` random query windows (xmin, ymin, xmax, ymax) within the grid."""
+    rng = random.Random(42)
+    height = max(1, rows // WIDTH)
+    windows = []
+    for _ in range(count):
+        x = ORIGIN_X + rng.randrange(max(1, WIDTH - WINDOW // CELL)) * CELL
+        y = ORIGIN_Y + rng.randrange(max(1, height - WINDOW // CELL)) * CELL
+        windows.append((x, y, x + WINDOW, y + WINDOW))
+    return windows
+
+
+async def query_latency(
+    conn: asyncpg.Connection, windows: list[tuple[int, int, int, int]]
+) -> float:
+    """Median seconds of a bounding box query counting the cells in each of `windows`."""
+    query = f"SELECT count(*) FROM {TABLE} WHERE geom && ST_MakeEnvelope($1, $2, $3, $4, {SRID})"
+    statement = await conn.prepare(query)
+    # Warm up the cache and the plan
+    await statement.fetchval(*windows[0])
+    times = []
+    for window in windows:
+        start = time.perf_counter()
+        await statement.fetchval(*window)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+async def build_index(
+    pool: asyncpg.Pool, conn: asyncpg.Connection, spatial_index: SpatialIndex
+) -> tuple[float, int]:
+    """Build a `spatial_index` index on `TABLE`; return the seconds taken and its size."""
+    if spatial_index == SpatialIndex.none:
+        return 0.0, 0
+
+    db_config = DatabaseConfig(
+        "", 0, "", "", None, SCHEMA, SRID, drop_existing=True, spatial_index=spatial_index
+    )
+    manager = FetchManager(MagicMock(), Path(), MagicMock(), pool, db_config)
+    try:
+        await manager.build_index(conn, TABLE)
+    finally:
+        manager.remove_temp_dir()
+    await conn.execute(f"ANALYZE {TABLE}")
+    size = await conn.fetchval(f"SELECT pg_relation_size('{SCHEMA}.grid_geom_idx')")
+    return manager.index_times[TABLE], size
+
+
+async def main(dsn: str, rows: int, queries: int, shuffled: bool) -> None:
+    pool = await asyncpg.create_pool(dsn, min_size=1, max_size=1)
+    try:
+        async with pool.acquire() as conn:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            await conn.execute(f"CREATE SCHEMA {SCHEMA}")
+            await create_grid(conn, rows, shuffled)
+            windows = query_windows(rows, queries)
+
+            order = "shuffled" if shuffled else "grid order"
+            print(f"{rows:,} rows ({order}), {queries} queries of {WINDOW} m x {WINDOW} m")
+            print(f"{'index':>8}{'build s':>10}{'size':>12}{'query ms':>10}")
+            for spatial_index in SpatialIndex:
+                await conn.execute(f"DROP INDEX IF EXISTS {SCHEMA}.grid_geom_idx")
+                seconds, size = await build_index(pool, conn, spatial_index)
+                latency = await query_latency(conn, windows)
+                print(
+                    f"{spatial_index.value:>8}{seconds:>10.2f}{format_size(size):>12}"
+                    f"{latency * 1000:>10.2f}"
+                )
+    finally:
+        await pool.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--dsn", default="postgresql://postgres@localhost/zensus")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--shuffled", action="store_true", help="Store the rows in random instead of grid order"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(args.dsn, args.rows, args.queries, args.shuffled))
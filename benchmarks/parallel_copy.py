@@ -0,0 +1,131 @@
+"""
+Benchmark: COPY of one large CSV file over one vs several connections
+
+Writes a synthetic multi-million-row Gitter CSV file and loads it into an UNLOGGED
+staging table with `FetchManager.copy_in_parts`, split into an increasing number of byte
+ranges that are COPYed at once over separate pool connections. For each part count the
+script reports the wall time and rows per second of the COPY alone, and of the whole
+staged import (COPY, type detection and INSERT ... SELECT into the final table).
+
+Requires a PostgreSQL database with the PostGIS extension installed.
+
+Usage:
+
+    python benchmarks/parallel_copy.py --dsn postgresql://postgres@localhost/zensus \\
+        --rows 5000000 --parts 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import asyncpg
+
+from zensus2pgsql.commands.create import DatabaseConfig, FetchManager, LoadMode
+from zensus2pgsql.csv import detect_csv_layout, line_ranges, read_csv_header
+
+SCHEMA = "zensus2pgsql_bench"
+SRID = 3035
+
+
+def write_csv(path: Path, rows: int) -> None:
+    """Write a synthetic 100m Gitter CSV file with coordinates and two value columns."""
+    rng = random.Random(42)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("GITTER_ID_100m;x_mp_100m;y_mp_100m;Einwohner;Durchschnittsalter\n")
+        for idx in range(rows):
+            x = 4000050 + (idx % 5000) * 100
+            y = 2650050 + (idx // 5000) * 100
+            f.write(f"100mN{y // 100}E{x // 100};{x};{y};{rng.randint(3, 400)};")
+            f.write(f"{rng.randint(18, 80)},{rng.randint(0, 9)}\n")
+
+
+def fetch_manager(pool: asyncpg.Pool, parts: int) -> FetchManager:
+    """A fetch manager importing with a single database worker and `parts` COPY parts."""
+    db_config = DatabaseConfig(
+        "", 0, "", "", None, SCHEMA, SRID, drop_existing=True, load_mode=LoadMode.staged
+    )
+    manager = FetchManager(
+        MagicMock(), Path(), MagicMock(), pool, db_config, db_workers=1, copy_parts=parts
+    )
+    # Split the benchmark file however small it is
+    manager.COPY_PART_MIN_SIZE = 1
+    return manager
+
+
+async def copy_only(pool: asyncpg.Pool, csv_file: Path, parts: int) -> float:
+    """COPY `csv_file` into an UNLOGGED staging table in `parts` parts; return the seconds."""
+    manager = fetch_manager(pool, parts)
+    layout = detect_csv_layout(read_csv_header(csv_file, "utf-8"))
+    copy_options = {
+        "schema_name": SCHEMA,
+        "delimiter": ";",
+        "null": "-",
+        "header": True,
+        "encoding": "UTF8",
+        "format": "csv",
+    }
+    try:
+        await pool.execute(f"DROP TABLE IF EXISTS {SCHEMA}.bench_temp")
+        start = time.perf_counter()
+        await manager.copy_in_parts(
+            csv_file,
+            "bench",
+            [f"{col} TEXT" for col in layout.columns],
+            copy_options,
+            line_ranges(csv_file, parts),
+        )
+        return time.perf_counter() - start
+    finally:
+        await pool.execute(f"DROP TABLE IF EXISTS {SCHEMA}.bench_temp")
+        manager.remove_temp_dir()
+
+
+async def import_file(pool: asyncpg.Pool, csv_file: Path, parts: int) -> float:
+    """Import `csv_file` with `parts` COPY parts and return the elapsed seconds."""
+    manager = fetch_manager(pool, parts)
+    try:
+        async with pool.acquire() as conn:
+            start = time.perf_counter()
+            await manager.import_csv(conn, csv_file)
+            return time.perf_counter() - start
+    finally:
+        manager.remove_temp_dir()
+
+
+async def main(dsn: str, rows: int, part_counts: list[int]) -> None:
+    pool = await asyncpg.create_pool(dsn, min_size=1, max_size=max(part_counts) + 1)
+    await pool.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    await pool.execute(f"CREATE SCHEMA {SCHEMA}")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_file = Path(tmpdir) / "Zensus2022_Benchmark_100m-Gitter.csv"
+            write_csv(csv_file, rows)
+
+            print(f"{rows:,} rows, {csv_file.stat().st_size / 2**20:,.0f} MiB")
+            print(f"{'parts':>5}{'COPY s':>10}{'rows/s':>14}{'import s':>10}{'rows/s':>14}")
+            for parts in part_counts:
+                copied = await copy_only(pool, csv_file, parts)
+                imported = await import_file(pool, csv_file, parts)
+                print(
+                    f"{parts:>5}{copied:>10.2f}{rows / copied:>14,.0f}"
+                    f"{imported:>10.2f}{rows / imported:>14,.0f}"
+                )
+    finally:
+        await pool.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--dsn", default="postgresql://postgres@localhost/zensus")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--parts", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    asyncio.run(main(args.dsn, args.rows, args.parts))
@@ -0,0 +1,110 @@
+"""
+Benchmark: single-stream vs parallel multi-range downloads
+
+Serves a synthetic archive from a local HTTP server that limits the throughput of each
+connection (standing in for a remote server where a single TCP stream is the bottleneck)
+and downloads it with `download_file` using an increasing number of parts.
+
+For each part count the script reports the wall time and throughput, and checks the
+downloaded file's sha256.
+
+Usage:
+
+    python benchmarks/parallel_download.py --size-mb 64 --rate-mb 16 --parts 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+from zensus2pgsql.cache import hash_file
+from zensus2pgsql.download import download_file
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ThrottledHandler(BaseHTTPRequestHandler):
+    """Serves `server.payload` with Range support at `server.rate` bytes/s per connection."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        payload = self.server.payload
+        start, end, status = 0, len(payload) - 1, 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else end
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", '"benchmark"')
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(payload)}")
+        self.end_headers()
+
+        began = time.perf_counter()
+        sent = 0
+        for offset in range(start, end + 1, CHUNK_SIZE):
+            chunk = payload[offset : min(offset + CHUNK_SIZE, end + 1)]
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            ahead = sent / self.server.rate - (time.perf_counter() - began)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+async def download(url: str, output_path: Path, parts: int) -> float:
+    """Download `url` with `parts` ranges and return the elapsed seconds."""
+    output_path.unlink(missing_ok=True)
+    async with httpx.AsyncClient() as client:
+        start = time.perf_counter()
+        await download_file(client, url, output_path, parts=parts)
+        return time.perf_counter() - start
+
+
+def main(size_mb: int, rate_mb: float, part_counts: list[int]) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottledHandler)
+    server.daemon_threads = True
+    server.payload = os.urandom(size_mb * 1024 * 1024)  # type: ignore[attr-defined]
+    server.rate = rate_mb * 1024 * 1024  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}/archive.zip"
+    expected = hashlib.sha256(server.payload).hexdigest()  # type: ignore[attr-defined]
+
+    print(f"{size_mb} MiB archive, {rate_mb} MiB/s per connection")
+    print(f"{'parts':>6}{'seconds':>10}{'MiB/s':>10}")
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_path = Path(tmpdir) / "archive.zip"
+            for parts in part_counts:
+                elapsed = asyncio.run(download(url, output_path, parts))
+                assert hash_file(output_path).hexdigest() == expected
+                print(f"{parts:>6}{elapsed:>10.2f}{size_mb / elapsed:>10.1f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--rate-mb", type=float, default=16)
+    parser.add_argument("--parts", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    main(args.size_mb, args.rate_mb, args.parts)
@@ -0,0 +1,98 @@
+"""
+Benchmark: per-column vs single-pass column type detection
+
+Loads a synthetic Gitterdaten-like table into a scratch schema and compares the old
+strategy (one `detect_column_type` query per column) with `detect_column_types`, which
+classifies every column in one aggregate query.
+
+For each strategy the script reports the wall time and the number of sequential scans
+PostgreSQL performed on the staging table (read from `pg_stat_get_xact_numscans`).
+
+Usage:
+
+    python benchmarks/type_inference.py --dsn postgresql://postgres@localhost/zensus \
+        --rows 1000000 --columns 10
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import asyncpg
+
+from zensus2pgsql.column_types import detect_column_type, detect_column_types
+
+SCHEMA = "zensus2pgsql_bench"
+TABLE = f"{SCHEMA}.type_inference_temp"
+
+
+def synthetic_rows(rows: int, columns: int):
+    """Yield rows resembling a Gitter CSV staged as TEXT (ints, German decimals, NULLs)."""
+    rng = random.Random(42)
+    for idx in range(rows):
+        values: list[str | None] = [f"100mN{idx:08d}"]
+        for col in range(columns - 1):
+            if rng.random() < 0.05:
+                values.append(None)
+            elif col % 2:
+                values.append(f"{rng.randint(0, 999)},{rng.randint(0, 99)}")
+            else:
+                values.append(str(rng.randint(0, 5000)))
+        yield values
+
+
+async def scans(conn: asyncpg.Connection) -> int:
+    """Return the number of scans started on the staging table in this transaction."""
+    return await conn.fetchval(f"SELECT pg_stat_get_xact_numscans('{TABLE}'::regclass)")
+
+
+async def main(dsn: str, rows: int, columns: int) -> None:
+    conn = await asyncpg.connect(dsn)
+    column_names = ["gitter_id_100m"] + [f"col_{idx}" for idx in range(columns - 1)]
+
+    try:
+        await conn.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}")
+        await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        await conn.execute(
+            f"CREATE TABLE {TABLE} ({', '.join(f'{col} TEXT' for col in column_names)})"
+        )
+        await conn.copy_records_to_table(
+            "type_inference_temp",
+            records=synthetic_rows(rows, columns),
+            columns=column_names,
+            schema_name=SCHEMA,
+        )
+        await conn.execute(f"ANALYZE {TABLE}")
+
+        print(f"{rows:,} rows x {columns} columns")
+        print(f"{'strategy':<14}{'scans':>8}{'seconds':>12}")
+
+        async with conn.transaction():
+            before = await scans(conn)
+            start = time.perf_counter()
+            per_column = {col: await detect_column_type(conn, TABLE, col) for col in column_names}
+            elapsed = time.perf_counter() - start
+            print(f"{'per-column':<14}{await scans(conn) - before:>8}{elapsed:>12.3f}")
+
+        async with conn.transaction():
+            before = await scans(conn)
+            start = time.perf_counter()
+            single_pass = await detect_column_types(conn, TABLE, column_names)
+            elapsed = time.perf_counter() - start
+            print(f"{'single-pass':<14}{await scans(conn) - before:>8}{elapsed:>12.3f}")
+
+        assert per_column == single_pass, "strategies disagree on detected types"
+    finally:
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--dsn", default="postgresql://postgres@localhost/zensus")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--columns", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.dsn, args.rows, args.columns))
@@ -2,16 +2,48 @@
 Functions for interacting with application cache
 """
 
+import hashlib
+import json
 import os
+import re
+import time
+import zipfile
 from pathlib import Path
+from typing import NamedTuple
 
 import platformdirs
 
-from .constants import APP_NAME
+from .constants import APP_NAME, GITTERDATEN_FILES
 from .errors import Zensus2PgsqlError
+from .logging import logger
 
 CACHE = platformdirs.user_cache_dir(APP_NAME)
 
+#: Name of the manifest file describing the files in the cache
+MANIFEST_FILE = "manifest.json"
+
+#: Version of the manifest file format
+MANIFEST_VERSION = 1
+
+#: Size of the blocks read when hashing files
+HASH_BLOCK_SIZE = 1024 * 1024
+
+#: Directory (inside the cache) that corrupt files are moved to
+QUARANTINE_DIR = "quarantine"
+
+#: Directory (inside the cache) holding the extracted members of archives, in one
+#: subdirectory per archive named after its sha256
+EXTRACTED_DIR = "extracted"
+
+#: Suffixes of partial downloads (see `zensus2pgsql.download`) and their stored validators
+PARTIAL_SUFFIXES = (".part.validator", ".part")
+
+#: Environment variable holding the cache's byte budget (e.g. "5G")
+CACHE_MAX_SIZE_ENVVAR = "ZENSUS2PGSQL_CACHE_MAX_SIZE"
+
+#: Multipliers of the unit suffixes accepted by `parse_size`
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
 
 def create_cache_dir():
     """
@@ -32,3 +64,334 @@ def save_to_cache(path: Path, save_bytes: bool = False):
             path.write_text(path.read_text())
     except OSError as exc:
         raise Zensus2PgsqlError("Unable to save file to cache") from exc
+
+
+def hash_file(path: Path) -> "hashlib._Hash":
+    """
+    Returns a sha256 hash object fed with the contents of `path`.
+
+    The hash object is returned (instead of its digest) so that callers can continue
+    hashing bytes appended to the file.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest
+
+
+class CacheEntry(NamedTuple):
+    """
+    What we know about a downloaded file in the cache
+    """
+
+    #: URL the file was downloaded from
+    url: str
+
+    #: Validators sent by the server, used for conditional requests
+    etag: str | None = None
+    last_modified: str | None = None
+
+    #: Size and sha256 hex digest of the downloaded file
+    size: int | None = None
+    sha256: str | None = None
+
+    #: Modification time of the file when its hash was last checked
+    mtime: float | None = None
+
+    #: When the file was last downloaded or reused (seconds since the epoch)
+    last_used: float | None = None
+
+
+class CacheManifest:
+    """
+    Records a `CacheEntry` for each downloaded file, keyed by the file's name in the cache.
+
+    The manifest is stored as JSON in the cache directory and rewritten atomically on save.
+    """
+
+    def __init__(self, path: Path, entries: dict[str, CacheEntry] | None = None) -> None:
+        self.path = path
+        self.entries: dict[str, CacheEntry] = entries or {}
+
+    @classmethod
+    def load(cls, cache_dir: Path) -> "CacheManifest":
+        """
+        Load the manifest of `cache_dir`; a missing or unreadable manifest is treated as empty.
+        """
+        path = cache_dir / MANIFEST_FILE
+        try:
+            data = json.loads(path.read_text())
+            entries = {
+                name: CacheEntry(**entry)
+                for name, entry in data["files"].items()
+                if data.get("version") == MANIFEST_VERSION
+            }
+        except FileNotFoundError:
+            entries = {}
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            logger.warning(f"Ignoring unreadable cache manifest {path}: {exc}")
+            entries = {}
+
+        return cls(path, entries)
+
+    def get(self, name: str) -> CacheEntry | None:
+        """Returns the entry for the cached file `name`, if there is one."""
+        return self.entries.get(name)
+
+    def set(self, name: str, entry: CacheEntry) -> None:
+        """Adds or replaces the entry for the cached file `name`."""
+        self.entries[name] = entry
+
+    def remove(self, name: str) -> None:
+        """Removes the entry for the cached file `name`, if there is one."""
+        self.entries.pop(name, None)
+
+    def touch(self, name: str) -> None:
+        """Marks the cached file `name` as used now, for least-recently-used eviction."""
+        entry = self.entries.get(name)
+        if entry is not None:
+            self.entries[name] = entry._replace(last_used=time.time())
+
+    def save(self) -> None:
+        """
+        Write the manifest to disk.
+
+        The manifest is written to a temporary file first and then renamed, so an
+        interrupted run never leaves a half-written manifest behind.
+        """
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": {name: entry._asdict() for name, entry in sorted(self.entries.items())},
+        }
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            temp_path.write_text(json.dumps(data, indent=2))
+            os.replace(temp_path, self.path)
+        except OSError as exc:
+            raise Zensus2PgsqlError(f"Unable to save cache manifest {self.path}") from exc
+
+
+def verify_cached_file(path: Path, entry: CacheEntry | None, url: str) -> CacheEntry | None:
+    """
+    Check that the cached file `path` downloaded from `url` is intact.
+
+    Files whose size and modification time still match their manifest `entry` are trusted
+    without reading them. Otherwise the file is hashed and compared with the recorded
+    sha256; files without a recorded hash must at least be readable zip archives.
+
+    Returns the entry to record for the file, or None if the file is corrupt.
+    """
+    stat = path.stat()
+    if entry is not None and (entry.url != url or entry.sha256 is None):
+        entry = None
+
+    if entry is not None:
+        if entry.size != stat.st_size:
+            return None
+        if entry.mtime == stat.st_mtime:
+            return entry
+
+    sha256 = hash_file(path).hexdigest()
+
+    if entry is not None:
+        return entry._replace(mtime=stat.st_mtime) if sha256 == entry.sha256 else None
+
+    if not zipfile.is_zipfile(path):
+        return None
+
+    return CacheEntry(url, size=stat.st_size, sha256=sha256, mtime=stat.st_mtime)
+
+
+def archive_sha256(path: Path, entry: CacheEntry | None) -> str:
+    """
+    Returns the sha256 hex digest of the cached archive `path`.
+
+    The digest recorded in the manifest `entry` is used if the file's size and modification
+    time still match it; otherwise the file is hashed.
+    """
+    stat = path.stat()
+    if (
+        entry is not None
+        and entry.sha256 is not None
+        and entry.size == stat.st_size
+        and entry.mtime == stat.st_mtime
+    ):
+        return entry.sha256
+    return hash_file(path).hexdigest()
+
+
+def extracted_dir(cache_dir: Path, sha256: str) -> Path:
+    """Directory in `cache_dir` holding the extracted members of the archive with `sha256`"""
+    return cache_dir / EXTRACTED_DIR / sha256
+
+
+def link_cached_file(source: Path, destination: Path) -> Path:
+    """
+    Hard link the cached file `source` to `destination` and return the path to use.
+
+    The link keeps the file readable even if it is evicted from the cache meanwhile. If
+    the file system does not support hard links (or `destination` is on another one),
+    `source` itself is returned.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        destination.unlink(missing_ok=True)
+        os.link(source, destination)
+    except OSError:
+        return source
+    return destination
+
+
+def remove_empty_dirs(root: Path) -> None:
+    """Remove the empty directories below `root` (and `root` itself, if it is empty)."""
+    if not root.is_dir():
+        return
+    for path in sorted(root.rglob("*"), key=lambda path: len(path.parts), reverse=True):
+        if path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+    if not any(root.iterdir()):
+        root.rmdir()
+
+
+def quarantine_file(path: Path) -> Path:
+    """
+    Move the corrupt cached file `path` out of the way so it is downloaded again.
+
+    The file is kept in the cache's quarantine directory for inspection.
+    """
+    quarantine_dir = path.parent / QUARANTINE_DIR
+    quarantine_dir.mkdir(exist_ok=True)
+    destination = quarantine_dir / f"{path.name}.{time.strftime('%Y%m%dT%H%M%S')}"
+    try:
+        os.replace(path, destination)
+    except OSError as exc:
+        raise Zensus2PgsqlError(f"Unable to quarantine corrupt cache file {path}") from exc
+    return destination
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a size like "500M" or "2.5G" (binary units) into a number of bytes.
+
+    >>> parse_size("500M")
+    524288000
+    >>> parse_size("2.5 GiB")
+    2684354560
+    >>> parse_size("1024")
+    1024
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:i?B)?\s*", text, re.IGNORECASE)
+    if match is None:
+        raise Zensus2PgsqlError(f"Invalid size: {text!r} (expected e.g. 500M or 5G)")
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit.upper()])
+
+
+def format_size(num_bytes: float) -> str:
+    """
+    Format a number of bytes with binary units.
+
+    >>> format_size(512)
+    '512 B'
+    >>> format_size(1536 * 1024)
+    '1.5 MiB'
+    """
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TiB"
+
+
+class CachedFile(NamedTuple):
+    """
+    A file stored in the cache directory
+    """
+
+    path: Path
+    size: int
+
+    #: Last time the file was used; the modification time for files without a manifest entry
+    last_used: float
+
+    #: Whether the file was moved to the quarantine directory
+    quarantined: bool = False
+
+
+def is_cache_file(cache_dir: Path, manifest: CacheManifest, path: Path) -> bool:
+    """
+    Whether `path` was put into `cache_dir` by zensus2pgsql
+
+    These are the downloaded archives (listed in the manifest or named after a dataset),
+    their partial downloads, and everything in the quarantine and extracted directories.
+    Other files, e.g. in a cache directory shared with other programs, are left alone.
+    """
+    relative = path.relative_to(cache_dir)
+    if relative.parts[0] in (QUARANTINE_DIR, EXTRACTED_DIR):
+        return True
+    if len(relative.parts) != 1:
+        return False
+
+    name = path.name
+    for suffix in PARTIAL_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return manifest.get(name) is not None or name in {
+        f"{dataset['name']}.zip" for dataset in GITTERDATEN_FILES
+    }
+
+
+def list_cached_files(cache_dir: Path, manifest: CacheManifest) -> list[CachedFile]:
+    """
+    List the files in `cache_dir` in eviction order: quarantined files first, then the
+    least recently used.
+
+    Only files put there by zensus2pgsql are listed (see `is_cache_file`). This includes
+    the extracted members of archives, which are marked as used by updating their
+    modification time.
+    """
+    files = []
+    for path in cache_dir.rglob("*"):
+        if not path.is_file() or path == manifest.path:
+            continue
+        if not is_cache_file(cache_dir, manifest, path):
+            continue
+        stat = path.stat()
+        quarantined = path.parent.name == QUARANTINE_DIR
+        entry = None if quarantined else manifest.get(path.name)
+        last_used = entry.last_used if entry and entry.last_used else stat.st_mtime
+        files.append(CachedFile(path, stat.st_size, last_used, quarantined))
+
+    return sorted(files, key=lambda file: (not file.quarantined, file.last_used))
+
+
+def evict_cached_files(
+    cache_dir: Path, manifest: CacheManifest, max_size: int, dry_run: bool = False
+) -> list[CachedFile]:
+    """
+    Remove least recently used files from `cache_dir` until it holds at most `max_size` bytes.
+
+    Returns the removed files (the files that would be removed if `dry_run` is True).
+    """
+    files = list_cached_files(cache_dir, manifest)
+    total = sum(file.size for file in files)
+
+    evicted = []
+    for file in files:
+        if total <= max_size:
+            break
+        if not dry_run:
+            file.path.unlink(missing_ok=True)
+            if not file.quarantined:
+                manifest.remove(file.path.name)
+        total -= file.size
+        evicted.append(file)
+
+    if evicted and not dry_run:
+        manifest.save()
+        remove_empty_dirs(cache_dir / EXTRACTED_DIR)
+        logger.debug(f"Evicted {len(evicted)} file(s) from the cache")
+
+    return evicted
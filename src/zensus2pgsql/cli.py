@@ -2,8 +2,10 @@
 
 import typer
 
+from .commands.cache import cache_app
 from .commands.create import collect
 from .commands.drop import drop
+from .commands.fetch import fetch
 from .commands.list import list_datasets
 
 
@@ -34,5 +36,7 @@ def main(
 
 # Add commands directly to the main app
 app.command(name="create")(collect)
+app.command(name="fetch")(fetch)
 app.command(name="list")(list_datasets)
 app.command(name="drop")(drop)
+app.add_typer(cache_app, name="cache")
@@ -0,0 +1,219 @@
+"""
+Detecting and converting the column types of the CSV files
+
+The CSV files only contain text. Each column is given the narrowest of INTEGER, DOUBLE
+PRECISION and TEXT that holds all of its values, either in the database after loading the
+file into a staging table (`detect_column_types`) or in Python while reading it
+(`infer_column_types`). `iter_record_batches` converts the rows into typed records for a
+binary COPY into the final table.
+"""
+
+import asyncio
+import itertools
+import re
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from typing import Any
+
+import asyncpg
+
+from .csv import CSV_NULL, CsvLayout
+from .geometry import encode_points_ewkb
+
+
+def column_type_counts_sql(column_name: str) -> str:
+    """Build the aggregate expressions used to detect the type of a column.
+
+    Produces three comma separated COUNT expressions: non-empty values, integer values
+    and numeric values. Commas are replaced with dots to support German decimal format.
+    """
+    return rf"""
+            COUNT(CASE WHEN {column_name} IS NOT NULL AND {column_name} != '' THEN 1 END),
+            COUNT(CASE
+                WHEN {column_name} IS NOT NULL AND {column_name} != ''
+                AND REPLACE({column_name}, ',', '.') ~ '^-?[0-9]+$'
+                THEN 1
+            END),
+            COUNT(CASE
+                WHEN {column_name} IS NOT NULL AND {column_name} != ''
+                AND REPLACE({column_name}, ',', '.') ~ '^-?[0-9]+\.?[0-9]*$'
+                THEN 1
+            END)"""
+
+
+def classify_column(non_empty: int, integer_count: int, numeric_count: int) -> str:
+    """Pick a PostgreSQL type for a column based on its value counts.
+
+    Returns 'INTEGER', 'DOUBLE PRECISION', or 'TEXT'.
+
+    >>> classify_column(10, 10, 10)
+    'INTEGER'
+    >>> classify_column(10, 4, 10)
+    'DOUBLE PRECISION'
+    >>> classify_column(0, 0, 0)
+    'TEXT'
+    """
+    # If column is empty or has no non-empty values, keep as TEXT
+    if non_empty == 0:
+        return "TEXT"
+
+    # If all non-empty values are integers
+    if integer_count == non_empty:
+        return "INTEGER"
+
+    # If all non-empty values are numeric (including decimals)
+    if numeric_count == non_empty:
+        return "DOUBLE PRECISION"
+
+    # Otherwise, keep as TEXT
+    return "TEXT"
+
+
+async def detect_column_type(conn: asyncpg.Connection, table_name: str, column_name: str) -> str:
+    """Detect the appropriate PostgreSQL type for a column.
+
+    Checks if column values can be converted to INTEGER or DOUBLE PRECISION.
+    Returns 'INTEGER', 'DOUBLE PRECISION', or 'TEXT'.
+    """
+    row = await conn.fetchrow(
+        f"SELECT COUNT(*), {column_type_counts_sql(column_name)} FROM {table_name}"
+    )
+    total, non_empty, integer_count, numeric_count = row
+
+    return classify_column(non_empty, integer_count, numeric_count)
+
+
+async def detect_column_types(
+    conn: asyncpg.Connection, table_name: str, column_names: list[str]
+) -> dict[str, str]:
+    """Detect the appropriate PostgreSQL types for several columns at once.
+
+    Computes the same counts as `detect_column_type` for every column in a single
+    aggregate query, so the table is only scanned once regardless of its width.
+    Returns a mapping of column name to 'INTEGER', 'DOUBLE PRECISION', or 'TEXT'.
+    """
+    if not column_names:
+        return {}
+
+    counts_sql = ",".join(column_type_counts_sql(col) for col in column_names)
+    row = tuple(await conn.fetchrow(f"SELECT COUNT(*), {counts_sql} FROM {table_name}"))
+
+    # First value is the total row count, followed by three counts per column
+    return {
+        col: classify_column(*row[1 + idx * 3 : 4 + idx * 3])
+        for idx, col in enumerate(column_names)
+    }
+
+
+#: Patterns matching integer and numeric values (after replacing German decimal commas)
+INTEGER_PATTERN = re.compile(r"^-?[0-9]+$")
+NUMERIC_PATTERN = re.compile(r"^-?[0-9]+\.?[0-9]*$")
+
+
+def infer_column_types(rows: Iterable[list[str]], num_columns: int) -> list[str]:
+    """Detect the appropriate PostgreSQL type of every column in a single pass over `rows`.
+
+    Client-side counterpart of `detect_column_types`: NULL (`-`) and empty values are
+    ignored and commas are treated as decimal separators.
+
+    >>> infer_column_types([["1", "1,5", "a"], ["-", "2", "b"]], 3)
+    ['INTEGER', 'DOUBLE PRECISION', 'TEXT']
+    """
+    non_empty = [0] * num_columns
+    integer_count = [0] * num_columns
+    numeric_count = [0] * num_columns
+
+    for row in rows:
+        for idx, value in enumerate(row):
+            if not value or value == CSV_NULL:
+                continue
+            non_empty[idx] += 1
+            value = value.replace(",", ".")
+            if NUMERIC_PATTERN.match(value):
+                numeric_count[idx] += 1
+                if INTEGER_PATTERN.match(value):
+                    integer_count[idx] += 1
+
+    return [
+        classify_column(non_empty[idx], integer_count[idx], numeric_count[idx])
+        for idx in range(num_columns)
+    ]
+
+
+def to_integer(value: str) -> int | None:
+    """Convert a CSV value to an integer (NULL and empty values become None)."""
+    if not value or value == CSV_NULL:
+        return None
+    return int(value)
+
+
+def to_double(value: str) -> float | None:
+    """Convert a CSV value in German decimal format to a float (NULL and empty become None)."""
+    if not value or value == CSV_NULL:
+        return None
+    return float(value.replace(",", "."))
+
+
+def to_text(value: str) -> str | None:
+    """Convert a CSV value to text (NULL values become None)."""
+    if value == CSV_NULL:
+        return None
+    return value
+
+
+#: Functions converting CSV values to their detected PostgreSQL type
+CONVERTERS = {"INTEGER": to_integer, "DOUBLE PRECISION": to_double, "TEXT": to_text}
+
+
+def iter_record_batches(
+    rows: Iterable[list[str]],
+    layout: CsvLayout,
+    column_types: dict[str, str],
+    srid: int,
+    batch_size: int,
+) -> Iterator[list[tuple[Any, ...]]]:
+    """Convert CSV rows into typed records for the final table, in batches.
+
+    Records hold the value columns of `layout` followed by the EWKB geometry (if any).
+    Conversion is done column by column over each batch, so the point geometries of a
+    batch are encoded together with `encode_points_ewkb`.
+    """
+    indices = [layout.columns.index(col) for col in layout.value_columns]
+    converters = [CONVERTERS[column_types.get(col, "TEXT")] for col in layout.value_columns]
+
+    row_iter = iter(rows)
+    while batch := list(itertools.islice(row_iter, batch_size)):
+        columns: list[list[Any]] = [
+            list(map(convert, [row[idx] for row in batch]))
+            for idx, convert in zip(indices, converters)
+        ]
+
+        if layout.x_col and layout.y_col:
+            x_idx = layout.columns.index(layout.x_col)
+            y_idx = layout.columns.index(layout.y_col)
+            columns.append(
+                encode_points_ewkb(
+                    [to_double(row[x_idx]) for row in batch],
+                    [to_double(row[y_idx]) for row in batch],
+                    srid,
+                )
+            )
+
+        yield list(zip(*columns)) if columns else [() for _ in batch]
+
+
+async def aiter_records(
+    batches: Iterator[list[tuple[Any, ...]]], on_batch: Callable[[int], None] | None = None
+) -> AsyncIterator[tuple[Any, ...]]:
+    """
+    Produce records from `batches`, parsing each batch in a thread to keep the loop free.
+
+    `on_batch` is called with the number of records of each batch once it has been consumed.
+    """
+    while True:
+        batch = await asyncio.to_thread(next, batches, None)
+        if batch is None:
+            return
+        for record in batch:
+            yield record
+        if on_batch is not None:
+            on_batch(len(batch))
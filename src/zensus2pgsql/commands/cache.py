@@ -0,0 +1,162 @@
+"""
+zensus2pgsql cache commands
+
+Show and clean up the files in the download cache (downloaded archives and the CSV files
+extracted from them).
+"""
+
+import datetime
+from pathlib import Path
+
+import typer
+from rich import print as rprint
+from rich.console import Console
+from rich.table import Table
+
+from ..cache import (
+    CACHE,
+    CACHE_MAX_SIZE_ENVVAR,
+    EXTRACTED_DIR,
+    QUARANTINE_DIR,
+    CacheManifest,
+    evict_cached_files,
+    format_size,
+    list_cached_files,
+    parse_size,
+    remove_empty_dirs,
+)
+from ..errors import Zensus2PgsqlError
+from ..logging import configure_logging
+from ..peer import CacheServer
+
+cache_app = typer.Typer(help="Show and clean up the download cache", no_args_is_help=True)
+
+
+def parse_size_option(value: str) -> int:
+    """Convert the value of a size option like "5G" to bytes."""
+    try:
+        return parse_size(value)
+    except Zensus2PgsqlError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+
+
+def cache_dir_option() -> Path:
+    """Option selecting the cache directory (defaults to the user cache directory)."""
+    return typer.Option(Path(CACHE), "--cache-dir", help="Cache directory", show_default=False)
+
+
+@cache_app.command(name="stats")
+def stats(cache_dir: Path = cache_dir_option()) -> None:
+    """Show the files in the cache, least recently used first."""
+    manifest = CacheManifest.load(cache_dir)
+    files = list_cached_files(cache_dir, manifest) if cache_dir.exists() else []
+
+    table = Table(show_header=True, header_style="bold cyan", expand=True)
+    table.add_column("File", style="green")
+    table.add_column("Size", justify="right")
+    table.add_column("Last used", justify="right")
+
+    for file in files:
+        name = str(file.path.relative_to(cache_dir))
+        last_used = datetime.datetime.fromtimestamp(file.last_used).strftime("%Y-%m-%d %H:%M")
+        table.add_row(
+            f"[red]{name}[/red]" if file.quarantined else name, format_size(file.size), last_used
+        )
+
+    console = Console()
+    console.print()
+    console.print(table)
+    console.print()
+    console.print(f"[bold cyan]Cache directory:[/bold cyan] {cache_dir}")
+    console.print(
+        f"[bold cyan]Total:[/bold cyan] {len(files)} files, "
+        f"{format_size(sum(file.size for file in files))}"
+    )
+    quarantined = [file for file in files if file.quarantined]
+    if quarantined:
+        console.print(f"[bold red]Quarantined:[/bold red] {len(quarantined)} files")
+    console.print()
+
+
+@cache_app.command(name="prune")
+def prune(
+    max_size: int = typer.Option(
+        ...,
+        "--max-size",
+        parser=parse_size_option,
+        metavar="SIZE",
+        help="Byte budget for the cache, e.g. 500M or 5G",
+        envvar=CACHE_MAX_SIZE_ENVVAR,
+    ),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only show what would be removed"),
+    cache_dir: Path = cache_dir_option(),
+) -> None:
+    """Remove least recently used files until the cache fits in its byte budget."""
+    if not cache_dir.exists():
+        rprint("[yellow]The cache is empty[/yellow]")
+        return
+
+    manifest = CacheManifest.load(cache_dir)
+    evicted = evict_cached_files(cache_dir, manifest, max_size, dry_run=dry_run)
+
+    for file in evicted:
+        rprint(f"  • {file.path.relative_to(cache_dir)} ({format_size(file.size)})")
+
+    freed = format_size(sum(file.size for file in evicted))
+    if dry_run:
+        rprint(f"[cyan]Would remove {len(evicted)} files ({freed})[/cyan]")
+    else:
+        rprint(f"[green]✓ Removed {len(evicted)} files ({freed})[/green]")
+
+
+@cache_app.command(name="clear")
+def clear(
+    confirm: bool = typer.Option(False, "--confirm", "-y", help="Skip confirmation prompt"),
+    cache_dir: Path = cache_dir_option(),
+) -> None:
+    """Remove the files zensus2pgsql put into the cache; other files are kept."""
+    if not cache_dir.exists():
+        rprint("[yellow]The cache is empty[/yellow]")
+        return
+
+    manifest = CacheManifest.load(cache_dir)
+    files = list_cached_files(cache_dir, manifest)
+    size = format_size(sum(file.size for file in files))
+
+    if not confirm:
+        rprint(f"\n[bold red]Warning: This will remove {len(files)} files ({size})![/bold red]")
+        if not typer.confirm("Are you sure you want to continue?"):
+            rprint("[yellow]Aborted[/yellow]")
+            raise typer.Exit(0)
+
+    # Only remove what we put there (see `is_cache_file`), in case the directory is shared
+    for file in files:
+        file.path.unlink(missing_ok=True)
+    manifest.path.unlink(missing_ok=True)
+    if (cache_dir / QUARANTINE_DIR).is_dir():
+        (cache_dir / QUARANTINE_DIR).rmdir()
+    remove_empty_dirs(cache_dir / EXTRACTED_DIR)
+
+    rprint(f"[green]✓ Removed {len(files)} files ({size})[/green]")
+
+
+@cache_app.command(name="serve")
+def serve(
+    host: str = typer.Option("0.0.0.0", "--host", "-h", help="Address to listen on"),
+    port: int = typer.Option(8642, "--port", "-p", help="Port to listen on"),
+    cache_dir: Path = cache_dir_option(),
+    verbose: int = typer.Option(
+        0, "--verbose", "-v", count=True, help="Increase verbosity (-v for INFO, -vv for DEBUG)"
+    ),
+) -> None:
+    """Share the cache with other hosts over HTTP (use them with --peer)."""
+    configure_logging(verbose)
+
+    server = CacheServer(cache_dir, host, port)
+    rprint(f"[cyan]Serving {cache_dir} at {server.url} (press Ctrl+C to stop)[/cyan]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        rprint("[yellow]Stopped[/yellow]")
+    finally:
+        server.server_close()
@@ -4,8 +4,10 @@ zensus2pgsql create command
 This command is the primary command for this utility and does the following:
 
 - Downloads the Gitterdaten zip files and stores them in cache
-- Extracts those zip files (to a temp location)
+- Extracts those zip files (to a temp location), or reads the CSV files straight out of
+  them when streaming
 - Imports them into the specified PostgreSQL database
+- Builds the spatial indexes of the imported tables once all of them are loaded
 
 The data it downloads can also be viewed here:
 
@@ -13,148 +15,244 @@ The data it downloads can also be viewed here:
 """
 
 import asyncio
-import logging
+import contextlib
+import fnmatch
+import multiprocessing
+import os
+import re
+import shutil
 import tempfile
+import time
 import zipfile
-from pathlib import Path
-from typing import NamedTuple
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path, PurePosixPath
+from typing import Any, NamedTuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
-import aiocsv
-import aiofiles
 import asyncpg
 import httpx
 import typer
+from asyncpg.transaction import Transaction
 from rich import print as rprint
 from rich.progress import (
     BarColumn,
     MofNCompleteColumn,
     Progress,
+    ProgressColumn,
     SpinnerColumn,
+    Task,
     TextColumn,
     TimeRemainingColumn,
 )
-
-from ..cache import CACHE, create_cache_dir
+from rich.text import Text
+
+from ..cache import (
+    CACHE,
+    CACHE_MAX_SIZE_ENVVAR,
+    CacheEntry,
+    CacheManifest,
+    archive_sha256,
+    create_cache_dir,
+    evict_cached_files,
+    extracted_dir,
+    format_size,
+    link_cached_file,
+    list_cached_files,
+    quarantine_file,
+    verify_cached_file,
+)
+from ..column_types import (
+    aiter_records,
+    detect_column_types,
+    infer_column_types,
+    iter_record_batches,
+)
 from ..constants import GITTERDATEN_FILES
+from ..csv import (
+    PG_ENCODING_MAP,
+    CsvLayout,
+    CsvSource,
+    FileRange,
+    LineCountingReader,
+    ZipMember,
+    detect_csv_encoding,
+    detect_csv_layout,
+    line_ranges,
+    read_csv_header,
+    read_csv_rows,
+    sanitize_table_name,
+)
+from ..download import DownloadResult, conditional_headers, download_file, remove_partial
+from ..errors import CircuitOpenError, Zensus2PgsqlError
+from ..geometry import register_geometry_codec
 from ..logging import configure_logging, logger
+from ..peer import fetch_peer_manifest, peer_url
+from ..planning import (
+    DOWNLOAD_SECONDS_PER_BYTE,
+    IMPORT_SECONDS_PER_BYTE,
+    DatasetTimes,
+    largest_first,
+)
+from ..scheduler import DownloadScheduler
+from ..throughput import Throughput
+from ..tuning import (
+    DEFAULT_DB_WORKERS,
+    DEFAULT_EXTRACT_WORKERS,
+    DEFAULT_FETCH_WORKERS,
+    ServerLimits,
+    WorkerSettings,
+    auto_worker_settings,
+    read_server_limits,
+)
+from .cache import parse_size_option
 
 
-def sanitize_column_name(name: str) -> str:
-    """Sanitize column name to be PostgreSQL-compliant.
+def copied_rows(status: str | None) -> int:
+    """Number of rows in the command status returned by a COPY (0 if there is none).
 
-    PostgreSQL identifiers cannot start with a digit.
-    This function prefixes such names with an underscore.
+    >>> copied_rows("COPY 1234")
+    1234
     """
-    name = name.lower()
-    # If the name starts with a digit, prefix with underscore
-    if name and name[0].isdigit():
-        return f"_{name}"
-    return name
+    if not isinstance(status, str):
+        return 0
+    count = status.rsplit(" ", 1)[-1]
+    return int(count) if count.isdigit() else 0
 
 
-def sanitize_table_name(filename: str) -> str:
-    """Sanitize table name to be PostgreSQL-compliant.
+def parse_lsn(lsn: str) -> int:
+    """Byte position of a PostgreSQL WAL location such as "16/B374D848".
 
-    PostgreSQL table names have a 63-character limit.
-    This function removes redundant prefixes/suffixes and normalizes the name.
+    >>> parse_lsn("16/B374D848") - parse_lsn("16/B374D000")
+    2120
     """
-    name = filename.lower().replace("-", "_").replace(" ", "_")
+    high, low = lsn.split("/")
+    return (int(high, 16) << 32) + int(low, 16)
+
+
+def missing_members(zip_file: Path, target_dir: Path, members: Sequence[str]) -> list[str]:
+    """Names of the `members` of `zip_file` not already extracted (complete) into `target_dir`."""
+    with zipfile.ZipFile(zip_file) as archive:
+        return [
+            name
+            for name in members
+            if not (target_dir / name).is_file()
+            or (target_dir / name).stat().st_size != archive.getinfo(name).file_size
+        ]
+
+
+def extracted_size(zip_file: Path, members: Sequence[str]) -> int:
+    """Number of bytes the `members` of `zip_file` take up once extracted."""
+    with zipfile.ZipFile(zip_file) as archive:
+        return sum(archive.getinfo(name).file_size for name in members)
+
+
+def check_free_space(directory: Path, needed: int, purpose: str) -> None:
+    """Raise `Zensus2PgsqlError` if `directory` has fewer than `needed` bytes free."""
+    # The directory may not have been created yet
+    existing = next(path for path in (directory, *directory.parents) if path.exists())
+    free = shutil.disk_usage(existing).free
+    if needed > free:
+        raise Zensus2PgsqlError(
+            f"Not enough free space in {directory} to {purpose}: "
+            f"{format_size(needed)} needed, {format_size(free)} free"
+        )
 
-    # Remove common redundant prefixes and suffixes
-    name = name.replace("zensus2022_", "")
-    name = name.replace("_gitter", "")
 
-    # Ensure it's not too long (PostgreSQL limit is 63 chars)
-    if len(name) > 63:
-        name = name[:63]
+class Resolution(str, Enum):
+    """Grid cell sizes the Gitterdaten are published in."""
 
-    return name
+    m100 = "100m"
+    km1 = "1km"
+    km10 = "10km"
 
 
-async def detect_file_encoding(file_path: Path) -> str:
-    """Detect the encoding of a CSV file.
+#: Grid cell size in a CSV member name, like "Zensus2022_Bevoelkerungszahl_100m-Gitter.csv"
+RESOLUTION_PATTERN = re.compile(r"(?<![0-9a-z])(\d+(?:m|km))(?=[-_]Gitter)", re.IGNORECASE)
 
-    Tries common encodings and returns the first one that works.
-    """
-    encodings = ["utf-8", "iso-8859-1", "windows-1252", "cp1252"]
 
-    for encoding in encodings:
-        try:
-            async with aiofiles.open(file_path, encoding=encoding) as f:
-                # Try to read first 10 lines
-                for _ in range(10):
-                    await f.readline()
-            return encoding
-        except (UnicodeDecodeError, UnicodeError):
-            continue
+def member_resolution(name: str) -> str | None:
+    """Grid cell size of the CSV member `name`, if its name contains one.
 
-    # Default to iso-8859-1 which accepts all byte values
-    return "iso-8859-1"
+    >>> member_resolution("Zensus2022_Bevoelkerungszahl_1km-Gitter.csv")
+    '1km'
+    >>> member_resolution("Zensus2022_Bevoelkerungszahl-Gitter.csv") is None
+    True
+    """
+    match = RESOLUTION_PATTERN.search(PurePosixPath(name).name)
+    return match.group(1).lower() if match else None
 
 
-def detect_file_encoding_old(file_path: Path) -> str:
-    """Detect the encoding of a CSV file.
+def select_members(
+    names: Iterable[str], pattern: str, resolutions: Sequence[str] | None = None
+) -> list[str]:
+    """Names of the archive members to import, matching `pattern` and `resolutions`.
 
-    Tries common encodings and returns the first one that works.
+    Members whose name does not tell their resolution are always selected.
+
+    >>> select_members(
+    ...     ["A_100m-Gitter.csv", "A_1km-Gitter.csv", "Readme.pdf"], "*Gitter.csv", ["1km"]
+    ... )
+    ['A_1km-Gitter.csv']
+    """
+    wanted = {resolution.lower() for resolution in resolutions} if resolutions else None
+    return [
+        name
+        for name in names
+        if not name.endswith("/")
+        and fnmatch.fnmatch(PurePosixPath(name).name, pattern)
+        and (wanted is None or member_resolution(name) in wanted | {None})
+    ]
+
+
+def extract_archive(
+    zip_file: Path,
+    extract_to: Path,
+    members: Sequence[str] | None = None,
+    on_progress: Callable[[int], None] | None = None,
+) -> list[Path]:
+    """Extract `members` (all by default) of `zip_file` into `extract_to`.
+
+    Only the selected members are inflated. Returns the paths of the extracted files.
+    `on_progress` is called with the uncompressed size of every member after it is extracted.
     """
-    encodings = ["utf-8", "iso-8859-1", "windows-1252", "cp1252"]
+    extracted = []
+    with zipfile.ZipFile(zip_file) as archive:
+        for name in archive.namelist() if members is None else members:
+            info = archive.getinfo(name)
+            extracted.append(Path(archive.extract(info, extract_to)))
+            if on_progress is not None:
+                on_progress(info.file_size)
+    return extracted
 
-    for encoding in encodings:
-        try:
-            with open(file_path, encoding=encoding) as f:
-                # Try to read first 10 lines
-                for _ in range(10):
-                    f.readline()
-            return encoding
-        except (UnicodeDecodeError, UnicodeError):
-            continue
 
-    # Default to iso-8859-1 which accepts all byte values
-    return "iso-8859-1"
+class LoadMode(str, Enum):
+    """How CSV files are loaded into their final tables."""
 
+    #: COPY into an all-TEXT staging table, then convert with INSERT ... SELECT
+    staged = "staged"
 
-async def detect_column_type(conn: asyncpg.Connection, table_name: str, column_name: str) -> str:
-    """Detect the appropriate PostgreSQL type for a column.
+    #: Convert rows client-side and COPY them straight into the final table
+    direct = "direct"
 
-    Checks if column values can be converted to INTEGER or DOUBLE PRECISION.
-    Returns 'INTEGER', 'DOUBLE PRECISION', or 'TEXT'.
-    """
-    # Replace commas with dots for German decimal format
-    # Check if all non-null, non-empty values can be cast to numeric types
-    row = await conn.fetchrow(
-        rf"""
-        SELECT
-            COUNT(*) as total,
-            COUNT(CASE WHEN {column_name} IS NOT NULL AND {column_name} != '' THEN 1 END) as non_empty,
-            COUNT(CASE
-                WHEN {column_name} IS NOT NULL AND {column_name} != ''
-                AND REPLACE({column_name}, ',', '.') ~ '^-?[0-9]+$'
-                THEN 1
-            END) as integer_count,
-            COUNT(CASE
-                WHEN {column_name} IS NOT NULL AND {column_name} != ''
-                AND REPLACE({column_name}, ',', '.') ~ '^-?[0-9]+\.?[0-9]*$'
-                THEN 1
-            END) as numeric_count
-        FROM {table_name}
-        """
-    )
-    total, non_empty, integer_count, numeric_count = row
 
-    # If column is empty or has no non-empty values, keep as TEXT
-    if non_empty == 0:
-        return "TEXT"
+class SpatialIndex(str, Enum):
+    """Index access method used for the geometry column of tables with coordinates."""
+
+    #: R-tree over the bounding boxes; fast for any query, but the largest and slowest to build
+    gist = "gist"
 
-    # If all non-empty values are integers
-    if integer_count == non_empty:
-        return "INTEGER"
+    #: Space-partitioning tree (a quad-tree for points); smaller and quicker to build
+    spgist = "spgist"
 
-    # If all non-empty values are numeric (including decimals)
-    if numeric_count == non_empty:
-        return "DOUBLE PRECISION"
+    #: Bounding box of each range of table blocks; tiny, but only selective when the rows are
+    #: stored in spatial order, as in the Gitter CSV files
+    brin = "brin"
 
-    # Otherwise, keep as TEXT
-    return "TEXT"
+    #: No spatial index
+    none = "none"
 
 
 class DatabaseConfig(NamedTuple):
@@ -168,13 +266,31 @@ class DatabaseConfig(NamedTuple):
     schema: str
     srid: int
     drop_existing: bool
+    load_mode: LoadMode = LoadMode.staged
+
+    #: Load with less WAL and fewer fsyncs (see `FetchManager.import_csv`)
+    fast_load: bool = False
+
+    #: Create the final tables UNLOGGED and switch them to LOGGED once loaded
+    unlogged_tables: bool = False
 
+    #: Measure the WAL each import writes (always done with `fast_load`)
+    report_wal: bool = False
 
-async def get_db_pool(db_config: DatabaseConfig) -> asyncpg.Pool:
+    #: Index built on the geometry column
+    spatial_index: SpatialIndex = SpatialIndex.gist
+
+
+#: `maintenance_work_mem` of the index builds of a `--fast-load` run
+FAST_LOAD_MAINTENANCE_WORK_MEM = "1GB"
+
+
+async def get_db_pool(db_config: DatabaseConfig, pool_size: int = 10) -> asyncpg.Pool:
     """
     Create a database connection pool and make sure the database is ready for import.
 
-    Returns a connection pool instead of a single connection to support concurrent workers.
+    Returns a connection pool of up to `pool_size` connections instead of a single
+    connection to support concurrent workers.
     """
     # Test database connection first
     try:
@@ -225,16 +341,82 @@ async def get_db_pool(db_config: DatabaseConfig) -> asyncpg.Pool:
             database=db_config.database,
             host=db_config.host,
             port=db_config.port,
-            min_size=2,
-            max_size=10,
+            min_size=min(2, pool_size),
+            max_size=pool_size,
         )
-        logger.debug("Created database connection pool")
+        logger.debug(f"Created database connection pool of up to {pool_size} connections")
         return pool
     except asyncpg.PostgresError as e:
         logger.error(f"Error creating connection pool: {e!s}")
         raise typer.Exit(1)
 
 
+async def get_server_limits(db_config: DatabaseConfig) -> ServerLimits:
+    """Read the connection and process limits of the database server (for `--auto`)"""
+    try:
+        conn = await asyncpg.connect(
+            user=db_config.user,
+            password=db_config.password,
+            database=db_config.database,
+            host=db_config.host,
+            port=db_config.port,
+        )
+        try:
+            limits = await read_server_limits(conn)
+        finally:
+            await conn.close()
+    except asyncpg.PostgresError as e:
+        logger.error(f"Error reading the limits of the database server: {e!s}")
+        raise typer.Exit(1)
+
+    logger.debug(
+        f"Database server accepts {limits.free_connections} more connections and runs up to "
+        f"{limits.max_worker_processes} worker processes"
+    )
+    return limits
+
+
+async def choose_worker_settings(
+    db_config: DatabaseConfig,
+    fetch_workers: int | None,
+    db_workers: int | None,
+    pool_size: int | None,
+    auto: bool,
+    copy_parts: int = 1,
+) -> WorkerSettings:
+    """
+    Number of fetch and database workers and connections for a run
+
+    Values not given are sized to the database server with `auto` (see
+    `auto_worker_settings`) and take their defaults otherwise. Unless `pool_size` is
+    given, the pool has a connection for every database worker, and `copy_parts` more
+    for COPYing a file in parts; with `auto`, these count towards the share of the
+    server's connections the import takes.
+    """
+    extra = copy_parts if copy_parts > 1 else 0
+    defaults = WorkerSettings(DEFAULT_FETCH_WORKERS, DEFAULT_DB_WORKERS, DEFAULT_DB_WORKERS + extra)
+    if auto:
+        limits = await get_server_limits(db_config)
+        defaults = auto_worker_settings(limits, os.cpu_count() or 1, copy_connections=extra)
+
+    default_pool_size = db_workers + extra if db_workers else defaults.pool_size
+    settings = WorkerSettings(
+        fetch_workers or defaults.fetch_workers,
+        db_workers or defaults.db_workers,
+        pool_size or default_pool_size,
+    )
+    if settings.pool_size < settings.db_workers:
+        logger.warning(
+            f"The pool has fewer connections ({settings.pool_size}) than there are database "
+            f"workers ({settings.db_workers}); some workers will wait for a connection"
+        )
+    logger.info(
+        f"Using {settings.fetch_workers} fetch workers, {settings.db_workers} database "
+        f"workers and up to {settings.pool_size} database connections"
+    )
+    return settings
+
+
 def collect(
     tables: list[str] = typer.Argument(["all"]),
     host: str = typer.Option("localhost", "--host", "-h", help="PostgreSQL host"),
@@ -260,6 +442,170 @@ def collect(
     skip_existing: bool = typer.Option(
         True, "--skip-existing/--overwrite", help="Skip files that already exist"
     ),
+    load_mode: LoadMode = typer.Option(
+        LoadMode.staged,
+        "--load-mode",
+        help=(
+            "'staged' loads through a TEXT staging table; 'direct' converts rows client-side "
+            "and COPYs them straight into the final table"
+        ),
+    ),
+    spatial_index: SpatialIndex = typer.Option(
+        SpatialIndex.gist,
+        "--index",
+        help=(
+            "Index built on the geometry column: 'gist', 'spgist', 'brin' (small, relies on "
+            "the rows being stored in grid order) or 'none'"
+        ),
+    ),
+    fast_load: bool = typer.Option(
+        False,
+        "--fast-load",
+        help=(
+            "Load through UNLOGGED staging tables, without waiting for commits to be flushed "
+            f"and with maintenance_work_mem = {FAST_LOAD_MAINTENANCE_WORK_MEM}; reports the WAL "
+            "written"
+        ),
+    ),
+    unlogged_tables: bool = typer.Option(
+        False,
+        "--unlogged-tables",
+        help="Create the tables UNLOGGED and switch them to LOGGED once they are loaded",
+    ),
+    report_wal: bool = typer.Option(
+        False, "--report-wal", help="Report the WAL written by each import"
+    ),
+    stream: bool = typer.Option(
+        False,
+        "--stream/--extract",
+        help="Read CSV files straight out of the cached zip files instead of extracting them",
+    ),
+    revalidate: bool = typer.Option(
+        False,
+        "--revalidate",
+        help="Check cached files with the server and download only those that have changed",
+    ),
+    source_dir: Path | None = typer.Option(
+        None,
+        "--source-dir",
+        exists=True,
+        file_okay=False,
+        help="Read the zip files from this directory instead of downloading them",
+    ),
+    mirror_url: str | None = typer.Option(
+        None,
+        "--mirror-url",
+        help="Download the zip files from this URL prefix instead of destatis.de",
+    ),
+    peers: list[str] | None = typer.Option(
+        None,
+        "--peer",
+        help="URL of another host's 'zensus2pgsql cache serve' to try before downloading (repeatable)",
+    ),
+    download_parts: int = typer.Option(
+        1, "--download-parts", min=1, help="Download large files in this many byte ranges at once"
+    ),
+    resolutions: list[Resolution] | None = typer.Option(
+        None,
+        "--resolution",
+        help="Import only the grids with this cell size (repeatable; default: all)",
+    ),
+    fetch_workers: int | None = typer.Option(
+        None,
+        "--fetch-workers",
+        min=1,
+        help=f"Number of files downloaded at once (default: {DEFAULT_FETCH_WORKERS})",
+    ),
+    db_workers: int | None = typer.Option(
+        None,
+        "--db-workers",
+        min=1,
+        help=f"Number of CSV files imported at once (default: {DEFAULT_DB_WORKERS})",
+    ),
+    pool_size: int | None = typer.Option(
+        None,
+        "--pool-size",
+        min=1,
+        help=(
+            "Most database connections opened (default: one per database worker, plus --copy-parts)"
+        ),
+    ),
+    copy_parts: int = typer.Option(
+        1,
+        "--copy-parts",
+        min=1,
+        help=(
+            "COPY large extracted CSV files in up to this many parts at once, over separate "
+            "connections (staged load mode)"
+        ),
+    ),
+    index_workers: int | None = typer.Option(
+        None,
+        "--index-workers",
+        min=1,
+        help=(
+            "Number of spatial indexes built at once after all files are loaded "
+            "(default: one per database worker)"
+        ),
+    ),
+    index_memory: str | None = typer.Option(
+        None,
+        "--index-memory",
+        metavar="SIZE",
+        help=(
+            "maintenance_work_mem of each index build, e.g. 512MB (default: the server's "
+            f"setting, {FAST_LOAD_MAINTENANCE_WORK_MEM} with --fast-load)"
+        ),
+    ),
+    auto: bool = typer.Option(
+        False,
+        "--auto",
+        help=(
+            "Size the workers and connections not given to the database server's free "
+            "connections and worker processes and the local CPU count"
+        ),
+    ),
+    extract_workers: int = typer.Option(
+        DEFAULT_EXTRACT_WORKERS,
+        "--extract-workers",
+        min=1,
+        help="Number of zip files extracted at once",
+    ),
+    extract_processes: bool = typer.Option(
+        False,
+        "--extract-processes/--extract-threads",
+        help="Extract zip files in separate processes, so decompression uses more CPU cores",
+    ),
+    extract_cache: bool = typer.Option(
+        False,
+        "--extract-cache/--no-extract-cache",
+        help=(
+            "Keep extracted CSV files in the cache so later imports skip decompression "
+            "(takes several times the size of the zip files)"
+        ),
+    ),
+    temp_dir: Path | None = typer.Option(
+        None,
+        "--temp-dir",
+        exists=True,
+        file_okay=False,
+        writable=True,
+        help="Directory for scratch data such as extracted CSV files (default: system temp dir)",
+    ),
+    queue_depth: int = typer.Option(
+        2,
+        "--queue-depth",
+        min=0,
+        help="Files waiting between pipeline stages, per worker (0 for no limit)",
+    ),
+    cache_max_size: int | None = typer.Option(
+        None,
+        "--cache-max-size",
+        parser=parse_size_option,
+        metavar="SIZE",
+        help="Byte budget for the download cache, e.g. 5G; least recently used files are removed",
+        envvar=CACHE_MAX_SIZE_ENVVAR,
+    ),
     verbose: int = typer.Option(
         0, "--verbose", "-v", count=True, help="Increase verbosity (-v for INFO, -vv for DEBUG)"
     ),
@@ -271,39 +617,224 @@ def collect(
     # Make sure our cache directory exists
     create_cache_dir()
 
-    db_config = DatabaseConfig(host, port, database, user, password, schema, srid, drop_existing)
+    db_config = DatabaseConfig(
+        host,
+        port,
+        database,
+        user,
+        password,
+        schema,
+        srid,
+        drop_existing,
+        load_mode,
+        fast_load=fast_load,
+        unlogged_tables=unlogged_tables,
+        report_wal=report_wal,
+        spatial_index=spatial_index,
+    )
 
     # Create output directory if it doesn't exist
-    asyncio.run(collect_wrapper(tables, skip_existing, db_config))
+    asyncio.run(
+        collect_wrapper(
+            tables,
+            skip_existing,
+            db_config,
+            stream=stream,
+            revalidate=revalidate,
+            download_parts=download_parts,
+            source_dir=source_dir,
+            mirror_url=mirror_url,
+            peers=peers,
+            cache_max_size=cache_max_size,
+            fetch_workers=fetch_workers,
+            db_workers=db_workers,
+            pool_size=pool_size,
+            copy_parts=copy_parts,
+            index_workers=index_workers,
+            index_memory=index_memory,
+            auto=auto,
+            extract_workers=extract_workers,
+            extract_processes=extract_processes,
+            resolutions=resolutions,
+            extract_cache=extract_cache,
+            temp_dir=temp_dir,
+            queue_depth=queue_depth,
+        )
+    )
 
 
-async def collect_wrapper(tables: list[str], skip_existing: bool, db_config: DatabaseConfig):
+def select_files(
+    tables: list[str], source_dir: Path | None = None, mirror_url: str | None = None
+) -> list[tuple[str, str]]:
     """
-    Encapsulate all async operations for the collect command
+    Returns the names and URLs of the Gitterdaten files in `tables` (`["all"]` for all files)
+
+    With `source_dir`, files present in that directory are read from there (as `file://`
+    URLs) instead of being downloaded. With `mirror_url`, the remaining files are
+    downloaded from that URL prefix instead of destatis.de. Files are looked up by the
+    file name of their destatis.de URL, or by the name they have in the cache.
+    """
+    files = [(f["name"], f["url"]) for f in GITTERDATEN_FILES]
+    if tables != ["all"]:
+        files = [(name, url) for name, url in files if name in tables]
+
+    return [(name, resolve_source_url(name, url, source_dir, mirror_url)) for name, url in files]
+
+
+def resolve_source_url(
+    name: str, url: str, source_dir: Path | None = None, mirror_url: str | None = None
+) -> str:
+    """
+    Returns the URL the dataset `name` (published at `url`) is fetched from
+
+    >>> resolve_source_url("a", "https://example.com/data/A.zip", mirror_url="http://mirror/z/")
+    'http://mirror/z/A.zip'
+    """
+    filename = PurePosixPath(httpx.URL(url).path).name
+
+    if source_dir is not None:
+        for candidate in (source_dir / filename, source_dir / f"{name}.zip"):
+            if candidate.is_file():
+                return candidate.resolve().as_uri()
+        if mirror_url is None:
+            # Reported as a failed download of this dataset
+            return (source_dir / filename).resolve().as_uri()
+
+    if mirror_url is not None:
+        return f"{mirror_url.rstrip('/')}/{filename}"
+
+    return url
+
+
+class ThroughputColumn(ProgressColumn):
+    """
+    Shows the rolling rate of the `Throughput` passed to a task as its `throughput` field
     """
-    db_pool = await get_db_pool(db_config)
 
-    files_to_import: list[tuple[str, str]]
+    def render(self, task: Task) -> Text:
+        throughput = task.fields.get("throughput")
+        if throughput is None or not throughput.total:
+            return Text("")
+        return Text(throughput.format_rate(), style="progress.data.speed")
+
+
+def download_progress() -> Progress:
+    """
+    Progress display for the pipeline, showing counts instead of percentages
+    """
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),  # Shows "X of Y" instead of percentage
+        ThroughputColumn(),
+        TimeRemainingColumn(),
+    )
+
+
+def print_download_summary(fetch_manager: "FetchManager", cache_max_size: int | None) -> None:
+    """
+    Print the download statistics and keep the cache within `cache_max_size` bytes
+    """
+    rprint("\n[bold cyan]Download Summary:[/bold cyan]")
+    rprint(f"  [green]✓ Downloaded: {fetch_manager.success}[/green]")
+    rprint(f"  [yellow]⊘ Skipped: {fetch_manager.skipped}[/yellow]")
+    rprint(f"  [red]✗ Failed: {fetch_manager.failed}[/red]")
+    for error in fetch_manager.errors:
+        rprint(f"    [red]{error}[/red]")
+
+    stages = (
+        ("Downloaded", fetch_manager.download_throughput),
+        ("Inflated", fetch_manager.inflate_throughput),
+        ("Copied", fetch_manager.copy_throughput),
+    )
+    if any(throughput.total for _, throughput in stages):
+        rprint("\n[bold cyan]Throughput:[/bold cyan]")
+        for label, throughput in stages:
+            if throughput.total:
+                rprint(f"  {label} {throughput.summary()}")
+
+    datasets = [
+        dataset for dataset in fetch_manager.dataset_times.report() if dataset.actual is not None
+    ]
+    if datasets:
+        rprint("\n[bold cyan]Dataset times (largest first):[/bold cyan]")
+        for dataset in datasets:
+            size = format_size(dataset.size) if dataset.size is not None else "unknown size"
+            estimated = f"{dataset.estimated:.1f}s" if dataset.estimated is not None else "-"
+            rprint(f"  {dataset.name} ({size}): estimated {estimated}, took {dataset.actual:.1f}s")
+
+    if fetch_manager.wal_start is not None and fetch_manager.wal_end is not None:
+        # Imports running at the same time write to the same WAL, so the figure of each import
+        # includes the WAL of those running alongside it; the total is that of the whole run
+        total = format_size(fetch_manager.wal_end - fetch_manager.wal_start)
+        rprint(f"\n[bold cyan]WAL written: {total}[/bold cyan]")
+        for name, wal_bytes in fetch_manager.wal_bytes.items():
+            rprint(f"  {name}: {format_size(wal_bytes)}")
+
+    if fetch_manager.index_elapsed is not None:
+        rprint(
+            f"\n[bold cyan]Index builds ({fetch_manager.index_workers} at a time, "
+            f"{fetch_manager.index_elapsed:.1f}s):[/bold cyan]"
+        )
+        for table_name, seconds in fetch_manager.index_times.items():
+            rprint(f"  {table_name}: {seconds:.1f}s")
+        for table_name, error in fetch_manager.index_errors.items():
+            rprint(f"  [red]✗ {table_name}: {error}[/red]")
+
+    if cache_max_size is not None:
+        evicted = evict_cached_files(
+            fetch_manager.output_folder, fetch_manager.manifest, cache_max_size
+        )
+        if evicted:
+            freed = format_size(sum(file.size for file in evicted))
+            rprint(f"  [dim]Removed {len(evicted)} files ({freed}) from the cache[/dim]")
+
+
+async def collect_wrapper(
+    tables: list[str],
+    skip_existing: bool,
+    db_config: DatabaseConfig,
+    stream: bool = False,
+    revalidate: bool = False,
+    download_parts: int = 1,
+    source_dir: Path | None = None,
+    mirror_url: str | None = None,
+    peers: list[str] | None = None,
+    cache_max_size: int | None = None,
+    fetch_workers: int | None = None,
+    db_workers: int | None = None,
+    pool_size: int | None = None,
+    copy_parts: int = 1,
+    index_workers: int | None = None,
+    index_memory: str | None = None,
+    auto: bool = False,
+    extract_workers: int = DEFAULT_EXTRACT_WORKERS,
+    extract_processes: bool = False,
+    resolutions: Sequence[str] | None = None,
+    extract_cache: bool = False,
+    temp_dir: Path | None = None,
+    queue_depth: int = 2,
+):
+    """
+    Encapsulate all async operations for the collect command
+    """
+    workers = await choose_worker_settings(
+        db_config, fetch_workers, db_workers, pool_size, auto, copy_parts
+    )
+    db_pool = await get_db_pool(db_config, workers.pool_size)
 
     # Build list of files to download and import
-    if tables == ["all"]:
-        files_to_import = [(f["name"], f["url"]) for f in GITTERDATEN_FILES]
-    else:
-        files_to_import = [(f["name"], f["url"]) for f in GITTERDATEN_FILES if f["name"] in tables]
+    files_to_import = select_files(tables, source_dir, mirror_url)
 
     rprint(f"[cyan]Downloading and importing {len(files_to_import)} Gitterdaten files[/cyan]")
 
-    http_client = httpx.AsyncClient(http2=True)
+    # HTTP/2 multiplexes all requests to a host over one connection; parallel byte ranges
+    # are only faster over separate connections
+    http_client = httpx.AsyncClient(http2=download_parts == 1)
 
     try:
-        # Configure progress bar to show counts instead of percentages
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            MofNCompleteColumn(),  # Shows "X of Y" instead of percentage
-            TimeRemainingColumn(),
-        ) as progress:
+        with download_progress() as progress:
             fetch_manager = FetchManager(
                 http_client,
                 Path(CACHE),
@@ -311,21 +842,43 @@ async def collect_wrapper(tables: list[str], skip_existing: bool, db_config: Dat
                 db_pool,
                 db_config,
                 total=len(files_to_import),
+                semaphore=workers.fetch_workers,
                 skip_existing=skip_existing,
+                num_workers=workers.fetch_workers,
+                db_workers=workers.db_workers,
+                copy_parts=copy_parts,
+                index_workers=index_workers,
+                index_memory=index_memory,
+                stream=stream,
+                revalidate=revalidate,
+                download_parts=download_parts,
+                peers=peers,
+                extract_workers=extract_workers,
+                extract_processes=extract_processes,
+                resolutions=resolutions,
+                extract_cache=extract_cache,
+                cache_max_size=cache_max_size,
+                temp_dir=temp_dir,
+                queue_depth=queue_depth,
             )
 
-            await fetch_manager.start(files_to_import, tables)
+            try:
+                await fetch_manager.start(files_to_import, tables)
+            except Zensus2PgsqlError as exc:
+                logger.error(str(exc))
+                raise typer.Exit(1)
 
-        rprint("\n[bold cyan]Download Summary:[/bold cyan]")
-        rprint(f"  [green]✓ Downloaded: {fetch_manager.success}[/green]")
-        rprint(f"  [yellow]⊘ Skipped: {fetch_manager.skipped}[/yellow]")
-        rprint(f"  [red]✗ Failed: {fetch_manager.failed}[/red]")
+        print_download_summary(fetch_manager, cache_max_size)
     finally:
         fetch_manager.remove_temp_dir()
         await http_client.aclose()
         await db_pool.close()
 
 
+#: Seconds to wait for the answer to a HEAD request asking for the size of a file
+HEAD_TIMEOUT = 10.0
+
+
 class FetchManager:
     """
     Manager that coordinates file downloads, progress display and record insertion into the database.
@@ -334,36 +887,102 @@ class FetchManager:
     #: Pattern used to find CSV files in downloaded zip files
     CSV_FILE_MATCH_PATTERN = "*Gitter.csv"
 
+    #: Number of rows converted per batch when loading with `LoadMode.direct`
+    COPY_BATCH_SIZE = 10_000
+
+    #: Smallest number of bytes per part when a CSV file is COPYed in parts
+    COPY_PART_MIN_SIZE = 64 * 1024 * 1024
+
     def __init__(
         self,
         client: httpx.AsyncClient,
         output_folder: Path,
         progress: Progress,
-        db_pool: asyncpg.Pool,
-        db_config: DatabaseConfig,
+        db_pool: asyncpg.Pool | None,
+        db_config: DatabaseConfig | None,
         total: int | None = None,
         semaphore: int = 10,
         skip_existing: bool = True,
-        num_workers: int = 5,
+        num_workers: int = DEFAULT_FETCH_WORKERS,
+        stream: bool = False,
+        download_retries: int = 3,
+        revalidate: bool = False,
+        download_parts: int = 1,
+        peers: list[str] | None = None,
+        scheduler: DownloadScheduler | None = None,
+        extract_workers: int = DEFAULT_EXTRACT_WORKERS,
+        extract_processes: bool = False,
+        resolutions: Sequence[str] | None = None,
+        extract_cache: bool = False,
+        cache_max_size: int | None = None,
+        temp_dir: Path | None = None,
+        queue_depth: int = 2,
+        db_workers: int | None = None,
+        copy_parts: int = 1,
+        index_workers: int | None = None,
+        index_memory: str | None = None,
     ) -> None:
         self.client = client
         self.output_folder = output_folder
-        self.semaphore = asyncio.Semaphore(semaphore)
         self.progress = progress
-        self.db_pool = db_pool
-        self.db_config = db_config
         self.skip_existing = skip_existing
 
+        # Without a database, files are only downloaded into the cache (the `fetch` command)
+        self.db_pool = db_pool
+        self._db_config = db_config
+        self.download_only = db_pool is None
+
+        # Read CSV files straight out of their zip archives instead of extracting them
+        self.stream = stream
+
+        # Number of times an interrupted download is resumed before giving up
+        self.download_retries = download_retries
+
+        # Retries failed downloads and adapts the number of concurrent downloads (at most
+        # `semaphore`) to how the servers cope
+        self.scheduler = scheduler or DownloadScheduler(max_concurrency=semaphore)
+
+        # Check existing files with the server (conditional requests) instead of skipping them
+        self.revalidate = revalidate
+
+        # Number of byte ranges large files are downloaded in concurrently
+        self.download_parts = download_parts
+
+        # Validators and hashes of the files in the cache
+        self.manifest = CacheManifest.load(output_folder)
+
+        # URLs of other hosts' caches (see `zensus2pgsql cache serve`) tried before the origin,
+        # and the files each of them has
+        self.peers = peers or []
+        self.peer_manifests: dict[str, dict[str, CacheEntry]] = {}
+
+        # Bytes downloaded, bytes inflated from the archives and rows copied into the database
+        self.download_throughput = Throughput()
+        self.inflate_throughput = Throughput()
+        self.copy_throughput = Throughput("rows")
+
         # Progress bar tasks
-        self.fetch_task = progress.add_task("[cyan]Downloading...[/cyan]", total=total)
-        self.extract_task = progress.add_task("[cyan]Extracting...[/cyan]", total=total)
+        self.fetch_task = progress.add_task(
+            "[cyan]Downloading...[/cyan]", total=total, throughput=self.download_throughput
+        )
+        self.extract_task = progress.add_task(
+            "[cyan]Extracting...[/cyan]",
+            total=total,
+            visible=not self.download_only,
+            throughput=self.inflate_throughput,
+        )
 
         # Total number of database jobs is unknown at the beginning so we
         # increment this as we collect CSV files to import
         self.database_task_total = 0
         self.database_task = progress.add_task(
-            "[cyan]Importing...[/cyan]", total=self.database_task_total
+            "[cyan]Importing...[/cyan]",
+            total=self.database_task_total,
+            visible=not self.download_only,
+            throughput=self.copy_throughput,
         )
+        # Shown once the index phase starts
+        self.index_task = progress.add_task("[cyan]Indexing...[/cyan]", total=0, visible=False)
 
         # File processing statistics
         self.failed: int = 0
@@ -373,16 +992,107 @@ class FetchManager:
         # Keeps track of errors
         self.errors: list[str] = []
 
-        # Number of workers for fetch and database workers
+        # Number of fetch workers, and of database workers (as many by default)
         self.num_workers: int = num_workers
+        self.db_workers: int = db_workers or num_workers
+
+        # Large extracted CSV files are COPYed in up to this many parts at once, over
+        # separate connections (see `copy_in_parts`)
+        self.copy_parts = copy_parts
+        self.copy_connections_lock = asyncio.Lock()
+
+        # Spatial indexes are built once all files are loaded (see `build_indexes`), this
+        # many at a time (as many as database workers by default), each with `index_memory`
+        # as its maintenance_work_mem (the server's setting if None)
+        self.index_workers: int = index_workers or self.db_workers
+        if index_memory is None and db_config is not None and db_config.fast_load:
+            index_memory = FAST_LOAD_MAINTENANCE_WORK_MEM
+        self.index_memory = index_memory
+
+        # Grid cell sizes to import (all if None); other CSV files in the archives are skipped
+        self.resolutions = resolutions
+
+        # Keep extracted CSV files in the cache, keyed by the archive's sha256, so later runs
+        # importing the same archive do not decompress it again (off by default, since the
+        # inflated files take several times the space of the archives)
+        self.extract_cache = extract_cache
+
+        # Byte budget of the cache; extracted files over it are removed once imported
+        self.cache_max_size = cache_max_size
+
+        # Number of archives extracted at once, in threads or (to use more cores for
+        # inflating) in worker processes
+        self.extract_workers = extract_workers
+        self.extract_processes = extract_processes
+        self.extract_executor: Executor = (
+            ProcessPoolExecutor(extract_workers, mp_context=multiprocessing.get_context("spawn"))
+            if extract_processes
+            else ThreadPoolExecutor(extract_workers, thread_name_prefix="extract")
+        )
+
+        # Create all of our processing queues. Each holds at most `queue_depth` items per
+        # worker taking from it (unbounded if 0), so a stage that falls behind makes the
+        # stages before it wait instead of piling up downloaded and extracted files
+        self.queue_depth = queue_depth
+        self.fetch_queue: asyncio.Queue[tuple[str, str] | None] = asyncio.Queue(
+            queue_depth * num_workers
+        )
+        self.extract_queue: asyncio.Queue[Path | None] = asyncio.Queue(
+            queue_depth * extract_workers
+        )
+        self.database_queue: asyncio.Queue[CsvSource | None] = asyncio.Queue(
+            queue_depth * self.db_workers
+        )
+
+        # Set once `producer` has queued all files to fetch (nothing to wait for until `start`)
+        self.fetch_items_queued = asyncio.Event()
+        self.fetch_items_queued.set()
+
+        # Create a shared temp directory (in `temp_dir` if given)
+        self.temp_dir = tempfile.TemporaryDirectory(dir=temp_dir, ignore_cleanup_errors=True)
+
+        # Directory each extracted CSV file was extracted to, and the number of CSV files per
+        # directory that are still to be imported; a directory is removed once it reaches zero
+        self.extract_dirs: dict[Path, Path] = {}
+        self.pending_imports: dict[Path, int] = {}
 
-        # Create all of our processing queues
-        self.fetch_queue: asyncio.Queue[tuple[str, str] | None] = asyncio.Queue()
-        self.extract_queue: asyncio.Queue[Path | None] = asyncio.Queue()
-        self.database_queue: asyncio.Queue[Path | None] = asyncio.Queue()
+        # Extract cache directory the files in each temp directory are linked from
+        self.cached_dirs: dict[Path, Path] = {}
 
-        # Create a shared temp directory
-        self.temp_dir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        # Sizes and import times of the datasets, and the dataset each CSV file belongs to
+        self.dataset_times = DatasetTimes(
+            DOWNLOAD_SECONDS_PER_BYTE if self.download_only else IMPORT_SECONDS_PER_BYTE
+        )
+        self.csv_datasets: dict[CsvSource, str] = {}
+
+        # WAL bytes written by each import (by table) and the WAL positions the run spans
+        self.wal_bytes: dict[str, int] = {}
+        self.wal_start: int | None = None
+        self.wal_end: int | None = None
+
+        # Tables loaded with a geometry column whose index is still to be built, seconds each
+        # index build took, errors of the failed builds and seconds the whole index phase took
+        self.pending_indexes: list[str] = []
+        self.index_times: dict[str, float] = {}
+        self.index_errors: dict[str, str] = {}
+
+        # Tables skipped because they already existed (their index is only built if missing)
+        self.existing_tables: set[str] = set()
+        self.index_elapsed: float | None = None
+
+    @property
+    def pool(self) -> asyncpg.Pool:
+        """Database connection pool of this run"""
+        if self.db_pool is None:
+            raise Zensus2PgsqlError("No database configured for this run")
+        return self.db_pool
+
+    @property
+    def db_config(self) -> DatabaseConfig:
+        """Database settings of this run"""
+        if self._db_config is None:
+            raise Zensus2PgsqlError("No database configured for this run")
+        return self._db_config
 
     async def start(self, files_to_import: list[tuple[str, str]], tables: list[str]) -> None:
         """
@@ -390,26 +1100,128 @@ class FetchManager:
         """
         jobs = []
 
-        for filename, url in files_to_import:
-            if tables != ["all"] and filename not in tables:
-                continue
-            await self.fetch_queue.put((url, f"{filename}.zip"))
+        fetch_items = [
+            (url, f"{filename}.zip")
+            for filename, url in files_to_import
+            if tables == ["all"] or filename in tables
+        ]
+
+        if not self.download_only and not self.stream:
+            cached = [self.output_folder / f"{filename}.zip" for filename, _ in files_to_import]
+            await asyncio.to_thread(self.check_extract_space, [p for p in cached if p.exists()])
+
+        for peer in self.peers:
+            self.peer_manifests[peer] = await fetch_peer_manifest(self.client, peer)
+
+        # Start with the largest datasets, so no large one is left to finish on its own
+        sizes = await asyncio.gather(*(self.estimate_size(*item) for item in fetch_items))
+        self.dataset_times.sizes = {
+            filename: size for (_, filename), size in zip(fetch_items, sizes)
+        }
+        fetch_items = largest_first(fetch_items, sizes)
+        logger.debug(f"Fetch order, largest first: {', '.join(name for _, name in fetch_items)}")
 
         for _ in range(self.num_workers):
             jobs.append(self.fetch_worker())
-            jobs.append(self.database_worker())
 
-        jobs.append(self.extract_worker())
+        if not self.download_only:
+            for _ in range(self.db_workers):
+                jobs.append(self.database_worker())
+
+        if not self.download_only:
+            for _ in range(self.extract_workers):
+                jobs.append(self.extract_worker())
+
+        # Feed the fetch queue while the workers run; it only holds a few files at a time
+        self.fetch_items_queued.clear()
+        jobs.insert(0, self.producer(fetch_items))
 
         # Add coordinator to manage pipeline shutdown
         jobs.append(self.coordinator())
 
-        await asyncio.gather(*jobs)
+        try:
+            await asyncio.gather(*jobs)
+        finally:
+            self.extract_executor.shutdown(wait=False, cancel_futures=True)
+
+        if not self.download_only:
+            await self.build_indexes()
 
     def remove_temp_dir(self):
         """Removes the temp dir we create in __init__"""
         self.temp_dir.cleanup()
 
+    async def estimate_size(self, url: str, filename: str) -> int | None:
+        """
+        Size of the archive `filename` in bytes, or None if it is unknown
+
+        The size is taken from the cache manifest, a cache peer's manifest or the local
+        file of a `file://` URL, and else from a HEAD request to `url`. HEAD requests go
+        through the download scheduler, so they share its concurrency limit and circuit
+        breakers; they are not retried, a failed one only leaves the size unknown.
+        """
+        entries = [self.manifest.get(filename)]
+        entries += [peer_entries.get(filename) for peer_entries in self.peer_manifests.values()]
+        for entry in entries:
+            if entry is not None and entry.size is not None:
+                return entry.size
+
+        if url.startswith("file:"):
+            try:
+                return Path(url2pathname(urlparse(url).path)).stat().st_size
+            except OSError:
+                return None
+
+        async def head() -> httpx.Response:
+            response = await self.client.head(url, follow_redirects=True, timeout=HEAD_TIMEOUT)
+            response.raise_for_status()
+            return response
+
+        try:
+            response = await self.scheduler.run(url, head, retries=0)
+        except (httpx.HTTPError, CircuitOpenError) as exc:
+            logger.debug(f"Unable to get the size of {filename}: {exc}")
+            return None
+        length = response.headers.get("Content-Length", "")
+        return int(length) if length.isdigit() else None
+
+    @property
+    def extract_target(self) -> Path:
+        """Directory extracted files are written to (the cache or the temp dir)"""
+        return self.output_folder if self.extract_cache else Path(self.temp_dir.name)
+
+    def space_needed(self, zip_file: Path) -> int:
+        """Bytes of disk space extracting `zip_file` takes, from its central directory"""
+        members = self.list_csv_members(zip_file)
+        if self.extract_cache:
+            sha256 = archive_sha256(zip_file, self.manifest.get(zip_file.name))
+            members = missing_members(zip_file, extracted_dir(self.output_folder, sha256), members)
+        return extracted_size(zip_file, members)
+
+    def check_extract_space(self, zip_files: list[Path]) -> None:
+        """
+        Check before the run that there is enough space to extract the cached `zip_files`
+
+        Raises `Zensus2PgsqlError` if even the largest archive does not fit; warns if all of
+        them together might not (extracted files are removed as soon as they are imported, so
+        they rarely all take up space at the same time).
+        """
+        sizes = []
+        for zip_file in zip_files:
+            try:
+                sizes.append(self.space_needed(zip_file))
+            except (OSError, zipfile.BadZipFile):
+                # Checked again (and reported) when the archive is extracted
+                continue
+        if not sizes:
+            return
+
+        check_free_space(self.extract_target, max(sizes), "extract the largest dataset")
+        try:
+            check_free_space(self.extract_target, sum(sizes), "extract all datasets")
+        except Zensus2PgsqlError as exc:
+            logger.warning(f"{exc}; the import may run out of space")
+
     async def fetch_worker(self) -> None:
         """
         Fetch single file and write it to `self.output_folder` location
@@ -426,45 +1238,166 @@ class FetchManager:
             url, filename = fetch_item
 
             output_path = Path(self.output_folder) / filename
-
-            # Skip if file exists and skip_existing is True
-            if output_path.exists() and self.skip_existing:
-                logger.debug(f"Skipping existing file: {filename}")
-                self.skipped += 1
-                await self.extract_queue.put(output_path)
-                self.progress.update(self.fetch_task, advance=1)
-                self.fetch_queue.task_done()
-                continue
+            self.dataset_times.start(filename)
 
             try:
-                logger.info(f"Downloading: {filename}")
-                async with self.semaphore:  # TODO: this probably isn't needed any more
-                    async with self.client.stream(
-                        "GET", url, follow_redirects=True, timeout=60.0
-                    ) as response:
-                        response.raise_for_status()
-
-                        async with aiofiles.open(output_path, "wb") as f:
-                            async for chunk in response.aiter_bytes(chunk_size=8192):
-                                await f.write(chunk)
+                # Cached files are checked before they are reused; corrupt ones are downloaded again
+                cached = (
+                    output_path.exists()
+                    and (self.skip_existing or self.revalidate)
+                    and await self.check_cached_file(url, filename, output_path)
+                )
+
+                # Skip if file exists and skip_existing is True
+                if cached and self.skip_existing and not self.revalidate:
+                    logger.debug(f"Skipping existing file: {filename}")
+                    self.manifest.touch(filename)
+                    self.manifest.save()
+                    self.skipped += 1
+                    await self.queue_for_extraction(output_path)
+                    self.progress.update(self.fetch_task, advance=1)
+                    if self.download_only:
+                        self.dataset_times.finish(filename)
+                    continue
+
+                headers = {}
+                if self.revalidate and cached:
+                    headers = conditional_headers(self.manifest.get(filename), url, output_path)
 
-                            self.progress.update(self.fetch_task, advance=1)
-                            await self.extract_queue.put(output_path)
+                logger.info(f"Downloading: {filename}")
+                result = await self.download(url, filename, output_path, headers)
 
+                self.progress.update(self.fetch_task, advance=1)
+                await self.queue_for_extraction(output_path)
+
+                if result.not_modified:
+                    self.manifest.touch(filename)
+                    self.manifest.save()
+                    self.skipped += 1
+                    logger.debug(f"Cached file is up to date: {filename}")
+                else:
+                    self.manifest.set(
+                        filename,
+                        CacheEntry(
+                            url,
+                            result.etag,
+                            result.last_modified,
+                            result.size,
+                            result.sha256,
+                            output_path.stat().st_mtime,
+                        ),
+                    )
+                    self.manifest.touch(filename)
+                    self.manifest.save()
                     self.success += 1
+                    self.dataset_times.sizes[filename] = result.size
                     logger.debug(f"Successfully downloaded: {filename}")
 
+                if self.download_only:
+                    self.dataset_times.finish(filename)
+
             except Exception as e:
                 self.failed += 1
+                self.errors.append(f"{filename}: {e}")
                 logger.error(f"Failed to download {filename}: {e}")
+                self.dataset_times.finish(filename)
             finally:
                 self.fetch_queue.task_done()
 
-    async def extract_worker(self):
+    async def download(
+        self, url: str, filename: str, output_path: Path, headers: dict[str, str]
+    ) -> DownloadResult:
+        """
+        Download `filename` from the first cache peer that has it, or else from `url`.
+
+        Files from peers must match the sha256 the peer's manifest records for them.
+        Downloads are written to a ".part" file first and resumed if the connection drops.
+        """
+        for peer, entries in self.peer_manifests.items():
+            entry = entries.get(filename)
+            if entry is None or entry.sha256 is None:
+                continue
+
+            try:
+                # No retries: the next peer or the origin is tried instead
+                result = await self.scheduler.run(
+                    peer_url(peer, filename),
+                    lambda: download_file(
+                        self.client,
+                        peer_url(peer, filename),
+                        output_path,
+                        retries=self.download_retries,
+                        headers=headers,
+                        parts=self.download_parts,
+                        on_progress=self.download_throughput.add,
+                    ),
+                    retries=0,
+                )
+            except (httpx.HTTPError, Zensus2PgsqlError) as exc:
+                logger.warning(f"Unable to download {filename} from cache peer {peer}: {exc}")
+                continue
+
+            if result.not_modified or result.sha256 == entry.sha256:
+                logger.debug(f"Downloaded {filename} from cache peer {peer}")
+                return result
+
+            # The mismatching file has replaced the cached one; the conditional headers no
+            # longer describe what is on disk, so the next source must send the whole file
+            destination = quarantine_file(output_path)
+            remove_partial(output_path)
+            headers = {}
+            logger.warning(
+                f"{filename} from cache peer {peer} does not match its sha256, "
+                f"moved to {destination}"
+            )
+
+        return await self.scheduler.run(
+            url,
+            lambda: download_file(
+                self.client,
+                url,
+                output_path,
+                retries=self.download_retries,
+                headers=headers,
+                parts=self.download_parts,
+                on_progress=self.download_throughput.add,
+            ),
+        )
+
+    async def queue_for_extraction(self, zip_file: Path) -> None:
+        """Hand a downloaded archive to the extract worker (unless only downloading)"""
+        if not self.download_only:
+            await self.extract_queue.put(zip_file)
+
+    async def check_cached_file(self, url: str, filename: str, output_path: Path) -> bool:
+        """
+        Verify the cached `output_path` against its manifest entry before it is reused.
+
+        Corrupt files are moved to the cache's quarantine directory and their manifest entry
+        is removed. Returns True if the file can be used.
+        """
+        entry = self.manifest.get(filename)
+        verified = await asyncio.to_thread(verify_cached_file, output_path, entry, url)
+
+        if verified is None:
+            destination = quarantine_file(output_path)
+            logger.warning(f"Cached file {filename} is corrupt, moved to {destination}")
+            self.manifest.remove(filename)
+            self.manifest.save()
+            return False
+
+        if verified != entry:
+            self.manifest.set(filename, verified)
+            self.manifest.save()
+
+        return True
+
+    async def extract_worker(self) -> None:
         """
         Worker that unzips files from the zipfile queue.
 
-        TODO: Add a cache for extracted files so we can skip them if they have been extracted
+        With the extract cache, extracted files are kept in the cache (see `extract`), so
+        archives that were extracted before are not decompressed again.
         """
         while True:
             zip_file = await self.extract_queue.get()
@@ -475,24 +1408,172 @@ class FetchManager:
                 self.extract_queue.task_done()
                 break
 
+            extract_to = Path(self.temp_dir.name) / zip_file.name.replace(".zip", "")
+
             try:
-                logger.info(f"Extracting: {zip_file.name}")
-                extract_to = Path(self.temp_dir.name) / zip_file.name.replace(".zip", "")
-                await asyncio.to_thread(zipfile.ZipFile(zip_file).extractall, extract_to)
+                csv_files: list[CsvSource]
+
+                # Only the members that are imported are inflated
+                members = await asyncio.to_thread(self.list_csv_members, zip_file)
+
+                if self.stream:
+                    # Database workers read the members straight out of the archive
+                    logger.info(f"Listing: {zip_file.name}")
+                    csv_files = [ZipMember(zip_file, member) for member in members]
+                else:
+                    logger.info(f"Extracting: {zip_file.name}")
+                    extracted = await self.extract(zip_file, extract_to, members)
+                    self.track_extracted(extract_to, extracted)
+                    csv_files = list(extracted)
 
-                csv_files = list(Path(extract_to).rglob(self.CSV_FILE_MATCH_PATTERN))
                 logger.debug(f"Found {len(csv_files)} CSV file(s) in {zip_file.name}")
+                self.dataset_times.add_pending(zip_file.name, len(csv_files))
 
                 for csv_file in csv_files:
+                    self.csv_datasets[csv_file] = zip_file.name
                     self.database_task_total += 1
                     self.progress.update(self.database_task, total=self.database_task_total)
                     await self.database_queue.put(csv_file)
 
                 self.progress.update(self.extract_task, advance=1)
 
+            except Exception as e:
+                self.failed += 1
+                self.errors.append(f"{zip_file.name}: {e}")
+                logger.error(f"Failed to extract {zip_file.name}: {e}")
+                await asyncio.to_thread(shutil.rmtree, extract_to, ignore_errors=True)
+                self.dataset_times.finish(zip_file.name)
+
+                # Keep a broken archive from failing every later run as well
+                if isinstance(e, zipfile.BadZipFile) and zip_file.exists():
+                    destination = quarantine_file(zip_file)
+                    logger.warning(f"Moved corrupt archive {zip_file.name} to {destination}")
+                    self.manifest.remove(zip_file.name)
+                    self.manifest.save()
+
             finally:
                 self.extract_queue.task_done()
 
+    async def extract(self, zip_file: Path, extract_to: Path, members: list[str]) -> list[Path]:
+        """
+        Make the `members` of `zip_file` available in `extract_to` and return their paths
+
+        With the extract cache, members are extracted into the cache directory of the
+        archive (see `extracted_dir`) unless they are there already, and hard linked into
+        `extract_to`.
+        """
+        if not self.extract_cache:
+            return await self.inflate(zip_file, extract_to, members)
+
+        sha256 = await asyncio.to_thread(archive_sha256, zip_file, self.manifest.get(zip_file.name))
+        cached_dir = extracted_dir(self.output_folder, sha256)
+
+        missing = await asyncio.to_thread(missing_members, zip_file, cached_dir, members)
+        if missing:
+            await asyncio.to_thread(self.check_archive_space, zip_file, missing, self.output_folder)
+            # Extract next to the cache directory first, so it never holds a partial file
+            cached_dir.parent.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(prefix=f".{sha256}.", dir=cached_dir.parent))
+            try:
+                for path in await self.inflate(zip_file, staging, missing):
+                    target = cached_dir / path.relative_to(staging)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(path, target)
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+
+        reused = len(members) - len(missing)
+        if reused:
+            logger.debug(f"Reusing {reused} extracted file(s) of {zip_file.name} from the cache")
+
+        self.cached_dirs[extract_to] = cached_dir
+        paths = []
+        for member in members:
+            cached = cached_dir / member
+            # Mark as used for least recently used eviction
+            os.utime(cached)
+            paths.append(link_cached_file(cached, extract_to / member))
+        return paths
+
+    async def inflate(self, zip_file: Path, extract_to: Path, members: list[str]) -> list[Path]:
+        """Extract `members` of `zip_file` into `extract_to` with `self.extract_executor`"""
+        if not self.extract_cache:
+            await asyncio.to_thread(
+                self.check_archive_space, zip_file, members, Path(self.temp_dir.name)
+            )
+
+        loop = asyncio.get_running_loop()
+        if self.extract_processes:
+            # Progress callbacks cannot cross process boundaries; count the archive at once
+            extracted = await loop.run_in_executor(
+                self.extract_executor, extract_archive, zip_file, extract_to, members
+            )
+            self.inflate_throughput.add(sum(path.stat().st_size for path in extracted))
+            return extracted
+
+        return await loop.run_in_executor(
+            self.extract_executor,
+            extract_archive,
+            zip_file,
+            extract_to,
+            members,
+            self.inflate_throughput.add,
+        )
+
+    def check_archive_space(self, zip_file: Path, members: list[str], directory: Path) -> None:
+        """Raise `Zensus2PgsqlError` if `members` of `zip_file` do not fit into `directory`"""
+        check_free_space(directory, extracted_size(zip_file, members), f"extract {zip_file.name}")
+
+    def track_extracted(self, extract_to: Path, csv_files: list[Path]) -> None:
+        """Remember that `csv_files` in `extract_to` are to be imported (see `release_csv`)"""
+        if not csv_files:
+            shutil.rmtree(extract_to, ignore_errors=True)
+            self.cached_dirs.pop(extract_to, None)
+            return
+        self.pending_imports[extract_to] = self.pending_imports.get(extract_to, 0) + len(csv_files)
+        for csv_file in csv_files:
+            self.extract_dirs[csv_file] = extract_to
+
+    async def release_csv(self, csv_file: CsvSource) -> None:
+        """
+        Mark `csv_file` as imported (or failed)
+
+        Once all CSV files of an archive are done, its directory in the temp dir is removed,
+        so extracted data does not pile up over the run. With the extract cache, the files
+        are only links to the cache; the archive's cached files are then removed as well if
+        the cache is over `cache_max_size`.
+        """
+        if not isinstance(csv_file, Path) or csv_file not in self.extract_dirs:
+            return
+        extract_to = self.extract_dirs.pop(csv_file)
+        self.pending_imports[extract_to] -= 1
+        if self.pending_imports[extract_to] == 0:
+            del self.pending_imports[extract_to]
+            logger.debug(f"Removing extracted files in {extract_to}")
+            await asyncio.to_thread(shutil.rmtree, extract_to, ignore_errors=True)
+
+            cached_dir = self.cached_dirs.pop(extract_to, None)
+            if cached_dir is not None and await asyncio.to_thread(self.over_cache_budget):
+                logger.debug(f"Cache is over its budget, removing extracted files in {cached_dir}")
+                await asyncio.to_thread(shutil.rmtree, cached_dir, ignore_errors=True)
+
+    def over_cache_budget(self) -> bool:
+        """Whether the cache holds more than `cache_max_size` bytes (False without a budget)"""
+        if self.cache_max_size is None:
+            return False
+        files = list_cached_files(self.output_folder, self.manifest)
+        return sum(file.size for file in files) > self.cache_max_size
+
+    def list_csv_members(self, zip_file: Path) -> list[str]:
+        """
+        List the members of `zip_file` to import
+
+        These match `CSV_FILE_MATCH_PATTERN` and, if any were chosen, `self.resolutions`.
+        Only the archive's central directory is read.
+        """
+        with zipfile.ZipFile(zip_file) as archive:
+            return select_members(archive.namelist(), self.CSV_FILE_MATCH_PATTERN, self.resolutions)
+
     async def database_worker(self):
         """Worker that loads CSV files into the database"""
         while True:
@@ -506,261 +1587,504 @@ class FetchManager:
             # Acquire a connection from the pool for this worker
             async with self.db_pool.acquire() as conn:
                 try:
-                    # Generate table name from file name
-                    table_name = sanitize_table_name(csv_file.stem)
-                    full_table_name = f"{self.db_config.schema}.{table_name}"
-                    temp_table_name = f"{self.db_config.schema}.{table_name}_temp"
-
-                    logger.info(f"Importing: {csv_file.name} → {full_table_name}")
-                    logger.debug(f"Table name: {full_table_name} ({len(table_name)} chars)")
-
-                    # Detect file encoding
-                    file_encoding = await detect_file_encoding(csv_file)
-                    if file_encoding != "utf-8":
-                        logger.debug(f"Detected non-UTF-8 encoding: {file_encoding}")
-
-                    # Read CSV header to determine columns
-                    async with aiofiles.open(csv_file, encoding=file_encoding) as f:
-                        reader = aiocsv.readers.AsyncReader(f, delimiter=";")
-                        headers = await anext(reader)
-
-                    # Create mapping of original headers to sanitized column names
-                    column_mapping = {header: sanitize_column_name(header) for header in headers}
-
-                    # Report any renamed columns
-                    if logger.level == logging.DEBUG:
-                        renamed_cols = [
-                            (orig, san)
-                            for orig, san in column_mapping.items()
-                            if orig.lower() != san
-                        ]
-                        if renamed_cols:
-                            logging.debug(f"[yellow]Renamed {len(renamed_cols)} columns:[/yellow]")
-                            for orig, san in renamed_cols[:5]:  # Show first 5
-                                logging.debug(f"    {orig} → {san}")
-                            if len(renamed_cols) > 5:
-                                logging.debug(f"    ... and {len(renamed_cols) - 5} more")
-
-                    # Identify coordinate columns (using sanitized names)
-                    x_col = None
-                    y_col = None
-                    for header in headers:
-                        sanitized = column_mapping[header]
-                        # Check for x coordinate column (starts with x_mp or is exactly named with coordinate pattern)
-                        if (
-                            sanitized.startswith("x_mp")
-                            or sanitized.startswith("_x_mp")
-                            or "_x_mp_" in sanitized
-                        ):
-                            x_col = sanitized
-                        # Check for y coordinate column (starts with y_mp or is exactly named with coordinate pattern)
-                        elif (
-                            sanitized.startswith("y_mp")
-                            or sanitized.startswith("_y_mp")
-                            or "_y_mp_" in sanitized
-                        ):
-                            y_col = sanitized
-
-                    # Debug output for coordinate detection
-                    if x_col and y_col:
-                        logger.debug(f"Detected coordinate columns: {x_col}, {y_col}")
-                    else:
-                        logger.debug(
-                            f"No coordinate columns detected (x_col={x_col}, y_col={y_col})"
-                        )
-
-                    async with conn.transaction():
-                        # Always drop temp table if it exists
-                        await conn.execute(f"DROP TABLE IF EXISTS {temp_table_name} CASCADE;")
-
-                        # Check if final table exists and if it should be recreated
-                        table_exists = await conn.fetchval(
-                            """
-                            SELECT EXISTS (
-                                SELECT FROM information_schema.tables
-                                WHERE table_schema = $1 AND table_name = $2
-                            )
-                            """,
-                            self.db_config.schema,
-                            table_name,
-                        )
-
-                        if table_exists:
-                            if self.db_config.drop_existing:
-                                await conn.execute(f"DROP TABLE {full_table_name} CASCADE;")
-                                logger.debug("[yellow]Dropped existing table[/yellow]")
-                            else:
-                                logger.debug(
-                                    "  [yellow]Table already exists, skipping. Use --drop-existing to recreate.[/yellow]"
-                                )
-                                continue
-
-                        # Create temporary table with all columns as TEXT (sanitized names)
-                        logger.debug(f"Creating temporary table: {temp_table_name}")
-                        temp_columns_def = [f"{column_mapping[h]} TEXT" for h in headers]
-                        create_temp_sql = (
-                            f"CREATE TABLE {temp_table_name} ({', '.join(temp_columns_def)});"
-                        )
-                        await conn.execute(create_temp_sql)
-
-                        # Map Python encoding to PostgreSQL encoding name
-                        pg_encoding_map = {
-                            "utf-8": "UTF8",
-                            "iso-8859-1": "LATIN1",
-                            "windows-1252": "WIN1252",
-                            "cp1252": "WIN1252",
-                        }
-                        pg_encoding = pg_encoding_map.get(file_encoding, "UTF8")
-
-                        # Use COPY to bulk load CSV - need to pass schema and table separately
-                        logger.debug(
-                            f"Copying data to temporary table using encoding: {pg_encoding}"
-                        )
-                        await conn.copy_to_table(
-                            f"{table_name}_temp",
-                            source=str(csv_file),
-                            schema_name=self.db_config.schema,
-                            delimiter=";",
-                            null="-",
-                            header=True,
-                            encoding=pg_encoding,
-                            format="csv",
-                        )
-
-                        # Get row count from temp table
-                        if logger.level == logging.DEBUG:
-                            row_count = await conn.fetchval(
-                                f"SELECT COUNT(*) FROM {temp_table_name};"
-                            )
-                            logger.debug(f"Row count: {row_count}")
-
-                        # Detect data types for columns
-                        column_types = {}
-                        for header in headers:
-                            col_name = column_mapping[header]
-                            # Skip coordinate columns if we're creating geometry
-                            if x_col and y_col and col_name in [x_col, y_col]:
-                                continue
-                            # Detect type for this column
-                            detected_type = await detect_column_type(
-                                conn, temp_table_name, col_name
-                            )
-                            column_types[col_name] = detected_type
-
-                        # Report detected types
-                        numeric_cols = {
-                            col: typ for col, typ in column_types.items() if typ != "TEXT"
-                        }
-                        if numeric_cols:
-                            logger.debug(
-                                f"Detected {len(numeric_cols)} numeric columns "
-                                f"({sum(1 for t in numeric_cols.values() if t == 'INTEGER')} INTEGER, "
-                                f"{sum(1 for t in numeric_cols.values() if t == 'DOUBLE PRECISION')} DOUBLE PRECISION)"
-                            )
-
-                        # Create final table with detected types (using sanitized names)
-                        final_columns_def = []
-                        for header in headers:
-                            col_name = column_mapping[header]
-                            # Skip coordinate columns if we're creating geometry
-                            if x_col and y_col and col_name in [x_col, y_col]:
-                                continue
-                            col_type = column_types.get(col_name, "TEXT")
-                            final_columns_def.append(f"{col_name} {col_type}")
-
-                        # Add geometry column if we have coordinates
-                        if x_col and y_col:
-                            final_columns_def.append(f"geom GEOMETRY(Point, {self.db_config.srid})")
-
-                        # Create the final table (we already checked if it exists above)
-                        logger.debug(f"Creating final table: {full_table_name}")
-                        create_final_sql = (
-                            f"CREATE TABLE {full_table_name} ({', '.join(final_columns_def)});"
-                        )
-                        await conn.execute(create_final_sql)
-
-                        # Prepare column lists for INSERT INTO ... SELECT (using sanitized names)
-                        select_cols = []
-                        insert_cols = []
-
-                        for header in headers:
-                            col_name = column_mapping[header]
-                            # Skip coordinate columns if we're creating geometry
-                            if x_col and y_col and col_name in [x_col, y_col]:
-                                continue
-
-                            col_type = column_types.get(col_name, "TEXT")
-
-                            # Build the SELECT expression based on the target type
-                            if col_type == "INTEGER":
-                                # Convert TEXT to INTEGER, handling German decimal format and NULLs
-                                select_expr = f"NULLIF(REPLACE({col_name}, ',', '.'), '')::INTEGER"
-                            elif col_type == "DOUBLE PRECISION":
-                                # Convert TEXT to DOUBLE PRECISION, handling German decimal format and NULLs
-                                select_expr = (
-                                    f"NULLIF(REPLACE({col_name}, ',', '.'), '')::DOUBLE PRECISION"
-                                )
-                            else:
-                                # Keep as TEXT
-                                select_expr = col_name
-
-                            select_cols.append(select_expr)
-                            insert_cols.append(col_name)
-
-                        # Add geometry transformation if we have coordinates
-                        if x_col and y_col:
-                            logger.debug(f"Adding geometry column with SRID {self.db_config.srid}")
-                            # Use ST_SetSRID and ST_MakePoint for geometry creation
-                            select_cols.append(
-                                f"ST_SetSRID(ST_MakePoint("
-                                f"NULLIF(REPLACE({x_col}, ',', '.'), '')::double precision, "
-                                f"NULLIF(REPLACE({y_col}, ',', '.'), '')::double precision"
-                                f"), {self.db_config.srid})"
-                            )
-                            insert_cols.append("geom")
-
-                        # Insert from temp to final table with geometry transformation
-                        logger.debug("Inserting data from temporary table to final table")
-                        insert_from_temp_sql = f"""
-                            INSERT INTO {full_table_name} ({", ".join(insert_cols)})
-                            SELECT {", ".join(select_cols)}
-                            FROM {temp_table_name}
-                        """
-                        await conn.execute(insert_from_temp_sql)
-
-                        # Create spatial index if we have geometry
-                        if x_col and y_col:
-                            logger.debug("Creating spatial index on geometry column")
-                            index_name = f"{table_name}_geom_idx"
-                            await conn.execute(
-                                f"CREATE INDEX IF NOT EXISTS {index_name} "
-                                f"ON {full_table_name} USING GIST (geom);"
-                            )
-
-                        # Drop temporary table
-                        logger.debug(f"Dropping temporary table: {temp_table_name}")
-                        await conn.execute(f"DROP TABLE {temp_table_name};")
-
-                        self.progress.update(self.database_task, advance=1)
-
-                        logger.debug(
-                            f"  [green]✓ Imported {full_table_name}"
-                            f"{' (with geometry)' if x_col and y_col else ''}[/green]"
-                        )
+                    await self.import_csv(conn, csv_file)
 
                 except Exception as e:
                     logger.error(f"  [red]✗ Failed to import {csv_file.name}: {e!s}[/red]")
 
                 finally:
+                    await self.release_csv(csv_file)
+                    if csv_file in self.csv_datasets:
+                        self.dataset_times.finish_one(self.csv_datasets.pop(csv_file))
                     self.database_queue.task_done()
 
+    async def import_csv(self, conn: asyncpg.Connection, csv_file: CsvSource) -> None:
+        """Import a single CSV file into its own table using `conn`"""
+        # Generate table name from file name
+        table_name = sanitize_table_name(csv_file.stem)
+        full_table_name = f"{self.db_config.schema}.{table_name}"
+        temp_table_name = f"{self.db_config.schema}.{table_name}_temp"
+
+        logger.info(f"Importing: {csv_file.name} → {full_table_name}")
+        logger.debug(f"Table name: {full_table_name} ({len(table_name)} chars)")
+
+        # Detect file encoding
+        file_encoding = await detect_csv_encoding(csv_file)
+        if file_encoding != "utf-8":
+            logger.debug(f"Detected non-UTF-8 encoding: {file_encoding}")
+
+        # Read CSV header to determine columns
+        headers = await asyncio.to_thread(read_csv_header, csv_file, file_encoding)
+
+        layout = detect_csv_layout(headers)
+
+        # Always drop temp table if it exists. This is committed right away: a staging table
+        # loaded in parts is created over other connections while the transaction is open
+        await conn.execute(f"DROP TABLE IF EXISTS {temp_table_name} CASCADE;")
+
+        wal_start = await self.wal_position(conn)
+        async with conn.transaction():
+            if self.db_config.fast_load:
+                # Commits do not wait for their WAL to be flushed (a crash loses the last
+                # imports, not consistency)
+                await conn.execute("SET LOCAL synchronous_commit = off;")
+
+            # Check if final table exists and if it should be recreated
+            table_exists = await conn.fetchval(
+                """
+                SELECT EXISTS (
+                    SELECT FROM information_schema.tables
+                    WHERE table_schema = $1 AND table_name = $2
+                )
+                """,
+                self.db_config.schema,
+                table_name,
+            )
+
+            if table_exists:
+                if self.db_config.drop_existing:
+                    await conn.execute(f"DROP TABLE {full_table_name} CASCADE;")
+                    logger.debug("[yellow]Dropped existing table[/yellow]")
+                else:
+                    logger.debug(
+                        "  [yellow]Table already exists, skipping. Use --drop-existing to recreate.[/yellow]"
+                    )
+                    # An earlier run may have stopped before it built the index
+                    self.existing_tables.add(full_table_name)
+                    self.queue_index(full_table_name, layout)
+                    return
+
+            if self.db_config.load_mode == LoadMode.direct:
+                rows = await self.load_direct(conn, csv_file, file_encoding, layout, table_name)
+            else:
+                rows = await self.load_staged(conn, csv_file, file_encoding, layout, table_name)
+
+            logger.debug(f"Copied {rows} rows into {full_table_name}")
+            if self.db_config.unlogged_tables:
+                # Writes the loaded table to the WAL in one go
+                await conn.execute(f"ALTER TABLE {full_table_name} SET LOGGED;")
+            if isinstance(csv_file, ZipMember):
+                # Streamed members are inflated while they are copied
+                self.inflate_throughput.add(await asyncio.to_thread(lambda: csv_file.file_size))
+
+            self.progress.update(self.database_task, advance=1)
+
+            logger.debug(
+                f"  [green]✓ Imported {full_table_name}"
+                f"{' (with geometry)' if layout.has_geometry else ''}[/green]"
+            )
+
+        if wal_start is not None and (wal_end := await self.wal_position(conn)) is not None:
+            self.record_wal(full_table_name, wal_start, wal_end)
+
+        self.queue_index(full_table_name, layout)
+
+    def queue_index(self, full_table_name: str, layout: CsvLayout) -> None:
+        """Queue the spatial index of `full_table_name` if it has a geometry column"""
+        if layout.has_geometry and self.db_config.spatial_index != SpatialIndex.none:
+            # Built after the load stage, so index builds do not compete with the COPYs
+            self.pending_indexes.append(full_table_name)
+
+    async def build_indexes(self) -> None:
+        """
+        Build the spatial indexes of the loaded tables, `index_workers` at a time
+
+        Every build runs in its own transaction on its own pool connection. A failed build is
+        recorded in `index_errors` and leaves the table without an index until the next run.
+        """
+        if not self.pending_indexes:
+            return
+
+        logger.info(
+            f"Building {len(self.pending_indexes)} spatial indexes, {self.index_workers} at a time"
+        )
+        self.progress.update(self.index_task, total=len(self.pending_indexes), visible=True)
+        semaphore = asyncio.Semaphore(self.index_workers)
+        start = time.monotonic()
+
+        async def build(full_table_name: str) -> None:
+            async with semaphore, self.pool.acquire() as conn:
+                try:
+                    if full_table_name in self.existing_tables and await self.has_index(
+                        conn, full_table_name
+                    ):
+                        logger.debug(f"{full_table_name} already has its spatial index")
+                    else:
+                        await self.build_index(conn, full_table_name)
+                except Exception as e:
+                    logger.error(f"  [red]✗ Failed to index {full_table_name}: {e!s}[/red]")
+                    self.index_errors[full_table_name] = str(e)
+                finally:
+                    self.progress.update(self.index_task, advance=1)
+
+        tables, self.pending_indexes = self.pending_indexes, []
+        await asyncio.gather(*(build(full_table_name) for full_table_name in tables))
+        self.index_elapsed = time.monotonic() - start
+
+    async def has_index(self, conn: asyncpg.Connection, full_table_name: str) -> bool:
+        """Whether the spatial index of `full_table_name` exists"""
+        schema, table_name = full_table_name.rsplit(".", 1)
+        return bool(
+            await conn.fetchval(
+                "SELECT to_regclass($1) IS NOT NULL;", f"{schema}.{table_name}_geom_idx"
+            )
+        )
+
+    async def build_index(self, conn: asyncpg.Connection, full_table_name: str) -> None:
+        """Build the spatial index on the geometry column of `full_table_name` using `conn`"""
+        index_name = f"{full_table_name.rsplit('.', 1)[-1]}_geom_idx"
+        method = self.db_config.spatial_index.value.upper()
+        logger.debug(f"Creating {method} index {index_name} on {full_table_name}")
+
+        wal_start = await self.wal_position(conn)
+        start = time.monotonic()
+        async with conn.transaction():
+            if self.index_memory is not None:
+                await conn.execute(
+                    "SELECT set_config('maintenance_work_mem', $1, true);", self.index_memory
+                )
+            await conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {index_name} ON {full_table_name} "
+                f"USING {method} (geom);"
+            )
+        self.index_times[full_table_name] = time.monotonic() - start
+        logger.debug(
+            f"  [green]✓ Indexed {full_table_name} in "
+            f"{self.index_times[full_table_name]:.1f}s[/green]"
+        )
+
+        if wal_start is not None and (wal_end := await self.wal_position(conn)) is not None:
+            self.record_wal(index_name, wal_start, wal_end)
+
+    async def wal_position(self, conn: asyncpg.Connection) -> int | None:
+        """Current WAL position of the server (None if the WAL is not measured in this run)"""
+        if not (self.db_config.report_wal or self.db_config.fast_load):
+            return None
+        try:
+            return parse_lsn(await conn.fetchval("SELECT pg_current_wal_lsn()::text;"))
+        except asyncpg.PostgresError as e:
+            # E.g. on a standby, which does not write WAL of its own
+            logger.debug(f"Cannot read the WAL position: {e!s}")
+            return None
+
+    def record_wal(self, name: str, start: int, end: int) -> None:
+        """Record the WAL written between the positions `start` and `end` for a table or index"""
+        self.wal_bytes[name] = end - start
+        self.wal_start = start if self.wal_start is None else min(self.wal_start, start)
+        self.wal_end = end if self.wal_end is None else max(self.wal_end, end)
+        logger.info(f"WAL written for {name}: {format_size(end - start)}")
+
+    async def create_final_table(
+        self,
+        conn: asyncpg.Connection,
+        full_table_name: str,
+        layout: CsvLayout,
+        column_types: dict[str, str],
+    ) -> None:
+        """Create the final table with detected types (using sanitized names)"""
+        # Report detected types
+        numeric_cols = {col: typ for col, typ in column_types.items() if typ != "TEXT"}
+        if numeric_cols:
+            logger.debug(
+                f"Detected {len(numeric_cols)} numeric columns "
+                f"({sum(1 for t in numeric_cols.values() if t == 'INTEGER')} INTEGER, "
+                f"{sum(1 for t in numeric_cols.values() if t == 'DOUBLE PRECISION')} DOUBLE PRECISION)"
+            )
+
+        final_columns_def = [
+            f"{col_name} {column_types.get(col_name, 'TEXT')}" for col_name in layout.value_columns
+        ]
+
+        # Add geometry column if we have coordinates
+        if layout.has_geometry:
+            final_columns_def.append(f"geom GEOMETRY(Point, {self.db_config.srid})")
+
+        logger.debug(f"Creating final table: {full_table_name}")
+        unlogged = "UNLOGGED " if self.db_config.unlogged_tables else ""
+        await conn.execute(
+            f"CREATE {unlogged}TABLE {full_table_name} ({', '.join(final_columns_def)});"
+        )
+
+    async def load_staged(
+        self,
+        conn: asyncpg.Connection,
+        csv_file: CsvSource,
+        file_encoding: str,
+        layout: CsvLayout,
+        table_name: str,
+    ) -> int:
+        """
+        Load a CSV file through an all-TEXT staging table and return the number of rows.
+
+        The file is COPYed into `{table_name}_temp`, its column types are detected in the
+        database and the rows are then converted into the final table with INSERT ... SELECT.
+        """
+        full_table_name = f"{self.db_config.schema}.{table_name}"
+        temp_table_name = f"{self.db_config.schema}.{table_name}_temp"
+
+        temp_columns_def = [f"{col_name} TEXT" for col_name in layout.columns]
+        pg_encoding = PG_ENCODING_MAP.get(file_encoding, "UTF8")
+
+        # Use COPY to bulk load CSV - need to pass schema and table separately
+        logger.debug(f"Copying data to temporary table using encoding: {pg_encoding}")
+        copy_options = {
+            "schema_name": self.db_config.schema,
+            "delimiter": ";",
+            "null": "-",
+            "header": True,
+            "encoding": pg_encoding,
+            "format": "csv",
+        }
+
+        parts = self.copy_parts_for(csv_file)
+        ranges = []
+        if parts > 1 and isinstance(csv_file, Path):
+            ranges = await asyncio.to_thread(line_ranges, csv_file, parts)
+        if len(ranges) > 1 and isinstance(csv_file, Path):
+            row_count = await self.copy_in_parts(
+                csv_file, table_name, temp_columns_def, copy_options, ranges
+            )
+        else:
+            # Create temporary table with all columns as TEXT (sanitized names)
+            logger.debug(f"Creating temporary table: {temp_table_name}")
+            unlogged = "UNLOGGED " if self.db_config.fast_load else ""
+            await conn.execute(
+                f"CREATE {unlogged}TABLE {temp_table_name} ({', '.join(temp_columns_def)});"
+            )
+
+            # Zip members are streamed decompressed; rows are counted as COPY reads the chunks
+            with csv_file.open() if isinstance(csv_file, ZipMember) else open(csv_file, "rb") as f:
+                reader = LineCountingReader(f, self.copy_throughput.add)
+                status = await conn.copy_to_table(
+                    f"{table_name}_temp", source=reader, **copy_options
+                )
+
+            row_count = copied_rows(status)
+            if row_count:
+                # Lines counted while copying include the header (and quoted line breaks)
+                self.copy_throughput.add(row_count - reader.lines)
+        logger.debug(f"Row count: {row_count}")
+
+        # Detect data types for all columns in a single scan
+        column_types = await detect_column_types(conn, temp_table_name, layout.value_columns)
+
+        await self.create_final_table(conn, full_table_name, layout, column_types)
+
+        # Prepare column lists for INSERT INTO ... SELECT (using sanitized names)
+        select_cols = []
+        insert_cols = []
+
+        for col_name in layout.value_columns:
+            col_type = column_types.get(col_name, "TEXT")
+
+            # Build the SELECT expression based on the target type
+            if col_type == "INTEGER":
+                # Convert TEXT to INTEGER, handling German decimal format and NULLs
+                select_expr = f"NULLIF(REPLACE({col_name}, ',', '.'), '')::INTEGER"
+            elif col_type == "DOUBLE PRECISION":
+                # Convert TEXT to DOUBLE PRECISION, handling German decimal format and NULLs
+                select_expr = f"NULLIF(REPLACE({col_name}, ',', '.'), '')::DOUBLE PRECISION"
+            else:
+                # Keep as TEXT
+                select_expr = col_name
+
+            select_cols.append(select_expr)
+            insert_cols.append(col_name)
+
+        # Add geometry transformation if we have coordinates
+        if layout.has_geometry:
+            logger.debug(f"Adding geometry column with SRID {self.db_config.srid}")
+            # Use ST_SetSRID and ST_MakePoint for geometry creation
+            select_cols.append(
+                f"ST_SetSRID(ST_MakePoint("
+                f"NULLIF(REPLACE({layout.x_col}, ',', '.'), '')::double precision, "
+                f"NULLIF(REPLACE({layout.y_col}, ',', '.'), '')::double precision"
+                f"), {self.db_config.srid})"
+            )
+            insert_cols.append("geom")
+
+        # Insert from temp to final table with geometry transformation
+        logger.debug("Inserting data from temporary table to final table")
+        insert_from_temp_sql = f"""
+            INSERT INTO {full_table_name} ({", ".join(insert_cols)})
+            SELECT {", ".join(select_cols)}
+            FROM {temp_table_name}
+        """
+        await conn.execute(insert_from_temp_sql)
+
+        # Drop temporary table
+        logger.debug(f"Dropping temporary table: {temp_table_name}")
+        await conn.execute(f"DROP TABLE {temp_table_name};")
+
+        return row_count
+
+    def copy_parts_for(self, csv_file: CsvSource) -> int:
+        """
+        Number of parts `csv_file` is COPYed in at once (see `copy_in_parts`)
+
+        Only extracted files of at least `COPY_PART_MIN_SIZE` bytes per part are split, into
+        at most `copy_parts` parts and no more than the pool has connections beyond the one
+        every database worker holds.
+        """
+        if self.copy_parts < 2 or not isinstance(csv_file, Path):
+            return 1
+        spare = self.pool.get_max_size() - self.db_workers
+        by_size = csv_file.stat().st_size // self.COPY_PART_MIN_SIZE
+        return max(1, min(self.copy_parts, spare, by_size))
+
+    async def copy_in_parts(
+        self,
+        csv_file: Path,
+        table_name: str,
+        columns_def: list[str],
+        copy_options: dict[str, Any],
+        ranges: list[tuple[int, int]],
+    ) -> int:
+        """
+        COPY `csv_file` into a new UNLOGGED staging table, the byte `ranges` at once
+
+        Every range is COPYed over its own pool connection. The staging table is created and
+        committed first, so all of them see it. Once all COPYs succeeded, their transactions
+        are committed one after another. If a COPY or a commit fails, the transactions not
+        committed yet are rolled back and the staging table is dropped, so the parts
+        committed before are not kept either. Returns the number of rows.
+        """
+        temp_table_name = f"{self.db_config.schema}.{table_name}_temp"
+        logger.debug(f"Copying {csv_file.name} in {len(ranges)} parts into {temp_table_name}")
+
+        async with contextlib.AsyncExitStack() as stack:
+            # Connections are collected by one worker at a time, so that two workers never
+            # each hold some of the connections the other one is waiting for
+            async with self.copy_connections_lock:
+                conns = [await stack.enter_async_context(self.pool.acquire()) for _ in ranges]
+
+            await conns[0].execute(
+                f"CREATE UNLOGGED TABLE {temp_table_name} ({', '.join(columns_def)});"
+            )
+
+            # Transactions started and neither committed nor rolled back yet
+            transactions: list[Transaction] = []
+            try:
+                for conn in conns:
+                    transactions.append(conn.transaction())
+                    await transactions[-1].start()
+                results = await asyncio.gather(
+                    *(
+                        self.copy_range(conn, csv_file, start, end, table_name, copy_options)
+                        for conn, (start, end) in zip(conns, ranges)
+                    ),
+                    return_exceptions=True,
+                )
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    raise errors[0]
+                while transactions:
+                    await transactions.pop(0).commit()
+            except BaseException:
+                for transaction in transactions:
+                    with contextlib.suppress(asyncpg.PostgresError, asyncpg.InterfaceError):
+                        await transaction.rollback()
+                try:
+                    await conns[0].execute(f"DROP TABLE IF EXISTS {temp_table_name};")
+                except (asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                    logger.warning(f"Unable to drop {temp_table_name}: {e!s}")
+                raise
+
+        return sum(result for result in results if isinstance(result, int))
+
+    async def copy_range(
+        self,
+        conn: asyncpg.Connection,
+        csv_file: Path,
+        start: int,
+        end: int,
+        table_name: str,
+        copy_options: dict[str, Any],
+    ) -> int:
+        """COPY the bytes `start` to `end` of `csv_file` (whole lines, no header) using `conn`"""
+        with FileRange(csv_file, start, end) as part:
+            reader = LineCountingReader(part, self.copy_throughput.add)
+            status = await conn.copy_to_table(
+                f"{table_name}_temp", source=reader, **{**copy_options, "header": False}
+            )
+
+        rows = copied_rows(status)
+        if rows:
+            # The last line of the file may lack its line break
+            self.copy_throughput.add(rows - reader.lines)
+        return rows
+
+    async def load_direct(
+        self,
+        conn: asyncpg.Connection,
+        csv_file: CsvSource,
+        file_encoding: str,
+        layout: CsvLayout,
+        table_name: str,
+    ) -> int:
+        """
+        Load a CSV file straight into its final, typed table and return the number of rows.
+
+        Column types are detected client-side in one pass over the file. A second pass
+        converts every row (German decimals, `-` NULLs, point geometry) and streams it with
+        a binary COPY, so each row is only written once by PostgreSQL.
+        """
+        full_table_name = f"{self.db_config.schema}.{table_name}"
+
+        # Detect data types for all columns in a single pass over the file
+        detected_types = await asyncio.to_thread(
+            infer_column_types, read_csv_rows(csv_file, file_encoding), len(layout.columns)
+        )
+        column_types = {
+            col_name: col_type
+            for col_name, col_type in zip(layout.columns, detected_types, strict=True)
+            if col_name in layout.value_columns
+        }
+
+        await self.create_final_table(conn, full_table_name, layout, column_types)
+
+        columns = list(layout.value_columns)
+        if layout.has_geometry:
+            await register_geometry_codec(conn)
+            columns.append("geom")
+
+        logger.debug(f"Copying converted records directly to final table: {full_table_name}")
+        rows = read_csv_rows(csv_file, file_encoding)
+        status = await conn.copy_records_to_table(
+            table_name,
+            records=aiter_records(
+                iter_record_batches(
+                    rows, layout, column_types, self.db_config.srid, self.COPY_BATCH_SIZE
+                ),
+                on_batch=self.copy_throughput.add,
+            ),
+            columns=columns,
+            schema_name=self.db_config.schema,
+        )
+        row_count = copied_rows(status)
+        logger.debug(f"Row count: {row_count}")
+        return row_count
+
+    async def producer(self, fetch_items: Iterable[tuple[str, str]]) -> None:
+        """
+        Put the (url, filename) `fetch_items` into the fetch queue as the workers make room
+        """
+        try:
+            for item in fetch_items:
+                await self.fetch_queue.put(item)
+        finally:
+            self.fetch_items_queued.set()
+
     async def coordinator(self):
         """
         Coordinator that manages the pipeline shutdown.
 
-        Waits for all fetch workers to complete, then signals extract worker.
-        Waits for extract worker to complete, then signals all database workers.
+        Waits for the producer to queue all files, then signals all fetch workers.
+        Waits for all fetch workers to complete, then signals all extract workers.
+        Waits for the extract workers to complete, then signals all database workers.
         """
+        await self.fetch_items_queued.wait()
+
         # Signal ALL fetch workers to stop (one sentinel per worker)
         for _ in range(self.num_workers):
             await self.fetch_queue.put(None)
@@ -768,14 +2092,18 @@ class FetchManager:
         # Wait for all items in fetch queue to be processed
         await self.fetch_queue.join()
 
-        # Signal extract worker to stop
-        await self.extract_queue.put(None)
+        if self.download_only:
+            return
+
+        # Signal ALL extract workers to stop (one sentinel per worker)
+        for _ in range(self.extract_workers):
+            await self.extract_queue.put(None)
 
         # Wait for all items in extract queue to be processed
         await self.extract_queue.join()
 
         # Signal ALL database workers to stop (one sentinel per worker)
-        for _ in range(self.num_workers):
+        for _ in range(self.db_workers):
             await self.database_queue.put(None)
 
         # Wait for all items in database queue to be processed
@@ -0,0 +1,130 @@
+"""
+zensus2pgsql fetch command
+
+Downloads Zensus 2022 Gitterdaten into the cache without importing them, so the cache can be
+filled on a machine with internet access and imported from later with `create`.
+"""
+
+import asyncio
+from pathlib import Path
+
+import httpx
+import typer
+from rich import print as rprint
+
+from ..cache import CACHE_MAX_SIZE_ENVVAR
+from ..logging import configure_logging
+from .cache import cache_dir_option, parse_size_option
+from .create import FetchManager, download_progress, print_download_summary, select_files
+
+
+def fetch(
+    datasets: list[str] = typer.Argument(["all"]),
+    workers: int = typer.Option(
+        10, "--workers", "-w", min=1, help="Number of files downloaded at the same time"
+    ),
+    skip_existing: bool = typer.Option(
+        True, "--skip-existing/--overwrite", help="Skip files that already exist"
+    ),
+    revalidate: bool = typer.Option(
+        False,
+        "--revalidate",
+        help="Check cached files with the server and download only those that have changed",
+    ),
+    source_dir: Path | None = typer.Option(
+        None,
+        "--source-dir",
+        exists=True,
+        file_okay=False,
+        help="Read the zip files from this directory instead of downloading them",
+    ),
+    mirror_url: str | None = typer.Option(
+        None,
+        "--mirror-url",
+        help="Download the zip files from this URL prefix instead of destatis.de",
+    ),
+    peers: list[str] | None = typer.Option(
+        None,
+        "--peer",
+        help="URL of another host's 'zensus2pgsql cache serve' to try before downloading (repeatable)",
+    ),
+    download_parts: int = typer.Option(
+        1, "--download-parts", min=1, help="Download large files in this many byte ranges at once"
+    ),
+    cache_max_size: int | None = typer.Option(
+        None,
+        "--cache-max-size",
+        parser=parse_size_option,
+        metavar="SIZE",
+        help="Byte budget for the download cache, e.g. 5G; least recently used files are removed",
+        envvar=CACHE_MAX_SIZE_ENVVAR,
+    ),
+    cache_dir: Path = cache_dir_option(),
+    verbose: int = typer.Option(
+        0, "--verbose", "-v", count=True, help="Increase verbosity (-v for INFO, -vv for DEBUG)"
+    ),
+) -> None:
+    """Download Zensus 2022 Gitterdaten into the cache without importing them."""
+    configure_logging(verbose)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    asyncio.run(
+        fetch_wrapper(
+            datasets,
+            cache_dir,
+            workers=workers,
+            skip_existing=skip_existing,
+            revalidate=revalidate,
+            download_parts=download_parts,
+            source_dir=source_dir,
+            mirror_url=mirror_url,
+            peers=peers,
+            cache_max_size=cache_max_size,
+        )
+    )
+
+
+async def fetch_wrapper(
+    datasets: list[str],
+    cache_dir: Path,
+    workers: int = 10,
+    skip_existing: bool = True,
+    revalidate: bool = False,
+    download_parts: int = 1,
+    source_dir: Path | None = None,
+    mirror_url: str | None = None,
+    peers: list[str] | None = None,
+    cache_max_size: int | None = None,
+) -> FetchManager:
+    """
+    Encapsulate all async operations for the fetch command
+    """
+    files_to_fetch = select_files(datasets, source_dir, mirror_url)
+
+    rprint(f"[cyan]Downloading {len(files_to_fetch)} Gitterdaten files[/cyan]")
+
+    async with httpx.AsyncClient(http2=download_parts == 1) as http_client:
+        with download_progress() as progress:
+            fetch_manager = FetchManager(
+                http_client,
+                cache_dir,
+                progress,
+                None,
+                None,
+                total=len(files_to_fetch),
+                semaphore=workers,
+                num_workers=workers,
+                skip_existing=skip_existing,
+                revalidate=revalidate,
+                download_parts=download_parts,
+                peers=peers,
+            )
+            try:
+                await fetch_manager.start(files_to_fetch, datasets)
+            finally:
+                fetch_manager.remove_temp_dir()
+
+    print_download_summary(fetch_manager, cache_max_size)
+
+    return fetch_manager
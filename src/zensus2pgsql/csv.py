@@ -0,0 +1,345 @@
+"""
+Reading the Gitterdaten CSV files
+
+The CSV files are read either after extracting them from their zip archive or straight
+out of it (`ZipMember`). This module detects their column layout and encoding, and splits
+large files into byte ranges of whole lines (`line_ranges`, `FileRange`) so they can be
+COPYed over several connections.
+"""
+
+import asyncio
+import codecs
+import csv
+import io
+import logging
+import zipfile
+from collections.abc import Callable, Iterator
+from pathlib import Path, PurePosixPath
+from typing import IO, NamedTuple, TextIO
+
+import aiofiles
+
+from .logging import logger
+
+
+def sanitize_column_name(name: str) -> str:
+    """Sanitize column name to be PostgreSQL-compliant.
+
+    PostgreSQL identifiers cannot start with a digit.
+    This function prefixes such names with an underscore.
+    """
+    name = name.lower()
+    # If the name starts with a digit, prefix with underscore
+    if name and name[0].isdigit():
+        return f"_{name}"
+    return name
+
+
+def sanitize_table_name(filename: str) -> str:
+    """Sanitize table name to be PostgreSQL-compliant.
+
+    PostgreSQL table names have a 63-character limit.
+    This function removes redundant prefixes/suffixes and normalizes the name.
+    """
+    name = filename.lower().replace("-", "_").replace(" ", "_")
+
+    # Remove common redundant prefixes and suffixes
+    name = name.replace("zensus2022_", "")
+    name = name.replace("_gitter", "")
+
+    # Ensure it's not too long (PostgreSQL limit is 63 chars)
+    if len(name) > 63:
+        name = name[:63]
+
+    return name
+
+
+class CsvLayout(NamedTuple):
+    """Column layout of a Gitterdaten CSV file."""
+
+    #: Original CSV headers
+    headers: list[str]
+
+    #: Sanitized column names, in the same order as `headers`
+    columns: list[str]
+
+    #: Sanitized names of the coordinate columns (if present)
+    x_col: str | None
+    y_col: str | None
+
+    @property
+    def has_geometry(self) -> bool:
+        """Whether the coordinate columns are combined into a point geometry."""
+        return bool(self.x_col and self.y_col)
+
+    @property
+    def value_columns(self) -> list[str]:
+        """Columns copied as-is into the final table (coordinates become `geom`)."""
+        if not self.has_geometry:
+            return list(self.columns)
+        return [col for col in self.columns if col not in (self.x_col, self.y_col)]
+
+
+def detect_csv_layout(headers: list[str]) -> CsvLayout:
+    """Sanitize the CSV headers and identify the coordinate columns."""
+    # Create mapping of original headers to sanitized column names
+    column_mapping = {header: sanitize_column_name(header) for header in headers}
+
+    # Report any renamed columns
+    if logger.level == logging.DEBUG:
+        renamed_cols = [(orig, san) for orig, san in column_mapping.items() if orig.lower() != san]
+        if renamed_cols:
+            logging.debug(f"[yellow]Renamed {len(renamed_cols)} columns:[/yellow]")
+            for orig, san in renamed_cols[:5]:  # Show first 5
+                logging.debug(f"    {orig} → {san}")
+            if len(renamed_cols) > 5:
+                logging.debug(f"    ... and {len(renamed_cols) - 5} more")
+
+    # Identify coordinate columns (using sanitized names)
+    x_col = None
+    y_col = None
+    for header in headers:
+        sanitized = column_mapping[header]
+        # Check for x coordinate column (starts with x_mp or is exactly named with coordinate pattern)
+        if sanitized.startswith("x_mp") or sanitized.startswith("_x_mp") or "_x_mp_" in sanitized:
+            x_col = sanitized
+        # Check for y coordinate column (starts with y_mp or is exactly named with coordinate pattern)
+        elif sanitized.startswith("y_mp") or sanitized.startswith("_y_mp") or "_y_mp_" in sanitized:
+            y_col = sanitized
+
+    # Debug output for coordinate detection
+    if x_col and y_col:
+        logger.debug(f"Detected coordinate columns: {x_col}, {y_col}")
+    else:
+        logger.debug(f"No coordinate columns detected (x_col={x_col}, y_col={y_col})")
+
+    return CsvLayout(headers, [column_mapping[header] for header in headers], x_col, y_col)
+
+
+class ZipMember(NamedTuple):
+    """A CSV file inside a zip archive, read without extracting it to disk."""
+
+    #: Path to the zip archive
+    archive: Path
+
+    #: Name of the member inside the archive
+    member: str
+
+    @property
+    def name(self) -> str:
+        """File name of the member (like `Path.name`)."""
+        return PurePosixPath(self.member).name
+
+    @property
+    def stem(self) -> str:
+        """File name of the member without its suffix (like `Path.stem`)."""
+        return PurePosixPath(self.member).stem
+
+    def open(self) -> IO[bytes]:
+        """Open a decompressing, binary file-like object for the member."""
+        with zipfile.ZipFile(self.archive) as archive:
+            # The opened member keeps the archive's file handle alive after closing it
+            return archive.open(self.member)
+
+    @property
+    def file_size(self) -> int:
+        """Uncompressed size of the member in bytes."""
+        with zipfile.ZipFile(self.archive) as archive:
+            return archive.getinfo(self.member).file_size
+
+
+#: A CSV file to import: either extracted to disk or still inside its zip archive
+CsvSource = Path | ZipMember
+
+
+class FileRange:
+    """
+    Binary reader of the bytes from `start` up to (not including) `end` of a file
+
+    Lets COPY read one of the parts of a CSV file split with `line_ranges`.
+    """
+
+    def __init__(self, path: Path, start: int, end: int) -> None:
+        self.file = open(path, "rb")
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> "FileRange":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def line_ranges(path: Path, parts: int) -> list[tuple[int, int]]:
+    """
+    Split the rows of the CSV file `path` into up to `parts` byte ranges of similar size
+
+    The ranges start after the header line and end at line breaks, so each of them can be
+    COPYed on its own. Fields must not contain line breaks (the Zensus files have none).
+    """
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        f.readline()
+        bounds = [f.tell()]
+        first = bounds[0]
+        for part in range(1, parts):
+            target = first + (size - first) * part // parts
+            if target <= bounds[-1]:
+                continue
+            # Move on to the start of the line following the byte before `target`
+            f.seek(target - 1)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+class LineCountingReader:
+    """
+    Binary file wrapper reporting the number of lines in each chunk read from it
+
+    COPY reads its source in chunks from a worker thread, so `on_lines` sees the rows of a
+    staged load arrive while the COPY is still running.
+    """
+
+    def __init__(self, file: IO[bytes] | FileRange, on_lines: Callable[[int], None]) -> None:
+        self.file = file
+        self.on_lines = on_lines
+        self.lines = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.file.read(size)
+        lines = data.count(b"\n")
+        if lines:
+            self.lines += lines
+            self.on_lines(lines)
+        return data
+
+
+#: Number of bytes inspected when detecting the encoding of a zip member
+ENCODING_SAMPLE_SIZE = 64 * 1024
+
+
+async def detect_file_encoding(file_path: Path) -> str:
+    """Detect the encoding of a CSV file.
+
+    Tries common encodings and returns the first one that works.
+    """
+    encodings = ["utf-8", "iso-8859-1", "windows-1252", "cp1252"]
+
+    for encoding in encodings:
+        try:
+            async with aiofiles.open(file_path, encoding=encoding) as f:
+                # Try to read first 10 lines
+                for _ in range(10):
+                    await f.readline()
+            return encoding
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+
+    # Default to iso-8859-1 which accepts all byte values
+    return "iso-8859-1"
+
+
+def detect_file_encoding_old(file_path: Path) -> str:
+    """Detect the encoding of a CSV file.
+
+    Tries common encodings and returns the first one that works.
+    """
+    encodings = ["utf-8", "iso-8859-1", "windows-1252", "cp1252"]
+
+    for encoding in encodings:
+        try:
+            with open(file_path, encoding=encoding) as f:
+                # Try to read first 10 lines
+                for _ in range(10):
+                    f.readline()
+            return encoding
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+
+    # Default to iso-8859-1 which accepts all byte values
+    return "iso-8859-1"
+
+
+def detect_bytes_encoding(sample: bytes) -> str:
+    """Detect the encoding of the first bytes of a CSV file.
+
+    Tries common encodings and returns the first one that works. The sample may end in the
+    middle of a multi-byte character.
+
+    >>> detect_bytes_encoding("Größe;Köln".encode("utf-8")[:-1])
+    'utf-8'
+    >>> detect_bytes_encoding("Größe;Köln".encode("iso-8859-1"))
+    'iso-8859-1'
+    """
+    encodings = ["utf-8", "iso-8859-1", "windows-1252", "cp1252"]
+
+    for encoding in encodings:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+
+    # Default to iso-8859-1 which accepts all byte values
+    return "iso-8859-1"
+
+
+async def detect_csv_encoding(source: CsvSource) -> str:
+    """Detect the encoding of an extracted CSV file or of a zip member's first bytes."""
+    if isinstance(source, ZipMember):
+
+        def read_sample() -> bytes:
+            with source.open() as f:
+                return f.read(ENCODING_SAMPLE_SIZE)
+
+        return detect_bytes_encoding(await asyncio.to_thread(read_sample))
+
+    return await detect_file_encoding(source)
+
+
+def open_csv(source: CsvSource, encoding: str) -> TextIO:
+    """Open an extracted CSV file or a zip member for reading as text."""
+    if isinstance(source, ZipMember):
+        return io.TextIOWrapper(source.open(), encoding=encoding, newline="")
+    return open(source, encoding=encoding, newline="")
+
+
+def read_csv_header(source: CsvSource, encoding: str) -> list[str]:
+    """Read the header row of a Gitterdaten CSV file."""
+    with open_csv(source, encoding) as f:
+        return next(csv.reader(f, delimiter=";"), [])
+
+
+#: Maps Python encoding names to PostgreSQL encoding names
+PG_ENCODING_MAP = {
+    "utf-8": "UTF8",
+    "iso-8859-1": "LATIN1",
+    "windows-1252": "WIN1252",
+    "cp1252": "WIN1252",
+}
+
+#: Value used for missing data in the Gitterdaten CSV files
+CSV_NULL = "-"
+
+
+def read_csv_rows(source: CsvSource, encoding: str) -> Iterator[list[str]]:
+    """Yield the data rows of a Gitterdaten CSV file, skipping its header."""
+    with open_csv(source, encoding) as f:
+        reader = csv.reader(f, delimiter=";")
+        next(reader, None)
+        yield from reader
@@ -0,0 +1,491 @@
+"""
+Functions for downloading files into the application cache
+
+Downloads are first written to a `.part` file next to their final location. If the
+connection drops, the download is resumed from the size of the `.part` file with an HTTP
+`Range` request, and the file is only renamed to its final name once it is complete. This
+means a file in the cache is never a half-written download.
+
+Files that are already cached can be revalidated with a conditional request
+(`If-None-Match`/`If-Modified-Since`), which costs a `304 Not Modified` response instead of
+the whole file when nothing changed.
+
+Datasets can also come from a local directory (`file://` URLs), in which case the file is
+copied into the cache the same way.
+
+Large files can be downloaded in several byte ranges at once (`parts`), each over its own
+request, written at their offsets into a preallocated `.part` file.
+"""
+
+import asyncio
+import hashlib
+import os
+from collections.abc import Callable
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+import aiofiles
+import httpx
+
+from .cache import HASH_BLOCK_SIZE, CacheEntry, hash_file
+from .errors import IncompleteDownloadError
+from .logging import logger
+
+#: Smallest range fetched by one request of a parallel download
+MIN_PART_SIZE = 4 * 1024 * 1024
+
+
+class DownloadResult(NamedTuple):
+    """
+    Outcome of `download_file`
+    """
+
+    #: Number of bytes transferred over the network
+    transferred: int
+
+    #: True if the server answered a conditional request with "304 Not Modified"
+    not_modified: bool = False
+
+    #: Validators sent by the server
+    etag: str | None = None
+    last_modified: str | None = None
+
+    #: Size and sha256 hex digest of the downloaded file
+    size: int | None = None
+    sha256: str | None = None
+
+
+#: Suffix of files that are still being downloaded
+PART_SUFFIX = ".part"
+
+
+def part_path(output_path: Path) -> Path:
+    """
+    Returns the path of the partial download for `output_path`.
+
+    >>> part_path(Path("cache/test.zip")).as_posix()
+    'cache/test.zip.part'
+    """
+    return output_path.with_name(output_path.name + PART_SUFFIX)
+
+
+#: Suffix of the file next to a partial download holding the validator it was downloaded with
+VALIDATOR_SUFFIX = ".validator"
+
+
+def validator_path(output_path: Path) -> Path:
+    """
+    Returns the path of the file storing the `If-Range` validator of the partial download.
+
+    >>> validator_path(Path("cache/test.zip")).as_posix()
+    'cache/test.zip.part.validator'
+    """
+    return output_path.with_name(output_path.name + PART_SUFFIX + VALIDATOR_SUFFIX)
+
+
+def read_part_validator(output_path: Path) -> str | None:
+    """Returns the validator stored for the partial download of `output_path`, if any."""
+    try:
+        return validator_path(output_path).read_text().strip() or None
+    except OSError:
+        return None
+
+
+def store_part_validator(output_path: Path, validator: str | None) -> None:
+    """Store the validator of the partial download of `output_path` for later runs."""
+    if validator is None:
+        validator_path(output_path).unlink(missing_ok=True)
+    else:
+        validator_path(output_path).write_text(validator)
+
+
+def remove_partial(output_path: Path) -> None:
+    """Remove the partial download of `output_path` and its stored validator."""
+    part_path(output_path).unlink(missing_ok=True)
+    validator_path(output_path).unlink(missing_ok=True)
+
+
+def range_start(response: httpx.Response) -> int | None:
+    """
+    Returns the first byte position of a partial (206) response, or None otherwise.
+    """
+    content_range = response.headers.get("Content-Range", "")
+    if response.status_code != 206 or not content_range.startswith("bytes "):
+        return None
+    start = content_range[len("bytes ") :].split("-", 1)[0]
+    return int(start) if start.isdigit() else None
+
+
+def resume_validator(response: httpx.Response) -> str | None:
+    """
+    Returns the validator to send as `If-Range` when resuming the response's download.
+
+    Weak ETags cannot be used for range requests, so Last-Modified is used instead.
+    """
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def content_length(response: httpx.Response, offset: int) -> int | None:
+    """
+    Returns the size of the complete file a (possibly partial) response belongs to.
+
+    Returns None if the size is unknown or the body is content-encoded (compressed).
+    """
+    if response.headers.get("Content-Encoding", "identity") != "identity":
+        return None
+
+    content_range = response.headers.get("Content-Range")
+    if response.status_code == 206 and content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+
+    length = response.headers.get("Content-Length")
+    if length is None or not length.isdigit():
+        return None
+    return int(length) + offset if response.status_code == 206 else int(length)
+
+
+def conditional_headers(entry: CacheEntry | None, url: str, output_path: Path) -> dict[str, str]:
+    """
+    Returns the headers for revalidating the cached `output_path` downloaded from `url`.
+
+    The validators recorded in the manifest `entry` are used when it belongs to the same
+    URL. Files without an entry fall back to `If-Modified-Since` with the file's
+    modification time, which is never earlier than the server's Last-Modified at the time
+    of the download.
+    """
+    if entry is not None and entry.url == url:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        if headers:
+            return headers
+
+    if entry is None and output_path.exists():
+        return {"If-Modified-Since": formatdate(output_path.stat().st_mtime, usegmt=True)}
+
+    return {}
+
+
+async def download_file(
+    client: httpx.AsyncClient,
+    url: str,
+    output_path: Path,
+    retries: int = 3,
+    timeout: float = 60.0,
+    headers: dict[str, str] | None = None,
+    parts: int = 1,
+    on_progress: Callable[[int], None] | None = None,
+) -> DownloadResult:
+    """
+    Download `url` to `output_path`, resuming interrupted transfers.
+
+    The body is written to a `.part` file. When the transfer fails with a network error,
+    it is retried up to `retries` times with a `Range` request for the missing bytes (an
+    existing `.part` file from an earlier run is resumed the same way). Servers that
+    ignore the range cause the download to start over. On success, the `.part` file is
+    atomically renamed to `output_path`.
+
+    `headers` are sent with the first request only; pass the result of
+    `conditional_headers` to revalidate a cached file. If the server answers with
+    "304 Not Modified", `output_path` is left untouched.
+
+    The sha256 digest of the file is computed while its body is written.
+
+    With `parts` greater than one, files large enough are downloaded in that many byte
+    ranges at once (see `download_parts`).
+
+    `file://` URLs are copied from the local file system (see `copy_local_file`).
+
+    `on_progress` is called with the size of every chunk written, e.g. to measure throughput.
+    """
+    if url.startswith("file:"):
+        source = Path(url2pathname(urlparse(url).path))
+        return await asyncio.to_thread(copy_local_file, source, output_path, headers, on_progress)
+
+    partial = part_path(output_path)
+
+    # Validator of the body in the partial file, so a changed file is never resumed into
+    validator: str | None = None
+
+    if partial.exists():
+        # A partial file from an earlier run can only be resumed with `If-Range`
+        validator = read_part_validator(output_path)
+        if validator is None:
+            logger.debug(f"Discarding partial download without validator: {partial}")
+            remove_partial(output_path)
+
+    # A partial file from an earlier run is resumed as a single stream
+    if parts > 1 and not partial.exists():
+        result = await download_parts(
+            client, url, output_path, parts, retries, timeout, headers, on_progress
+        )
+        if result is not None:
+            return result
+
+    transferred = 0
+    attempt = 0
+    request_headers = dict(headers or {})
+
+    etag: str | None = None
+    last_modified: str | None = None
+
+    # Hash of the bytes in the partial file, and how many bytes of it have been hashed
+    digest = hashlib.sha256()
+    hashed = 0
+
+    while True:
+        offset = partial.stat().st_size if partial.exists() else 0
+        if offset:
+            request_headers = {"Range": f"bytes={offset}-"}
+            if validator:
+                request_headers["If-Range"] = validator
+
+        try:
+            async with client.stream(
+                "GET", url, headers=request_headers, follow_redirects=True, timeout=timeout
+            ) as response:
+                if response.status_code == 304:
+                    logger.debug(f"Not modified: {url}")
+                    remove_partial(output_path)
+                    return DownloadResult(transferred, not_modified=True)
+
+                if offset and response.status_code == 416:
+                    # Nothing left to download; the partial file may already be complete
+                    total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+                    if total.isdigit() and int(total) == offset:
+                        if hashed != offset:
+                            digest = await asyncio.to_thread(hash_file, partial)
+                            hashed = offset
+                        break
+                    logger.debug(f"Unable to resume download, restarting: {url}")
+                    remove_partial(output_path)
+                    validator = None
+                    continue
+
+                response.raise_for_status()
+
+                if offset and range_start(response) != offset:
+                    logger.debug(f"Server ignored range request, restarting download: {url}")
+                    offset = 0
+
+                if not offset:
+                    # A new body; later runs resume it only if it has a validator
+                    validator = resume_validator(response)
+                    store_part_validator(output_path, validator)
+                etag = etag or response.headers.get("ETag")
+                last_modified = last_modified or response.headers.get("Last-Modified")
+                expected = content_length(response, offset)
+
+                if hashed != offset:
+                    # Resuming a partial file we have not hashed (e.g. from an earlier run)
+                    digest = (
+                        await asyncio.to_thread(hash_file, partial) if offset else hashlib.sha256()
+                    )
+                    hashed = offset
+
+                # Chunks are written as they arrive (not re-chunked by httpx), so the bytes
+                # received before a dropped connection are kept for the next attempt
+                async with aiofiles.open(partial, "ab" if offset else "wb") as f:
+                    async for chunk in response.aiter_bytes():
+                        await f.write(chunk)
+                        digest.update(chunk)
+                        hashed += len(chunk)
+                        transferred += len(chunk)
+                        if on_progress is not None:
+                            on_progress(len(chunk))
+
+            size = partial.stat().st_size
+            if expected is not None and size != expected:
+                raise IncompleteDownloadError(
+                    f"Incomplete download of {url}: got {size} of {expected} bytes"
+                )
+            break
+
+        except (httpx.TransportError, IncompleteDownloadError) as exc:
+            attempt += 1
+            if attempt > retries:
+                raise
+            resume_from = partial.stat().st_size if partial.exists() else 0
+            logger.warning(
+                f"Download of {output_path.name} interrupted ({exc!s}), "
+                f"resuming from byte {resume_from} (attempt {attempt} of {retries})"
+            )
+
+    os.replace(partial, output_path)
+    validator_path(output_path).unlink(missing_ok=True)
+    return DownloadResult(
+        transferred, etag=etag, last_modified=last_modified, size=hashed, sha256=digest.hexdigest()
+    )
+
+
+def copy_local_file(
+    source: Path,
+    output_path: Path,
+    headers: dict[str, str] | None = None,
+    on_progress: Callable[[int], None] | None = None,
+) -> DownloadResult:
+    """
+    Copy the local file `source` to `output_path` like `download_file` downloads a URL.
+
+    The file is copied to a `.part` file and hashed on the way, then renamed. The source's
+    modification time stands in for Last-Modified, so an `If-Modified-Since` header from
+    `conditional_headers` skips sources that have not changed since they were copied.
+    """
+    stat = source.stat()
+    since = (headers or {}).get("If-Modified-Since")
+    if since and int(stat.st_mtime) <= parsedate_to_datetime(since).timestamp():
+        logger.debug(f"Not modified: {source}")
+        return DownloadResult(0, not_modified=True)
+
+    partial = part_path(output_path)
+    digest = hashlib.sha256()
+    with open(source, "rb") as src, open(partial, "wb") as dst:
+        while block := src.read(HASH_BLOCK_SIZE):
+            dst.write(block)
+            digest.update(block)
+            if on_progress is not None:
+                on_progress(len(block))
+    os.replace(partial, output_path)
+
+    return DownloadResult(
+        stat.st_size,
+        last_modified=formatdate(stat.st_mtime, usegmt=True),
+        size=stat.st_size,
+        sha256=digest.hexdigest(),
+    )
+
+
+async def download_parts(
+    client: httpx.AsyncClient,
+    url: str,
+    output_path: Path,
+    parts: int,
+    retries: int = 3,
+    timeout: float = 60.0,
+    headers: dict[str, str] | None = None,
+    on_progress: Callable[[int], None] | None = None,
+) -> DownloadResult | None:
+    """
+    Download `url` to `output_path` in up to `parts` byte ranges fetched concurrently.
+
+    A one byte range request first finds out whether the server supports ranges and how
+    large the file is (and answers conditional `headers` with a 304 like `download_file`).
+    The `.part` file is then preallocated and every range request writes its bytes at its
+    own offset, resuming its range on network errors up to `retries` times. All range
+    requests carry `If-Range`, so a file changing on the server midway is never mixed.
+
+    Because the ranges arrive out of order, the sha256 digest is computed after the download
+    by reading the file once.
+
+    Returns None, without downloading anything, if the server does not support ranges, the
+    file is smaller than two parts of `MIN_PART_SIZE`, or the file changed on the server;
+    the caller should fall back to a single stream.
+    """
+    partial = part_path(output_path)
+
+    async with client.stream(
+        "GET",
+        url,
+        headers={**(headers or {}), "Range": "bytes=0-0"},
+        follow_redirects=True,
+        timeout=timeout,
+    ) as response:
+        if response.status_code == 304:
+            logger.debug(f"Not modified: {url}")
+            return DownloadResult(0, not_modified=True)
+
+        response.raise_for_status()
+        total = content_length(response, 0)
+        validator = resume_validator(response)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+    if range_start(response) != 0 or total is None or total < 2 * MIN_PART_SIZE:
+        return None
+
+    parts = min(parts, total // MIN_PART_SIZE)
+    bounds = [total * idx // parts for idx in range(parts + 1)]
+    transferred = [0] * parts
+
+    logger.debug(f"Downloading {url} in {parts} parts of {bounds[1]} bytes")
+
+    with open(partial, "wb") as f:
+        f.truncate(total)
+
+    async def fetch_range(idx: int) -> bool:
+        """Fetch bytes `bounds[idx]` up to `bounds[idx + 1]`; False if the range was ignored"""
+        position, end = bounds[idx], bounds[idx + 1] - 1
+        attempt = 0
+        range_headers = {"If-Range": validator} if validator else {}
+
+        while position <= end:
+            range_headers["Range"] = f"bytes={position}-{end}"
+            try:
+                async with client.stream(
+                    "GET", url, headers=range_headers, follow_redirects=True, timeout=timeout
+                ) as response:
+                    response.raise_for_status()
+                    if range_start(response) != position:
+                        return False
+
+                    async with aiofiles.open(partial, "r+b") as f:
+                        await f.seek(position)
+                        async for chunk in response.aiter_bytes():
+                            chunk = chunk[: end + 1 - position]
+                            await f.write(chunk)
+                            position += len(chunk)
+                            transferred[idx] += len(chunk)
+                            if on_progress is not None:
+                                on_progress(len(chunk))
+
+                if position <= end:
+                    raise IncompleteDownloadError(
+                        f"Incomplete download of {url}: part {idx + 1} ended at byte {position}"
+                    )
+
+            except (httpx.TransportError, IncompleteDownloadError) as exc:
+                attempt += 1
+                if attempt > retries:
+                    raise
+                logger.warning(
+                    f"Download of {output_path.name} part {idx + 1} interrupted ({exc!s}), "
+                    f"resuming from byte {position} (attempt {attempt} of {retries})"
+                )
+
+        return True
+
+    tasks = [asyncio.create_task(fetch_range(idx)) for idx in range(parts)]
+    try:
+        ranges_honored = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # The preallocated file has holes, so it cannot be resumed
+        partial.unlink(missing_ok=True)
+        raise
+
+    if not all(ranges_honored):
+        logger.debug(f"File changed during parallel download, restarting: {url}")
+        partial.unlink(missing_ok=True)
+        return None
+
+    digest = await asyncio.to_thread(hash_file, partial)
+    os.replace(partial, output_path)
+
+    return DownloadResult(
+        sum(transferred),
+        etag=etag,
+        last_modified=last_modified,
+        size=total,
+        sha256=digest.hexdigest(),
+    )
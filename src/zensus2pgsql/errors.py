@@ -1,2 +1,10 @@
 class Zensus2PgsqlError(Exception):
     pass
+
+
+class IncompleteDownloadError(Zensus2PgsqlError):
+    """Raised when a download ends before all of its bytes were received."""
+
+
+class CircuitOpenError(Zensus2PgsqlError):
+    """Raised when requests to a host are paused after repeated failures."""
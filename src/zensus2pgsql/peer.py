@@ -0,0 +1,177 @@
+"""
+Sharing the download cache between hosts
+
+`serve_cache` exposes a cache directory over HTTP so other hosts can download archives from
+it instead of from destatis.de. Only files recorded in the cache manifest are served,
+with Range support and the validators of the manifest, so peers can resume and revalidate
+downloads just like with the origin server.
+
+The manifest itself is served at `/manifest.json`; clients use it (`fetch_peer_manifest`) to
+find out which files a peer has and to check the sha256 of what they downloaded.
+"""
+
+import json
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+from .cache import MANIFEST_FILE, CacheEntry, CacheManifest
+from .logging import logger
+
+#: Response header carrying the sha256 hex digest of a served file
+SHA256_HEADER = "X-Content-SHA256"
+
+#: Size of the blocks written to the socket
+SEND_BLOCK_SIZE = 256 * 1024
+
+
+class CacheRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the files of `server.cache_dir` that are recorded in its manifest
+    """
+
+    protocol_version = "HTTP/1.1"
+    server: "CacheServer"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body: bool) -> None:
+        """Answer a GET or HEAD request for the manifest or one cached file"""
+        manifest = CacheManifest.load(self.server.cache_dir)
+        name = self.path.split("?", 1)[0].lstrip("/")
+
+        if name == MANIFEST_FILE:
+            entries = {
+                name: entry._asdict()
+                for name, entry in manifest.entries.items()
+                if (self.server.cache_dir / name).is_file()
+            }
+            self.send_bytes(json.dumps({"files": entries}).encode(), "application/json", send_body)
+            return
+
+        entry = manifest.get(name)
+        path = self.server.cache_dir / name
+        if "/" in name or entry is None or entry.sha256 is None or not path.is_file():
+            self.send_error(404)
+            return
+
+        size = path.stat().st_size
+        etag = entry.etag or f'"{entry.sha256}"'
+        last_modified = entry.last_modified or formatdate(path.stat().st_mtime, usegmt=True)
+
+        if self.not_modified(etag, last_modified):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        start, end, status = 0, size - 1, 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match and match.group(2) and int(match.group(2)) < int(match.group(1)):
+            # An invalid range (last byte before the first) is ignored, as RFC 9110 asks
+            match = None
+        if match and self.headers.get("If-Range", etag) in (etag, last_modified):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header(SHA256_HEADER, entry.sha256)
+        self.send_header("Content-Length", str(end - start + 1))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+
+        if send_body:
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0 and (block := f.read(min(SEND_BLOCK_SIZE, remaining))):
+                    self.wfile.write(block)
+                    remaining -= len(block)
+
+    def not_modified(self, etag: str, last_modified: str) -> bool:
+        """Whether the request's conditional headers match the current file"""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in (tag.strip() for tag in if_none_match.split(","))
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(
+                    if_modified_since
+                )
+            except (TypeError, ValueError):
+                return False
+
+        return False
+
+    def send_bytes(self, body: bytes, content_type: str, send_body: bool) -> None:
+        """Send a complete in-memory response"""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+class CacheServer(ThreadingHTTPServer):
+    """
+    HTTP server sharing a cache directory with other hosts
+    """
+
+    daemon_threads = True
+
+    def __init__(self, cache_dir: Path, host: str = "0.0.0.0", port: int = 0) -> None:
+        super().__init__((host, port), CacheRequestHandler)
+        self.cache_dir = cache_dir
+
+    @property
+    def url(self) -> str:
+        """URL peers use to reach this server"""
+        return f"http://{self.server_name}:{self.server_port}"
+
+
+async def fetch_peer_manifest(client: httpx.AsyncClient, peer: str) -> dict[str, CacheEntry]:
+    """
+    Returns the cache entries served by the peer at URL `peer`, or nothing if it is unreachable
+    """
+    try:
+        response = await client.get(f"{peer.rstrip('/')}/{MANIFEST_FILE}", timeout=10.0)
+        response.raise_for_status()
+        return {name: CacheEntry(**entry) for name, entry in response.json()["files"].items()}
+    except (httpx.HTTPError, ValueError, KeyError, TypeError) as exc:
+        logger.warning(f"Ignoring cache peer {peer}: {exc}")
+        return {}
+
+
+def peer_url(peer: str, filename: str) -> str:
+    """
+    Returns the URL of `filename` on the peer at URL `peer`
+
+    >>> peer_url("http://build-1:8642/", "alter.zip")
+    'http://build-1:8642/alter.zip'
+    """
+    return f"{peer.rstrip('/')}/{filename}"
@@ -0,0 +1,123 @@
+"""
+Planning the order in which datasets are imported
+
+The datasets differ in size by orders of magnitude. In catalog order, a large dataset that
+happens to come last keeps the run going long after the other workers have run out of
+work. `largest_first` orders them by size instead (longest processing time first), so the
+run takes little longer than its largest dataset.
+
+`DatasetTimes` records when the import of each dataset started and finished. The time a
+dataset should take is estimated when it starts, from its size and the seconds per byte
+of the datasets finished before it, so the summary can show estimated and actual times
+side by side. The largest datasets start before any has finished; they are estimated
+from a default rate instead.
+"""
+
+import time
+from collections.abc import Sequence
+from typing import NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+#: Seconds per archive byte assumed until a dataset has finished: downloading alone takes
+#: about 10 MiB/s from destatis.de, downloading, extracting and importing about 2 MiB/s
+DOWNLOAD_SECONDS_PER_BYTE = 1 / (10 * 2**20)
+IMPORT_SECONDS_PER_BYTE = 1 / (2 * 2**20)
+
+
+def largest_first(items: Sequence[T], sizes: Sequence[int | None]) -> list[T]:
+    """
+    Order `items` by their `sizes`, largest first
+
+    Items of unknown size (None) come last, in their original order.
+
+    >>> largest_first(["a", "b", "c", "d"], [10, None, 30, 20])
+    ['c', 'd', 'a', 'b']
+    """
+    order = sorted(range(len(items)), key=lambda idx: (sizes[idx] is None, -(sizes[idx] or 0)))
+    return [items[idx] for idx in order]
+
+
+class DatasetTime(NamedTuple):
+    """
+    Size and estimated and actual import time of a dataset
+    """
+
+    #: File name of the dataset's archive
+    name: str
+
+    #: Size of the archive in bytes (None if unknown)
+    size: int | None
+
+    #: Seconds the import was expected to take when it started (None without an estimate)
+    estimated: float | None
+
+    #: Seconds from the start of the download to the last imported CSV file
+    actual: float | None
+
+
+class DatasetTimes:
+    """
+    Start and finish times of the datasets of a run
+
+    A dataset is finished once all the CSV files announced with `add_pending` are done
+    (see `finish_one`), or directly with `finish` when it fails or is only downloaded.
+    Until a dataset has finished, times are estimated with `default_seconds_per_byte`.
+    """
+
+    def __init__(self, default_seconds_per_byte: float = IMPORT_SECONDS_PER_BYTE) -> None:
+        self.default_seconds_per_byte = default_seconds_per_byte
+
+        #: Archive size in bytes by dataset (None if unknown)
+        self.sizes: dict[str, int | None] = {}
+
+        self.started: dict[str, float] = {}
+        self.finished: dict[str, float] = {}
+        self.estimates: dict[str, float | None] = {}
+
+        #: Number of CSV files still to be imported by dataset
+        self.pending: dict[str, int] = {}
+
+    def seconds_per_byte(self) -> float:
+        """Seconds per archive byte the finished datasets took (the default before any did)"""
+        done = [name for name in self.finished if self.sizes.get(name)]
+        size = sum(self.sizes[name] or 0 for name in done)
+        if not size:
+            return self.default_seconds_per_byte
+        return sum(self.finished[name] - self.started[name] for name in done) / size
+
+    def start(self, name: str) -> None:
+        """Mark `name` as started now and estimate how long it will take"""
+        size = self.sizes.get(name)
+        self.estimates[name] = size * self.seconds_per_byte() if size else None
+        self.started[name] = time.monotonic()
+
+    def add_pending(self, name: str, count: int) -> None:
+        """Announce `count` CSV files of `name` to import; finishes `name` if there are none"""
+        self.pending[name] = self.pending.get(name, 0) + count
+        if not self.pending[name]:
+            self.finish(name)
+
+    def finish_one(self, name: str) -> None:
+        """Mark one CSV file of `name` as done, finishing `name` after the last one"""
+        self.pending[name] -= 1
+        if not self.pending[name]:
+            self.finish(name)
+
+    def finish(self, name: str) -> None:
+        """Mark `name` as finished now (unless it already is)"""
+        self.pending.pop(name, None)
+        if name in self.started and name not in self.finished:
+            self.finished[name] = time.monotonic()
+
+    def report(self) -> list[DatasetTime]:
+        """Sizes and times of the datasets, in the order they were started"""
+        return [
+            DatasetTime(
+                name,
+                self.sizes.get(name),
+                self.estimates.get(name),
+                self.finished[name] - started if name in self.finished else None,
+            )
+            for name, started in self.started.items()
+        ]
@@ -0,0 +1,296 @@
+"""
+Scheduling of downloads: adaptive concurrency, retries and circuit breakers
+
+`DownloadScheduler.run` wraps a single download with:
+
+- an AIMD (additive increase, multiplicative decrease) concurrency limit shared by all
+  downloads, halved when a server signals overload (429, 5xx, timeouts) and raised by one
+  after a full window of successful downloads,
+- retries with exponential backoff and full jitter, honouring `Retry-After`, limited per
+  download and by a retry budget shared by all downloads, so a failing server does not
+  trigger a retry storm,
+- a circuit breaker per host that stops sending requests to a host after repeated failures
+  and lets a single trial request through once it has cooled down.
+"""
+
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+from typing import TypeVar
+
+import httpx
+
+from .errors import CircuitOpenError, IncompleteDownloadError
+from .logging import logger
+
+T = TypeVar("T")
+
+#: HTTP status codes worth retrying
+RETRY_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+#: HTTP status codes signalling an overloaded server (reduce concurrency)
+CONGESTION_STATUS_CODES = frozenset({429, 503})
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """
+    Whether a download that failed with `exc` may succeed when retried
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRY_STATUS_CODES
+    return isinstance(exc, (httpx.TransportError, IncompleteDownloadError, CircuitOpenError))
+
+
+def is_congestion(exc: BaseException) -> bool:
+    """
+    Whether `exc` indicates an overloaded server, so fewer concurrent downloads should be run
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status in CONGESTION_STATUS_CODES or status >= 500
+    return isinstance(exc, httpx.TimeoutException)
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """
+    Returns the delay in seconds requested by the `Retry-After` header of a failed response
+    """
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    value = exc.response.headers.get("Retry-After")
+    if value is None:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(
+    attempt: int, base: float = 0.5, cap: float = 30.0, rng: random.Random | None = None
+) -> float:
+    """
+    Returns a random delay before retry number `attempt` (starting at 1)
+
+    Uses "full jitter": a uniform delay between zero and an exponentially growing ceiling, so
+    clients that failed together do not retry together.
+
+    >>> 0 <= backoff_delay(3, base=1.0) <= 4.0
+    True
+    """
+    ceiling = min(cap, base * 2 ** (attempt - 1))
+    return (rng or random).uniform(0, ceiling)
+
+
+class AimdLimiter:
+    """
+    Concurrency limit that adapts with additive increase and multiplicative decrease
+
+    Use as an async context manager around each download. The limit grows by one after
+    `limit` consecutive successes and halves (at most once per `cooldown` seconds, so one
+    burst of failures counts once) when `decrease` is called.
+    """
+
+    def __init__(
+        self, max_limit: int, min_limit: int = 1, initial: int | None = None, cooldown: float = 1.0
+    ) -> None:
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(initial if initial is not None else max_limit)
+        self.cooldown = cooldown
+
+        self.active = 0
+        self.successes = 0
+        self.last_decrease = float("-inf")
+        self.condition = asyncio.Condition()
+
+    async def __aenter__(self) -> "AimdLimiter":
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        async with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def increase(self) -> None:
+        """Record a success; raise the limit by one after a window of successes"""
+        self.successes += 1
+        if self.successes >= int(self.limit) and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+            self.successes = 0
+            logger.debug(f"Download concurrency raised to {int(self.limit)}")
+
+    def decrease(self) -> None:
+        """Record an overload signal; halve the limit"""
+        self.successes = 0
+        now = time.monotonic()
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self.limit = max(self.min_limit, self.limit / 2)
+        logger.debug(f"Download concurrency lowered to {int(self.limit)}")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one host
+
+    After `failure_threshold` consecutive failures the circuit opens and requests fail
+    immediately with `CircuitOpenError`. After `reset_timeout` seconds a single trial request
+    is let through (half-open); its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, host: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_running = False
+
+    def remaining(self) -> float:
+        """Seconds until the open circuit lets a trial request through"""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def before_request(self) -> None:
+        """Raises `CircuitOpenError` if no request may be sent to the host now"""
+        if self.opened_at is None:
+            return
+        if self.remaining() > 0 or self.trial_running:
+            raise CircuitOpenError(f"Circuit open for {self.host}, not sending request")
+        self.trial_running = True
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info(f"Circuit closed for {self.host}")
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    f"Circuit opened for {self.host} after {self.failures} failures, "
+                    f"pausing requests for {self.reset_timeout:.0f}s"
+                )
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+
+class RetryBudget:
+    """
+    Limits retries to a fraction of all downloads, plus a fixed allowance
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10) -> None:
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.requests = 0
+        self.retries = 0
+
+    def record_request(self) -> None:
+        self.requests += 1
+
+    def try_spend(self) -> bool:
+        """Use up one retry; returns False if the budget is exhausted"""
+        if self.retries >= self.min_retries + self.ratio * self.requests:
+            return False
+        self.retries += 1
+        return True
+
+
+class DownloadScheduler:
+    """
+    Runs downloads with adaptive concurrency, retries and per-host circuit breakers
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        budget: RetryBudget | None = None,
+        rng: random.Random | None = None,
+    ) -> None:
+        self.limiter = AimdLimiter(max_concurrency)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.budget = budget or RetryBudget()
+        self.rng = rng or random.Random()
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """Returns the circuit breaker of the host of `url`"""
+        host = httpx.URL(url).host
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+        return self.breakers[host]
+
+    async def run(
+        self, url: str, download: Callable[[], Awaitable[T]], retries: int | None = None
+    ) -> T:
+        """
+        Run `download` (a download of `url`), retrying it up to `retries` times
+
+        Errors that are not worth retrying (like 404) are raised immediately. Pass
+        `retries=0` to fail fast, e.g. when there is another source to fall back to.
+        """
+        retries = self.retries if retries is None else retries
+        breaker = self.breaker(url)
+        self.budget.record_request()
+        attempt = 0
+
+        while True:
+            try:
+                breaker.before_request()
+                async with self.limiter:
+                    result = await download()
+            except Exception as exc:
+                if not isinstance(exc, CircuitOpenError):
+                    if is_retryable(exc):
+                        breaker.record_failure()
+                    else:
+                        # The host answered; the request itself is wrong
+                        breaker.record_success()
+                    if is_congestion(exc):
+                        self.limiter.decrease()
+
+                attempt += 1
+                if not is_retryable(exc) or attempt > retries or not self.budget.try_spend():
+                    raise
+
+                delay = retry_after(exc) or backoff_delay(
+                    attempt, self.backoff_base, self.backoff_cap, self.rng
+                )
+                # A server asking for a longer Retry-After is not waited for beyond the cap
+                delay = min(delay, self.backoff_cap)
+                if isinstance(exc, CircuitOpenError):
+                    delay = max(delay, breaker.remaining())
+                logger.warning(
+                    f"Download of {url} failed ({exc!s}), retrying in {delay:.1f}s "
+                    f"(attempt {attempt} of {retries})"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            breaker.record_success()
+            self.limiter.increase()
+            return result
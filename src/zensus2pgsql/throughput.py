@@ -0,0 +1,103 @@
+"""
+Throughput counters for the stages of the import pipeline
+
+Each stage (downloading, inflating, copying into PostgreSQL) counts the bytes or rows it
+has processed in a `Throughput`. The rolling rate over the last few seconds is shown next
+to the progress bars, and the totals and average rates are printed at the end of a run, so
+a slow run shows which stage is the bottleneck.
+"""
+
+import threading
+import time
+from collections import deque
+
+from .cache import format_size
+
+#: Seconds over which the rolling rate is computed
+RATE_WINDOW = 5.0
+
+
+class Throughput:
+    """
+    Counts units (bytes or rows) processed by one pipeline stage
+
+    `add` may be called from worker threads.
+    """
+
+    def __init__(self, unit: str = "B", window: float = RATE_WINDOW) -> None:
+        self.unit = unit
+        self.window = window
+
+        self.total = 0
+
+        #: Time of the first and the last call to `add`
+        self.started: float | None = None
+        self.finished: float | None = None
+
+        #: (time, amount) of the calls to `add` within the rate window
+        self.samples: deque[tuple[float, int]] = deque()
+        self.window_total = 0
+        self.lock = threading.Lock()
+
+    def add(self, amount: int) -> None:
+        """Count `amount` more units as processed now"""
+        now = time.monotonic()
+        with self.lock:
+            if self.started is None:
+                self.started = now
+            self.finished = now
+            self.total += amount
+            self.samples.append((now, amount))
+            self.window_total += amount
+            self.expire(now)
+
+    def expire(self, now: float) -> None:
+        while self.samples and self.samples[0][0] < now - self.window:
+            self.window_total -= self.samples.popleft()[1]
+
+    def rate(self) -> float:
+        """Units per second over the last `window` seconds"""
+        now = time.monotonic()
+        with self.lock:
+            self.expire(now)
+            if not self.samples or self.started is None:
+                return 0.0
+            elapsed = min(self.window, now - self.started)
+            return self.window_total / max(elapsed, 1e-3)
+
+    def elapsed(self) -> float:
+        """Seconds between the first and the last unit processed"""
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def average(self) -> float:
+        """Units per second from the first to the last unit processed"""
+        elapsed = self.elapsed()
+        return self.total / elapsed if elapsed > 0 else 0.0
+
+    def format_amount(self, amount: float) -> str:
+        """
+        Format an amount of this counter's unit
+
+        >>> Throughput().format_amount(1536 * 1024)
+        '1.5 MiB'
+        >>> Throughput("rows").format_amount(1234567)
+        '1,234,567 rows'
+        """
+        if self.unit == "B":
+            return format_size(amount)
+        return f"{amount:,.0f} {self.unit}"
+
+    def format_rate(self, rate: float | None = None) -> str:
+        """Format `rate` (the rolling rate by default) per second"""
+        return f"{self.format_amount(self.rate() if rate is None else rate)}/s"
+
+    def summary(self) -> str:
+        """
+        Total and average rate, e.g. "1.5 GiB in 60.0s (25.6 MiB/s)"
+        """
+        return (
+            f"{self.format_amount(self.total)} in {self.elapsed():.1f}s "
+            f"({self.format_rate(self.average())})"
+        )
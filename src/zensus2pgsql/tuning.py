@@ -0,0 +1,100 @@
+"""
+Sizing the worker pools of an import to the database server
+
+`create --auto` reads how many connections the server accepts (and how many are already
+in use, e.g. by production traffic) and how many worker processes it runs, and sizes the
+database workers and the connection pool to take only a share of what is left. Downloads
+do not touch the database and are sized by the local CPU count, since every fetch worker
+also hashes the files it downloads.
+"""
+
+from typing import NamedTuple
+
+import asyncpg
+
+#: Number of fetch and database workers without `--auto`
+DEFAULT_FETCH_WORKERS = 5
+DEFAULT_DB_WORKERS = 5
+
+#: Number of zip files extracted at once
+DEFAULT_EXTRACT_WORKERS = 2
+
+#: Share of the free connections of the server an import takes at most
+CONNECTION_SHARE = 0.25
+
+#: Most fetch workers chosen automatically (more rarely help against one server)
+MAX_FETCH_WORKERS = 10
+
+
+class ServerLimits(NamedTuple):
+    """
+    Connection and process limits of a PostgreSQL server
+    """
+
+    #: `max_connections` setting
+    max_connections: int
+
+    #: Connections reserved for superusers and roles with `pg_use_reserved_connections`
+    reserved_connections: int
+
+    #: Client connections currently open
+    connections: int
+
+    #: `max_worker_processes` setting
+    max_worker_processes: int
+
+    @property
+    def free_connections(self) -> int:
+        """Connections other clients can still open"""
+        return max(0, self.max_connections - self.reserved_connections - self.connections)
+
+
+class WorkerSettings(NamedTuple):
+    """
+    Number of workers of each pipeline stage and the size of the connection pool
+    """
+
+    fetch_workers: int
+    db_workers: int
+    pool_size: int
+
+
+async def read_server_limits(conn: asyncpg.Connection) -> ServerLimits:
+    """Read the connection and process limits of the server `conn` is connected to"""
+    # `reserved_connections` only exists from PostgreSQL 16 on (missing_ok gives NULL)
+    row = await conn.fetchrow(
+        """
+        SELECT
+            current_setting('max_connections')::int,
+            current_setting('superuser_reserved_connections')::int
+                + COALESCE(current_setting('reserved_connections', true)::int, 0),
+            (SELECT count(*) FROM pg_stat_activity WHERE backend_type = 'client backend')::int,
+            current_setting('max_worker_processes')::int
+        """
+    )
+    return ServerLimits(*row)
+
+
+def auto_worker_settings(
+    limits: ServerLimits, cpu_count: int, copy_connections: int = 0
+) -> WorkerSettings:
+    """
+    Size the workers for a server with `limits` and a client with `cpu_count` cores
+
+    The pool takes at most `CONNECTION_SHARE` of the free connections (but at least one).
+    Database workers (one connection each) get what is left of it after the
+    `copy_connections` used to COPY large files in parts, and are limited to the server's
+    worker processes and the local cores, which convert rows in the direct load mode.
+
+    >>> auto_worker_settings(ServerLimits(100, 3, 17, 8), cpu_count=16)
+    WorkerSettings(fetch_workers=10, db_workers=8, pool_size=8)
+    >>> auto_worker_settings(ServerLimits(100, 3, 57, 8), cpu_count=16, copy_connections=4)
+    WorkerSettings(fetch_workers=10, db_workers=6, pool_size=10)
+    >>> auto_worker_settings(ServerLimits(100, 3, 90, 8), cpu_count=4)
+    WorkerSettings(fetch_workers=4, db_workers=1, pool_size=1)
+    """
+    share = int(limits.free_connections * CONNECTION_SHARE)
+    db_workers = max(1, min(share - copy_connections, limits.max_worker_processes, cpu_count))
+    pool_size = max(db_workers, min(share, db_workers + copy_connections))
+    fetch_workers = max(1, min(cpu_count, MAX_FETCH_WORKERS))
+    return WorkerSettings(fetch_workers, db_workers, pool_size)
@@ -0,0 +1,103 @@
+"""Tests for the cache commands."""
+
+import pytest
+from typer.testing import CliRunner
+
+from zensus2pgsql.cache import CACHE_MAX_SIZE_ENVVAR, MANIFEST_FILE, CacheEntry, CacheManifest
+from zensus2pgsql.cli import app
+
+
+@pytest.fixture
+def runner():
+    """Create a CLI test runner."""
+    return CliRunner()
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Create a cache directory with two 1 KiB files, `old.zip` used before `new.zip`."""
+    manifest = CacheManifest.load(tmp_path)
+    for name, last_used in (("old.zip", 100.0), ("new.zip", 200.0)):
+        (tmp_path / name).write_bytes(b"x" * 1024)
+        manifest.set(
+            name, CacheEntry(f"https://example.com/{name}", size=1024, last_used=last_used)
+        )
+    manifest.save()
+    return tmp_path
+
+
+def test_stats(runner, cache_dir):
+    """Test that stats lists the cached files and their total size."""
+    result = runner.invoke(app, ["cache", "stats", "--cache-dir", str(cache_dir)])
+
+    assert result.exit_code == 0
+    assert "old.zip" in result.stdout
+    assert "new.zip" in result.stdout
+    assert "2 files, 2.0 KiB" in result.stdout
+
+
+def test_prune(runner, cache_dir):
+    """Test that prune removes the least recently used files."""
+    result = runner.invoke(
+        app, ["cache", "prune", "--max-size", "1K", "--cache-dir", str(cache_dir)]
+    )
+
+    assert result.exit_code == 0
+    assert "Removed 1 files (1.0 KiB)" in result.stdout
+    assert not (cache_dir / "old.zip").exists()
+    assert (cache_dir / "new.zip").exists()
+
+
+def test_prune_budget_from_environment(runner, cache_dir):
+    """Test that the byte budget can be set with an environment variable."""
+    result = runner.invoke(
+        app,
+        ["cache", "prune", "--dry-run", "--cache-dir", str(cache_dir)],
+        env={CACHE_MAX_SIZE_ENVVAR: "0"},
+    )
+
+    assert result.exit_code == 0
+    assert "Would remove 2 files (2.0 KiB)" in result.stdout
+    assert (cache_dir / "old.zip").exists()
+
+
+def test_prune_invalid_size(runner, cache_dir):
+    """Test that an invalid size is rejected."""
+    result = runner.invoke(
+        app, ["cache", "prune", "--max-size", "lots", "--cache-dir", str(cache_dir)]
+    )
+
+    assert result.exit_code != 0
+
+
+def test_clear(runner, cache_dir):
+    """Test that clear removes all cached files and the manifest."""
+    result = runner.invoke(app, ["cache", "clear", "--confirm", "--cache-dir", str(cache_dir)])
+
+    assert result.exit_code == 0
+    assert "Removed 2 files" in result.stdout
+    assert list(cache_dir.iterdir()) == []
+    assert not (cache_dir / MANIFEST_FILE).exists()
+
+
+def test_clear_aborted(runner, cache_dir):
+    """Test that clear keeps the files when the confirmation is declined."""
+    result = runner.invoke(app, ["cache", "clear", "--cache-dir", str(cache_dir)], input="n\n")
+
+    assert result.exit_code == 0
+    assert (cache_dir / "old.zip").exists()
+
+
+def test_clear_keeps_foreign_files(runner, cache_dir):
+    """Test that clear and prune leave files of other programs in the directory alone."""
+    (cache_dir / "notes.txt").write_text("not ours")
+    (cache_dir / "other").mkdir()
+    (cache_dir / "other" / "data.bin").write_bytes(b"x" * 4096)
+
+    runner.invoke(app, ["cache", "prune", "--max-size", "0", "--cache-dir", str(cache_dir)])
+    result = runner.invoke(app, ["cache", "clear", "--confirm", "--cache-dir", str(cache_dir)])
+
+    assert result.exit_code == 0
+    assert (cache_dir / "notes.txt").exists()
+    assert (cache_dir / "other" / "data.bin").exists()
+    assert not (cache_dir / "old.zip").exists()
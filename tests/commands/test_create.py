@@ -1,107 +1,52 @@
 """Tests for the create command - targeting 100% coverage."""
 
 import asyncio
+import hashlib
 import tempfile
+import zipfile
 from pathlib import Path
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
+import asyncpg
 import httpx
 import pytest
 
+from tests.conftest import (
+    MockAsyncpgConnection,
+    MockAsyncpgPool,
+    MockPoolAcquireContext,
+    MockStreamResponse,
+)
+from zensus2pgsql.cache import CacheEntry, CacheManifest, extracted_dir
 from zensus2pgsql.commands.create import (
+    FAST_LOAD_MAINTENANCE_WORK_MEM,
     DatabaseConfig,
     FetchManager,
+    SpatialIndex,
+    choose_worker_settings,
     collect,
     collect_wrapper,
-    detect_column_type,
-    detect_file_encoding,
-    detect_file_encoding_old,
     get_db_pool,
-    sanitize_column_name,
-    sanitize_table_name,
+    print_download_summary,
+    resolve_source_url,
 )
+from zensus2pgsql.csv import FileRange, ZipMember, line_ranges, sanitize_table_name
+from zensus2pgsql.errors import Zensus2PgsqlError
+from zensus2pgsql.geometry import encode_point_ewkb
+from zensus2pgsql.scheduler import DownloadScheduler
+from zensus2pgsql.tuning import ServerLimits, WorkerSettings
 
-# =============================================================================
-# UTILITY FUNCTION TESTS
-# =============================================================================
+
+def type_detection_row(
+    num_columns: int, non_empty: int = 100, integer_count: int = 0, numeric_count: int = 0
+) -> tuple[int, ...]:
+    """Build the fetchrow result of a single-pass type detection query."""
+    return (100, *(non_empty, integer_count, numeric_count) * num_columns)
 
 
-class TestSanitizeColumnName:
-    """Tests for sanitize_column_name function."""
-
-    def test_lowercase_conversion(self):
-        """Test that column names are converted to lowercase."""
-        assert sanitize_column_name("ColumnName") == "columnname"
-        assert sanitize_column_name("UPPERCASE") == "uppercase"
-        assert sanitize_column_name("MixedCase") == "mixedcase"
-
-    def test_digit_prefix_gets_underscore(self):
-        """Test that names starting with digits get underscore prefix."""
-        assert sanitize_column_name("1column") == "_1column"
-        assert sanitize_column_name("123abc") == "_123abc"
-        assert sanitize_column_name("9test") == "_9test"
-
-    def test_already_sanitized_unchanged(self):
-        """Test that already sanitized names remain unchanged."""
-        assert sanitize_column_name("column_name") == "column_name"
-        assert sanitize_column_name("lowercase") == "lowercase"
-        assert sanitize_column_name("_prefixed") == "_prefixed"
-
-    def test_empty_string(self):
-        """Test that empty string returns empty string."""
-        assert sanitize_column_name("") == ""
-
-    def test_underscore_prefix_preserved(self):
-        """Test that existing underscore prefix is preserved."""
-        assert sanitize_column_name("_existing") == "_existing"
-        assert sanitize_column_name("__double") == "__double"
-
-
-class TestSanitizeTableName:
-    """Tests for sanitize_table_name function."""
-
-    def test_removes_zensus2022_prefix(self):
-        """Test that zensus2022_ prefix is removed."""
-        assert sanitize_table_name("zensus2022_bevoelkerung") == "bevoelkerung"
-        assert sanitize_table_name("Zensus2022_Test") == "test"
-
-    def test_removes_gitter_suffix(self):
-        """Test that _gitter suffix is removed."""
-        assert sanitize_table_name("test_gitter") == "test"
-        assert sanitize_table_name("data_gitter.csv") == "data.csv"
-
-    def test_replaces_hyphens_with_underscores(self):
-        """Test that hyphens are replaced with underscores."""
-        assert sanitize_table_name("test-name") == "test_name"
-        assert sanitize_table_name("multi-part-name") == "multi_part_name"
-
-    def test_replaces_spaces_with_underscores(self):
-        """Test that spaces are replaced with underscores."""
-        assert sanitize_table_name("test name") == "test_name"
-        assert sanitize_table_name("multi part name") == "multi_part_name"
-
-    def test_truncates_to_63_characters(self):
-        """Test that names are truncated to 63 characters."""
-        long_name = "a" * 100
-        result = sanitize_table_name(long_name)
-        assert len(result) == 63
-        assert result == "a" * 63
-
-    def test_lowercase_conversion(self):
-        """Test that names are converted to lowercase."""
-        assert sanitize_table_name("TestName") == "testname"
-        assert sanitize_table_name("UPPERCASE") == "uppercase"
-
-    def test_combined_transformations(self):
-        """Test multiple transformations applied together."""
-        result = sanitize_table_name("Zensus2022_Test-Data Name_gitter")
-        assert result == "test_data_name"
-
-    def test_csv_extension_preserved(self):
-        """Test that .csv extension is preserved in sanitization."""
-        # The function doesn't explicitly remove .csv, it stays
-        result = sanitize_table_name("Zensus2022_Data_Gitter.csv")
-        assert ".csv" in result
+# =============================================================================
+# DATABASE CONFIG TESTS
+# =============================================================================
 
 
 class TestDatabaseConfig:
@@ -149,156 +94,6 @@ class TestDatabaseConfig:
         assert config.drop_existing is True
 
 
-# =============================================================================
-# ENCODING DETECTION TESTS
-# =============================================================================
-
-
-class TestDetectFileEncoding:
-    """Tests for detect_file_encoding async function."""
-
-    @pytest.mark.asyncio
-    async def test_detects_utf8_encoding(self, temp_csv_file):
-        """Test that UTF-8 files are correctly detected."""
-        encoding = await detect_file_encoding(temp_csv_file)
-        assert encoding == "utf-8"
-
-    @pytest.mark.asyncio
-    async def test_detects_latin1_encoding(self, temp_csv_file_latin1):
-        """Test that ISO-8859-1 files are correctly detected."""
-        encoding = await detect_file_encoding(temp_csv_file_latin1)
-        # UTF-8 can read ISO-8859-1 in many cases, so we accept either
-        assert encoding in ["utf-8", "iso-8859-1"]
-
-    @pytest.mark.asyncio
-    async def test_detects_windows1252_encoding(self, temp_csv_file_windows1252):
-        """Test that Windows-1252 files are correctly detected."""
-        encoding = await detect_file_encoding(temp_csv_file_windows1252)
-        # May detect as utf-8 if content is compatible
-        assert encoding in ["utf-8", "windows-1252", "iso-8859-1"]
-
-    @pytest.mark.asyncio
-    async def test_fallback_to_iso8859(self):
-        """Test fallback to ISO-8859-1 for unknown encodings."""
-        # Create a file with invalid UTF-8 bytes
-        with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=".csv") as f:
-            # Write bytes that are invalid UTF-8
-            f.write(b"\xff\xfe" + "test".encode("utf-16-le"))
-            temp_path = Path(f.name)
-
-        encoding = await detect_file_encoding(temp_path)
-        # Should fallback to iso-8859-1 or detect one of the encodings
-        assert encoding in ["utf-8", "iso-8859-1", "windows-1252", "cp1252"]
-
-    @pytest.mark.asyncio
-    async def test_empty_file(self):
-        """Test encoding detection on empty file."""
-        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".csv") as f:
-            temp_path = Path(f.name)
-
-        encoding = await detect_file_encoding(temp_path)
-        assert encoding == "utf-8"  # Empty file should be valid UTF-8
-
-
-class TestDetectFileEncodingOld:
-    """Tests for detect_file_encoding_old sync function."""
-
-    def test_detects_utf8_encoding(self, temp_csv_file):
-        """Test that UTF-8 files are correctly detected."""
-        encoding = detect_file_encoding_old(temp_csv_file)
-        assert encoding == "utf-8"
-
-    def test_detects_latin1_encoding(self, temp_csv_file_latin1):
-        """Test that ISO-8859-1 files are correctly detected."""
-        encoding = detect_file_encoding_old(temp_csv_file_latin1)
-        assert encoding in ["utf-8", "iso-8859-1"]
-
-    def test_empty_file(self):
-        """Test encoding detection on empty file."""
-        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".csv") as f:
-            temp_path = Path(f.name)
-
-        encoding = detect_file_encoding_old(temp_path)
-        assert encoding == "utf-8"
-
-
-# =============================================================================
-# TYPE DETECTION TESTS
-# =============================================================================
-
-
-class TestDetectColumnType:
-    """Tests for detect_column_type async function."""
-
-    @pytest.mark.asyncio
-    async def test_detects_integer_type(self):
-        """Test detection of INTEGER type columns."""
-        conn = AsyncMock()
-        conn.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
-
-        result = await detect_column_type(conn, "test_table", "test_col")
-        assert result == "INTEGER"
-
-    @pytest.mark.asyncio
-    async def test_detects_double_precision_type(self):
-        """Test detection of DOUBLE PRECISION type columns."""
-        conn = AsyncMock()
-        # non_empty=100, integer_count=50, numeric_count=100 (all are numeric but not all integers)
-        conn.fetchrow = AsyncMock(return_value=(100, 100, 50, 100))
-
-        result = await detect_column_type(conn, "test_table", "test_col")
-        assert result == "DOUBLE PRECISION"
-
-    @pytest.mark.asyncio
-    async def test_detects_text_type(self):
-        """Test detection of TEXT type columns."""
-        conn = AsyncMock()
-        # Some values are not numeric
-        conn.fetchrow = AsyncMock(return_value=(100, 100, 50, 50))
-
-        result = await detect_column_type(conn, "test_table", "test_col")
-        assert result == "TEXT"
-
-    @pytest.mark.asyncio
-    async def test_empty_column_returns_text(self):
-        """Test that empty columns return TEXT type."""
-        conn = AsyncMock()
-        # non_empty=0
-        conn.fetchrow = AsyncMock(return_value=(100, 0, 0, 0))
-
-        result = await detect_column_type(conn, "test_table", "test_col")
-        assert result == "TEXT"
-
-    @pytest.mark.asyncio
-    async def test_all_null_returns_text(self):
-        """Test that all-NULL columns return TEXT type."""
-        conn = AsyncMock()
-        conn.fetchrow = AsyncMock(return_value=(0, 0, 0, 0))
-
-        result = await detect_column_type(conn, "test_table", "test_col")
-        assert result == "TEXT"
-
-    @pytest.mark.asyncio
-    async def test_negative_integers_detected(self):
-        """Test that negative integers are correctly detected."""
-        conn = AsyncMock()
-        # All values are integers including negatives
-        conn.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
-
-        result = await detect_column_type(conn, "test_table", "test_col")
-        assert result == "INTEGER"
-
-    @pytest.mark.asyncio
-    async def test_german_decimal_format_detected(self):
-        """Test that German decimal format is detected as numeric."""
-        conn = AsyncMock()
-        # Numeric regex handles German format via REPLACE
-        conn.fetchrow = AsyncMock(return_value=(100, 100, 0, 100))
-
-        result = await detect_column_type(conn, "test_table", "test_col")
-        assert result == "DOUBLE PRECISION"
-
-
 # =============================================================================
 # DATABASE POOL TESTS
 # =============================================================================
@@ -330,6 +125,74 @@ class TestGetDbPool:
             assert result == mock_pool
             mock_conn.close.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_pool_size(self, database_config):
+        """Test that the pool opens at most `pool_size` connections."""
+        mock_conn = AsyncMock()
+        mock_conn.fetchval = AsyncMock(return_value=True)
+
+        async def mock_connect(*args, **kwargs):
+            return mock_conn
+
+        with (
+            patch("zensus2pgsql.commands.create.asyncpg.connect", side_effect=mock_connect),
+            patch(
+                "zensus2pgsql.commands.create.asyncpg.create_pool", new=AsyncMock()
+            ) as mock_create_pool,
+        ):
+            await get_db_pool(database_config, pool_size=1)
+
+        assert mock_create_pool.call_args.kwargs["min_size"] == 1
+        assert mock_create_pool.call_args.kwargs["max_size"] == 1
+
+
+class TestChooseWorkerSettings:
+    """Tests for choose_worker_settings."""
+
+    @pytest.mark.asyncio
+    async def test_defaults(self, database_config):
+        """Test that without --auto the defaults are used and nothing is read from the server."""
+        with patch("zensus2pgsql.commands.create.get_server_limits") as mock_limits:
+            settings = await choose_worker_settings(database_config, None, 3, None, auto=False)
+
+        mock_limits.assert_not_called()
+        assert settings == WorkerSettings(5, 3, 3)
+
+    @pytest.mark.asyncio
+    async def test_auto_with_explicit_values(self, database_config):
+        """Test that --auto sizes the values not given from the server's limits."""
+        limits = ServerLimits(
+            max_connections=40, reserved_connections=3, connections=5, max_worker_processes=8
+        )
+        with (
+            patch(
+                "zensus2pgsql.commands.create.get_server_limits", new=AsyncMock(return_value=limits)
+            ),
+            patch("zensus2pgsql.commands.create.os.cpu_count", return_value=16),
+        ):
+            settings = await choose_worker_settings(database_config, 2, None, 12, auto=True)
+
+        assert settings == WorkerSettings(fetch_workers=2, db_workers=8, pool_size=12)
+
+    @pytest.mark.asyncio
+    async def test_auto_counts_copy_connections_in_its_share(self, database_config):
+        """Test that --auto leaves room for the --copy-parts connections within its share."""
+        # 40 free connections, of which the import takes 10
+        limits = ServerLimits(
+            max_connections=100, reserved_connections=3, connections=57, max_worker_processes=8
+        )
+        with (
+            patch(
+                "zensus2pgsql.commands.create.get_server_limits", new=AsyncMock(return_value=limits)
+            ),
+            patch("zensus2pgsql.commands.create.os.cpu_count", return_value=16),
+        ):
+            settings = await choose_worker_settings(
+                database_config, None, None, None, auto=True, copy_parts=4
+            )
+
+        assert settings == WorkerSettings(fetch_workers=10, db_workers=6, pool_size=10)
+
     @pytest.mark.asyncio
     async def test_connection_failure_exits(self, database_config):
         """Test that connection failure raises typer.Exit."""
@@ -481,17 +344,12 @@ class TestFetchWorker:
             await manager.fetch_queue.put(("https://example.com/test.zip", "test.zip"))
             await manager.fetch_queue.put(None)
 
-            # Mock aiofiles.open
-            mock_file = AsyncMock()
-            mock_file.__aenter__ = AsyncMock(return_value=mock_file)
-            mock_file.__aexit__ = AsyncMock(return_value=None)
-            mock_file.write = AsyncMock()
-
-            with patch("aiofiles.open", return_value=mock_file):
-                await manager.fetch_worker()
+            await manager.fetch_worker()
 
             assert manager.success == 1
             assert manager.failed == 0
+            assert (Path(tmpdir) / "test.zip").read_bytes() == b"PK\x03\x04" + b"\x00" * 100
+            assert not (Path(tmpdir) / "test.zip.part").exists()
 
     @pytest.mark.asyncio
     async def test_skip_existing_file(
@@ -501,7 +359,7 @@ class TestFetchWorker:
         with tempfile.TemporaryDirectory() as tmpdir:
             # Create existing file
             existing_file = Path(tmpdir) / "existing.zip"
-            existing_file.touch()
+            zipfile.ZipFile(existing_file, "w").close()
 
             manager = FetchManager(
                 client=mock_httpx_client,
@@ -520,6 +378,113 @@ class TestFetchWorker:
             assert manager.skipped == 1
             assert manager.success == 0
 
+    @pytest.mark.asyncio
+    async def test_corrupt_cached_file_is_downloaded_again(
+        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config, tmp_path
+    ):
+        """Test that a cached file failing its hash check is quarantined and re-downloaded."""
+        cached_file = tmp_path / "test.zip"
+        cached_file.write_bytes(b"PK\x03\x04" + b"\x00" * 50)
+        manifest = CacheManifest.load(tmp_path)
+        manifest.set(
+            "test.zip",
+            CacheEntry("https://example.com/test.zip", size=104, sha256="0" * 64, mtime=0.0),
+        )
+        manifest.save()
+
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+        )
+        await manager.fetch_queue.put(("https://example.com/test.zip", "test.zip"))
+        await manager.fetch_queue.put(None)
+
+        await manager.fetch_worker()
+
+        assert (manager.success, manager.skipped) == (1, 0)
+        assert cached_file.read_bytes() == b"PK\x03\x04" + b"\x00" * 100
+        assert [p.name.split(".zip.")[0] for p in (tmp_path / "quarantine").iterdir()] == ["test"]
+        entry = CacheManifest.load(tmp_path).get("test.zip")
+        assert entry.sha256 == hashlib.sha256(cached_file.read_bytes()).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_cached_file_is_not_hashed(
+        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config, tmp_path
+    ):
+        """Test that files matching their manifest size and mtime are reused without reading."""
+        cached_file = tmp_path / "test.zip"
+        zipfile.ZipFile(cached_file, "w").close()
+        stat = cached_file.stat()
+        manifest = CacheManifest.load(tmp_path)
+        manifest.set(
+            "test.zip",
+            CacheEntry(
+                "https://example.com/test.zip",
+                size=stat.st_size,
+                sha256="0" * 64,
+                mtime=stat.st_mtime,
+            ),
+        )
+        manifest.save()
+
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+        )
+        await manager.fetch_queue.put(("https://example.com/test.zip", "test.zip"))
+        await manager.fetch_queue.put(None)
+
+        with patch("zensus2pgsql.cache.hash_file") as mock_hash_file:
+            await manager.fetch_worker()
+
+        mock_hash_file.assert_not_called()
+        assert manager.skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_revalidate_cached_file(
+        self, http_server, mock_asyncpg_pool, mock_progress, database_config, tmp_path
+    ):
+        """Test that --revalidate only downloads cached files that changed on the server."""
+        http_server.files["test.zip"] = b"PK\x03\x04" + b"\x00" * 100
+
+        async def run_worker() -> FetchManager:
+            async with httpx.AsyncClient() as client:
+                manager = FetchManager(
+                    client=client,
+                    output_folder=tmp_path,
+                    progress=mock_progress,
+                    db_pool=mock_asyncpg_pool,
+                    db_config=database_config,
+                    revalidate=True,
+                )
+                await manager.fetch_queue.put((http_server.url("test.zip"), "test.zip"))
+                await manager.fetch_queue.put(None)
+                await manager.fetch_worker()
+            return manager
+
+        manager = await run_worker()
+        assert manager.success == 1
+        entry = CacheManifest.load(tmp_path).get("test.zip")
+        assert entry.sha256 == hashlib.sha256(http_server.files["test.zip"]).hexdigest()
+
+        # Unchanged on the server: answered with 304, nothing downloaded
+        manager = await run_worker()
+        assert (manager.success, manager.skipped) == (0, 1)
+        assert http_server.requests[-1][1]["If-None-Match"] == entry.etag
+
+        # Republished on the server: downloaded again
+        http_server.files["test.zip"] = b"PK\x03\x04" + b"\x01" * 100
+        manager = await run_worker()
+        assert manager.success == 1
+        assert (tmp_path / "test.zip").read_bytes() == http_server.files["test.zip"]
+        assert CacheManifest.load(tmp_path).get("test.zip").etag != entry.etag
+
     @pytest.mark.asyncio
     async def test_download_failure_http_error(
         self, mock_asyncpg_pool, mock_progress, database_config
@@ -626,8 +591,13 @@ class TestExtractWorker:
             # Check that CSV was queued for database import
             assert manager.database_task_total == 1
 
+            # Inflated bytes are counted
+            with zipfile.ZipFile(temp_zip_with_csv) as archive:
+                expected = sum(info.file_size for info in archive.infolist())
+            assert manager.inflate_throughput.total == expected
+
     @pytest.mark.asyncio
-    async def test_extract_multiple_csvs(
+    async def test_extract_in_processes(
         self,
         mock_httpx_client,
         mock_asyncpg_pool,
@@ -635,7 +605,7 @@ class TestExtractWorker:
         database_config,
         temp_zip_with_multiple_csvs,
     ):
-        """Test extracting a ZIP with multiple CSVs."""
+        """Test extracting with a process pool."""
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
                 client=mock_httpx_client,
@@ -643,165 +613,1032 @@ class TestExtractWorker:
                 progress=mock_progress,
                 db_pool=mock_asyncpg_pool,
                 db_config=database_config,
+                extract_workers=2,
+                extract_processes=True,
             )
 
             await manager.extract_queue.put(temp_zip_with_multiple_csvs)
             await manager.extract_queue.put(None)
 
-            await manager.extract_worker()
+            try:
+                await manager.extract_worker()
+            finally:
+                manager.extract_executor.shutdown()
 
-            # Should find 2 CSV files
             assert manager.database_task_total == 2
+            assert manager.inflate_throughput.total > 0
+            assert not manager.errors
 
     @pytest.mark.asyncio
-    async def test_extract_no_matching_csv(
-        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config, temp_zip_no_csv
+    @pytest.mark.parametrize("stream", [False, True])
+    async def test_only_selected_members_are_extracted(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_progress,
+        database_config,
+        sample_csv_content,
+        tmp_path,
+        stream,
     ):
-        """Test extracting a ZIP with no matching CSV files."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            manager = FetchManager(
-                client=mock_httpx_client,
-                output_folder=Path(tmpdir),
-                progress=mock_progress,
-                db_pool=mock_asyncpg_pool,
-                db_config=database_config,
-            )
+        """Test that only CSV members of the chosen resolutions are inflated."""
+        zip_path = tmp_path / "data.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.writestr("Zensus2022_Data_100m-Gitter.csv", sample_csv_content)
+            zf.writestr("Zensus2022_Data_1km-Gitter.csv", sample_csv_content)
+            zf.writestr("Datensatzbeschreibung.pdf", "Not a CSV")
 
-            await manager.extract_queue.put(temp_zip_no_csv)
-            await manager.extract_queue.put(None)
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+            stream=stream,
+            resolutions=["1km"],
+        )
 
-            await manager.extract_worker()
+        await manager.extract_queue.put(zip_path)
+        await manager.extract_queue.put(None)
+        await manager.extract_worker()
 
-            # No CSVs should be queued
-            assert manager.database_task_total == 0
+        queued = manager.database_queue.get_nowait()
+        assert queued.name == "Zensus2022_Data_1km-Gitter.csv"
+        assert manager.database_queue.empty()
+        extracted = {path.name for path in Path(manager.temp_dir.name).rglob("*") if path.is_file()}
+        assert extracted == (set() if stream else {"Zensus2022_Data_1km-Gitter.csv"})
+        manager.remove_temp_dir()
 
     @pytest.mark.asyncio
-    async def test_extract_empty_zip(
-        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config, temp_empty_zip
+    async def test_extracted_files_are_cached(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_progress,
+        database_config,
+        temp_zip_with_multiple_csvs,
+        tmp_path,
     ):
-        """Test extracting an empty ZIP file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
+        """Test that a second extraction of an archive reuses the cached files."""
+        managers = []
+        for _ in range(2):
             manager = FetchManager(
                 client=mock_httpx_client,
-                output_folder=Path(tmpdir),
+                output_folder=tmp_path,
                 progress=mock_progress,
                 db_pool=mock_asyncpg_pool,
                 db_config=database_config,
+                extract_cache=True,
             )
-
-            await manager.extract_queue.put(temp_empty_zip)
+            await manager.extract_queue.put(temp_zip_with_multiple_csvs)
             await manager.extract_queue.put(None)
-
             await manager.extract_worker()
+            managers.append(manager)
 
-            assert manager.database_task_total == 0
-
-    @pytest.mark.asyncio
-    async def test_sentinel_shutdown(
-        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config
-    ):
-        """Test that worker shuts down on receiving sentinel."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            manager = FetchManager(
-                client=mock_httpx_client,
-                output_folder=Path(tmpdir),
-                progress=mock_progress,
-                db_pool=mock_asyncpg_pool,
-                db_config=database_config,
-            )
-
-            await manager.extract_queue.put(None)
-
-            await asyncio.wait_for(manager.extract_worker(), timeout=5.0)
-
-
-# =============================================================================
-# DATABASE WORKER TESTS
-# =============================================================================
+        first, second = managers
+        assert first.inflate_throughput.total > 0
+        assert second.inflate_throughput.total == 0
+        assert second.database_task_total == 2
 
+        with zipfile.ZipFile(temp_zip_with_multiple_csvs) as archive:
+            expected = archive.read("Zensus2022_Data1_Gitter.csv")
+        csv_file = second.database_queue.get_nowait()
+        assert csv_file.read_bytes() == expected
+        assert Path(second.temp_dir.name) in csv_file.parents
 
-class TestDatabaseWorker:
-    """Tests for FetchManager.database_worker method."""
+        for manager in managers:
+            manager.remove_temp_dir()
 
     @pytest.mark.asyncio
-    async def test_import_csv_success(
+    async def test_incomplete_cached_file_is_extracted_again(
         self,
         mock_httpx_client,
         mock_asyncpg_pool,
-        mock_asyncpg_connection,
         mock_progress,
         database_config,
-        temp_csv_file,
+        temp_zip_with_csv,
+        tmp_path,
     ):
-        """Test successful CSV import."""
-        # Setup mock connection - table doesn't exist
-        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=[False])
-        mock_asyncpg_connection.fetchrow = AsyncMock(
-            return_value=(100, 100, 100, 100)
-        )  # All integers
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            manager = FetchManager(
-                client=mock_httpx_client,
-                output_folder=Path(tmpdir),
-                progress=mock_progress,
-                db_pool=mock_asyncpg_pool,
-                db_config=database_config,
-            )
-
-            await manager.database_queue.put(temp_csv_file)
-            await manager.database_queue.put(None)
+        """Test that a truncated file in the extract cache is replaced."""
+        member = "Zensus2022_TestData_Gitter.csv"
+        sha256 = hashlib.sha256(temp_zip_with_csv.read_bytes()).hexdigest()
+        cached = extracted_dir(tmp_path, sha256) / member
+        cached.parent.mkdir(parents=True)
+        cached.write_text("trunc")
 
-            await manager.database_worker()
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+            extract_cache=True,
+        )
+        await manager.extract_queue.put(temp_zip_with_csv)
+        await manager.extract_queue.put(None)
+        await manager.extract_worker()
 
-            # Verify SQL operations were called
-            assert mock_asyncpg_connection.execute.called
-            assert mock_asyncpg_connection.copy_to_table.called
+        with zipfile.ZipFile(temp_zip_with_csv) as archive:
+            assert cached.read_bytes() == archive.read(member)
+        manager.remove_temp_dir()
 
     @pytest.mark.asyncio
-    async def test_skip_existing_table_no_drop(
+    async def test_extracted_files_are_removed_once_imported(
         self,
         mock_httpx_client,
         mock_asyncpg_pool,
-        mock_asyncpg_connection,
         mock_progress,
         database_config,
-        temp_csv_file,
+        temp_zip_with_multiple_csvs,
+        tmp_path,
     ):
-        """Test skipping existing table when drop_existing=False."""
-        mock_asyncpg_connection.fetchval = AsyncMock(return_value=True)  # Table exists
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            manager = FetchManager(
-                client=mock_httpx_client,
-                output_folder=Path(tmpdir),
-                progress=mock_progress,
-                db_pool=mock_asyncpg_pool,
-                db_config=database_config,  # drop_existing=False
-            )
-
-            await manager.database_queue.put(temp_csv_file)
-            await manager.database_queue.put(None)
-
-            await manager.database_worker()
-
+        """Test that an archive's directory is removed once its last CSV file is done."""
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path / "cache",
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+            temp_dir=tmp_path,
+        )
+        assert Path(manager.temp_dir.name).parent == tmp_path
+
+        await manager.extract_queue.put(temp_zip_with_multiple_csvs)
+        await manager.extract_queue.put(None)
+        await manager.extract_worker()
+
+        first = manager.database_queue.get_nowait()
+        second = manager.database_queue.get_nowait()
+        extract_dir = first.parent
+
+        await manager.release_csv(first)
+        assert extract_dir.exists()
+        await manager.release_csv(second)
+        assert not extract_dir.exists()
+        assert not manager.pending_imports
+        # No copy of the extracted data is left anywhere
+        assert not [path for path in tmp_path.rglob("*.csv") if path.is_file()]
+        manager.remove_temp_dir()
+
+    @pytest.mark.parametrize(("cache_max_size", "kept"), [(None, True), (0, False)])
+    @pytest.mark.asyncio
+    async def test_cached_files_over_budget_are_removed_once_imported(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_progress,
+        database_config,
+        temp_zip_with_multiple_csvs,
+        tmp_path,
+        cache_max_size,
+        kept,
+    ):
+        """Test that an archive's extracted files leave the cache when it is over budget."""
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path / "cache",
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+            extract_cache=True,
+            cache_max_size=cache_max_size,
+            temp_dir=tmp_path,
+        )
+
+        await manager.extract_queue.put(temp_zip_with_multiple_csvs)
+        await manager.extract_queue.put(None)
+        await manager.extract_worker()
+
+        for _ in range(2):
+            await manager.release_csv(manager.database_queue.get_nowait())
+
+        sha256 = hashlib.sha256(temp_zip_with_multiple_csvs.read_bytes()).hexdigest()
+        assert extracted_dir(tmp_path / "cache", sha256).exists() == kept
+        assert not manager.cached_dirs
+        manager.remove_temp_dir()
+
+    @pytest.mark.asyncio
+    async def test_extract_fails_without_free_space(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_progress,
+        database_config,
+        temp_zip_with_csv,
+        tmp_path,
+    ):
+        """Test that an archive that does not fit on disk is not extracted."""
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+        )
+
+        await manager.extract_queue.put(temp_zip_with_csv)
+        await manager.extract_queue.put(None)
+        with patch("zensus2pgsql.commands.create.shutil.disk_usage") as mock_disk_usage:
+            mock_disk_usage.return_value.free = 10
+            await manager.extract_worker()
+
+        assert manager.failed == 1
+        assert "Not enough free space" in manager.errors[0]
+        assert manager.database_queue.empty()
+        manager.remove_temp_dir()
+
+    def test_preflight_checks_cached_archives(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_progress,
+        database_config,
+        temp_zip_with_csv,
+        tmp_path,
+    ):
+        """Test that the space check uses the sizes in the archives' central directories."""
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+        )
+        with zipfile.ZipFile(temp_zip_with_csv) as archive:
+            size = sum(info.file_size for info in archive.infolist())
+        assert manager.space_needed(temp_zip_with_csv) == size
+
+        with patch("zensus2pgsql.commands.create.shutil.disk_usage") as mock_disk_usage:
+            mock_disk_usage.return_value.free = size - 1
+            with pytest.raises(Zensus2PgsqlError, match="largest dataset"):
+                manager.check_extract_space([temp_zip_with_csv])
+
+            mock_disk_usage.return_value.free = size
+            manager.check_extract_space([temp_zip_with_csv])
+        manager.remove_temp_dir()
+
+    @pytest.mark.asyncio
+    async def test_extract_multiple_csvs(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_progress,
+        database_config,
+        temp_zip_with_multiple_csvs,
+    ):
+        """Test extracting a ZIP with multiple CSVs."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.extract_queue.put(temp_zip_with_multiple_csvs)
+            await manager.extract_queue.put(None)
+
+            await manager.extract_worker()
+
+            # Should find 2 CSV files
+            assert manager.database_task_total == 2
+
+    @pytest.mark.asyncio
+    async def test_extract_no_matching_csv(
+        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config, temp_zip_no_csv
+    ):
+        """Test extracting a ZIP with no matching CSV files."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.extract_queue.put(temp_zip_no_csv)
+            await manager.extract_queue.put(None)
+
+            await manager.extract_worker()
+
+            # No CSVs should be queued
+            assert manager.database_task_total == 0
+
+    @pytest.mark.asyncio
+    async def test_extract_empty_zip(
+        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config, temp_empty_zip
+    ):
+        """Test extracting an empty ZIP file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.extract_queue.put(temp_empty_zip)
+            await manager.extract_queue.put(None)
+
+            await manager.extract_worker()
+
+            assert manager.database_task_total == 0
+
+    @pytest.mark.asyncio
+    async def test_sentinel_shutdown(
+        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config
+    ):
+        """Test that worker shuts down on receiving sentinel."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.extract_queue.put(None)
+
+            await asyncio.wait_for(manager.extract_worker(), timeout=5.0)
+
+    @pytest.mark.asyncio
+    async def test_corrupt_zip_is_quarantined(
+        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config, tmp_path
+    ):
+        """Test that a corrupt archive fails its import and is moved out of the cache."""
+        corrupt_zip = tmp_path / "test.zip"
+        corrupt_zip.write_bytes(b"PK\x03\x04 truncated")
+
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+        )
+        manager.manifest.set("test.zip", CacheEntry("https://example.com/test.zip"))
+
+        await manager.extract_queue.put(corrupt_zip)
+        await manager.extract_queue.put(None)
+
+        await asyncio.wait_for(manager.extract_worker(), timeout=5.0)
+
+        assert manager.failed == 1
+        assert manager.database_task_total == 0
+        assert not corrupt_zip.exists()
+        assert len(list((tmp_path / "quarantine").iterdir())) == 1
+        assert CacheManifest.load(tmp_path).get("test.zip") is None
+        manager.remove_temp_dir()
+
+
+class TestStreamingFromZip:
+    """Tests for reading CSV files straight out of zip archives (stream=True)."""
+
+    @pytest.mark.asyncio
+    async def test_extract_worker_queues_members_without_extracting(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_progress,
+        database_config,
+        temp_zip_with_multiple_csvs,
+    ):
+        """Test that stream mode queues zip members and writes nothing to the temp dir."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+                stream=True,
+            )
+
+            await manager.extract_queue.put(temp_zip_with_multiple_csvs)
+            await manager.extract_queue.put(None)
+
+            await manager.extract_worker()
+
+            queued = [manager.database_queue.get_nowait() for _ in range(2)]
+            assert queued == [
+                ZipMember(temp_zip_with_multiple_csvs, "Zensus2022_Data1_Gitter.csv"),
+                ZipMember(temp_zip_with_multiple_csvs, "Zensus2022_Data2_Gitter.csv"),
+            ]
+            assert list(Path(manager.temp_dir.name).iterdir()) == []
+            manager.remove_temp_dir()
+
+    @pytest.mark.asyncio
+    async def test_staged_load_copies_member_stream(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config,
+        temp_zip_with_csv,
+        sample_csv_content,
+    ):
+        """Test that COPY reads the decompressed member from a file-like object."""
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
+        copied = []
+
+        async def read_source(table_name, source, **kwargs):
+            copied.append(source.read())
+
+        mock_asyncpg_connection.copy_to_table = AsyncMock(side_effect=read_source)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+                stream=True,
+            )
+
+            await manager.database_queue.put(
+                ZipMember(temp_zip_with_csv, "Zensus2022_TestData_Gitter.csv")
+            )
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+        assert copied == [sample_csv_content.encode("utf-8")]
+        copy_call = mock_asyncpg_connection.copy_to_table.call_args
+        assert copy_call.args[0] == "testdata_temp"
+        assert copy_call.kwargs["encoding"] == "UTF8"
+
+    @pytest.mark.asyncio
+    async def test_direct_load_reads_member(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config_direct,
+        temp_zip_with_csv,
+    ):
+        """Test that the direct load mode converts rows read from a zip member."""
+        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=[False, "public"])
+        copied = []
+
+        async def consume_records(table_name, records, columns, schema_name):
+            async for record in records:
+                copied.append(record)
+
+        mock_asyncpg_connection.copy_records_to_table = AsyncMock(side_effect=consume_records)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config_direct,
+                stream=True,
+            )
+
+            await manager.database_queue.put(
+                ZipMember(temp_zip_with_csv, "Zensus2022_TestData_Gitter.csv")
+            )
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+        assert len(copied) == 3
+        assert copied[0][:3] == ("100mN26680E43341", 42, 35)
+
+
+class PartsPool(MockAsyncpgPool):
+    """Mock pool handing out a new connection for every acquire."""
+
+    def __init__(self, connection, copy_result=None, failing_commit=None):
+        super().__init__(connection)
+        self.part_connections = []
+        self.copy_result = copy_result
+        # Index of the connection whose transaction fails to commit
+        self.failing_commit = failing_commit
+
+    def acquire(self):
+        conn = MockAsyncpgConnection()
+        conn.copied = b""
+
+        async def read_source(table_name, source, **kwargs):
+            conn.copied = source.read()
+            if self.copy_result is not None:
+                return self.copy_result(len(self.part_connections), conn)
+            lines = conn.copied.count(b"\n")
+            return f"COPY {lines}"
+
+        conn.copy_to_table = AsyncMock(side_effect=read_source)
+        if len(self.part_connections) == self.failing_commit:
+            conn.transaction = self.failing_transaction(conn)
+        self.part_connections.append(conn)
+        return MockPoolAcquireContext(conn)
+
+    @staticmethod
+    def failing_transaction(conn):
+        """`conn.transaction` returning transactions whose commit fails"""
+        start_transaction = conn.transaction
+
+        def transaction():
+            started = start_transaction()
+
+            async def commit():
+                raise asyncpg.InterfaceError("connection lost")
+
+            started.commit = commit
+            return started
+
+        return transaction
+
+
+class TestCopyInParts:
+    """Tests for COPYing a large CSV file in parts over several connections."""
+
+    @pytest.fixture
+    def large_csv(self, tmp_path):
+        """A CSV file with a header and 100 rows."""
+        path = tmp_path / "Zensus2022_Large_Gitter.csv"
+        lines = [f"100mN{idx};{4000050 + idx};2650050;{idx}\n" for idx in range(100)]
+        path.write_text("GITTER_ID_100m;x_mp_100m;y_mp_100m;Einwohner\n" + "".join(lines))
+        return path
+
+    def test_line_ranges_cover_all_rows(self, large_csv):
+        """Test that the ranges split the rows after the header at line breaks."""
+        body = large_csv.read_bytes()
+        header_end = body.index(b"\n") + 1
+
+        ranges = line_ranges(large_csv, 3)
+
+        assert len(ranges) == 3
+        assert ranges[0][0] == header_end
+        assert ranges[-1][1] == len(body)
+        assert all(body[end - 1 : end] == b"\n" for _, end in ranges)
+        parts = []
+        for start, end in ranges:
+            with FileRange(large_csv, start, end) as part:
+                parts.append(part.read(7) + part.read())
+        assert b"".join(parts) == body[header_end:]
+
+    def test_line_ranges_of_small_file(self, tmp_path):
+        """Test that a file with fewer rows than parts has no empty ranges."""
+        path = tmp_path / "small.csv"
+        path.write_bytes(b"a;b\n1;2\n")
+
+        assert line_ranges(path, 4) == [(4, 8)]
+
+    @pytest.mark.asyncio
+    async def test_parts_are_copied_over_separate_connections(
+        self, mock_httpx_client, mock_asyncpg_connection, mock_progress, database_config, large_csv
+    ):
+        """Test that the parts are COPYed concurrently into an UNLOGGED staging table."""
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(4, 100, 100, 100)
+        )
+        pool = PartsPool(mock_asyncpg_connection)
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=large_csv.parent,
+            progress=mock_progress,
+            db_pool=pool,
+            db_config=database_config,
+            db_workers=1,
+            copy_parts=4,
+        )
+        manager.COPY_PART_MIN_SIZE = 1
+
+        await manager.import_csv(mock_asyncpg_connection, large_csv)
+
+        body = large_csv.read_bytes()
+        assert len(pool.part_connections) == 4
+        assert (
+            b"".join(conn.copied for conn in pool.part_connections) == body[body.index(b"\n") + 1 :]
+        )
+        assert all(
+            conn.copy_to_table.call_args.kwargs["header"] is False for conn in pool.part_connections
+        )
+        create = pool.part_connections[0].execute.call_args.args[0]
+        assert create.startswith("CREATE UNLOGGED TABLE test_schema.large_temp (")
+        assert all(conn.transactions[0].state == "committed" for conn in pool.part_connections)
+        assert manager.copy_throughput.total == 100
+        mock_asyncpg_connection.copy_to_table.assert_not_called()
+        manager.remove_temp_dir()
+
+    @pytest.mark.asyncio
+    async def test_failed_part_rolls_back_all_parts(
+        self, mock_httpx_client, mock_asyncpg_connection, mock_progress, database_config, large_csv
+    ):
+        """Test that the parts are only committed if all of them were copied."""
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
+
+        def copy_result(count, conn):
+            if conn.copied.startswith(b"100mN0;"):
+                raise ValueError("invalid row")
+            return "COPY 25"
+
+        pool = PartsPool(mock_asyncpg_connection, copy_result)
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=large_csv.parent,
+            progress=mock_progress,
+            db_pool=pool,
+            db_config=database_config,
+            db_workers=1,
+            copy_parts=4,
+        )
+        manager.COPY_PART_MIN_SIZE = 1
+
+        with pytest.raises(ValueError, match="invalid row"):
+            await manager.import_csv(mock_asyncpg_connection, large_csv)
+
+        assert all(conn.transactions[0].state == "rolled back" for conn in pool.part_connections)
+        # The staging table is not left behind
+        pool.part_connections[0].execute.assert_called_with(
+            "DROP TABLE IF EXISTS test_schema.large_temp;"
+        )
+        manager.remove_temp_dir()
+
+    @pytest.mark.asyncio
+    async def test_failed_commit_drops_the_committed_parts(
+        self, mock_httpx_client, mock_asyncpg_connection, mock_progress, database_config, large_csv
+    ):
+        """Test that parts committed before a failed commit are dropped with the table."""
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
+        pool = PartsPool(mock_asyncpg_connection, failing_commit=1)
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=large_csv.parent,
+            progress=mock_progress,
+            db_pool=pool,
+            db_config=database_config,
+            db_workers=1,
+            copy_parts=4,
+        )
+        manager.COPY_PART_MIN_SIZE = 1
+
+        with pytest.raises(asyncpg.InterfaceError, match="connection lost"):
+            await manager.import_csv(mock_asyncpg_connection, large_csv)
+
+        states = [conn.transactions[0].state for conn in pool.part_connections]
+        assert states == ["committed", "started", "rolled back", "rolled back"]
+        pool.part_connections[0].execute.assert_called_with(
+            "DROP TABLE IF EXISTS test_schema.large_temp;"
+        )
+        manager.remove_temp_dir()
+
+    @pytest.mark.asyncio
+    async def test_header_only_file_is_copied_over_one_connection(
+        self, mock_httpx_client, mock_asyncpg_connection, mock_progress, database_config, tmp_path
+    ):
+        """Test that a file without rows to split is COPYed on the worker's connection."""
+        csv_file = tmp_path / "Zensus2022_Empty_Gitter.csv"
+        csv_file.write_text("GITTER_ID_100m;x_mp_100m;y_mp_100m;Einwohner\n")
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
+        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=type_detection_row(4, 0, 0, 0))
+        pool = PartsPool(mock_asyncpg_connection)
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=pool,
+            db_config=database_config,
+            db_workers=1,
+            copy_parts=4,
+        )
+        manager.COPY_PART_MIN_SIZE = 1
+
+        await manager.import_csv(mock_asyncpg_connection, csv_file)
+
+        assert pool.part_connections == []
+        mock_asyncpg_connection.copy_to_table.assert_called_once()
+        manager.remove_temp_dir()
+
+    def test_parts_are_limited_by_spare_connections(
+        self, mock_httpx_client, mock_asyncpg_connection, mock_progress, database_config, large_csv
+    ):
+        """Test that a file is only split into as many parts as there are spare connections."""
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=large_csv.parent,
+            progress=mock_progress,
+            db_pool=MockAsyncpgPool(mock_asyncpg_connection, max_size=6),
+            db_config=database_config,
+            db_workers=4,
+            copy_parts=8,
+        )
+        manager.COPY_PART_MIN_SIZE = 1
+
+        assert manager.copy_parts_for(large_csv) == 2
+        assert manager.copy_parts_for(ZipMember(large_csv, "member.csv")) == 1
+        manager.COPY_PART_MIN_SIZE = large_csv.stat().st_size
+        assert manager.copy_parts_for(large_csv) == 1
+        manager.remove_temp_dir()
+
+
+class TestCopyThroughput:
+    """Tests for counting copied rows while COPY is running."""
+
+    @pytest.mark.asyncio
+    async def test_staged_rows_are_counted_while_copying(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config,
+        temp_csv_file,
+    ):
+        """Test that rows are counted per chunk read and corrected to the COPY status."""
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
+        seen = []
+
+        async def read_source(table_name, source, **kwargs):
+            while source.read(16):
+                seen.append(manager.copy_throughput.total)
+            return "COPY 3"
+
+        mock_asyncpg_connection.copy_to_table = AsyncMock(side_effect=read_source)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.database_queue.put(temp_csv_file)
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+        assert 0 < seen[len(seen) // 2] < seen[-1]
+        assert manager.copy_throughput.total == 3
+
+    @pytest.mark.asyncio
+    async def test_direct_rows_are_counted_per_batch(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config_direct,
+        temp_csv_file,
+    ):
+        """Test that rows are counted as each batch of records is consumed."""
+        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=[False, "public"])
+        seen = []
+
+        async def consume_records(table_name, records, columns, schema_name):
+            async for _ in records:
+                seen.append(manager.copy_throughput.total)
+            return "COPY 3"
+
+        mock_asyncpg_connection.copy_records_to_table = AsyncMock(side_effect=consume_records)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config_direct,
+            )
+            manager.COPY_BATCH_SIZE = 1
+
+            await manager.database_queue.put(temp_csv_file)
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+        assert seen == [0, 1, 2]
+        assert manager.copy_throughput.total == 3
+
+
+# =============================================================================
+# DATABASE WORKER TESTS
+# =============================================================================
+
+
+class TestDatabaseWorker:
+    """Tests for FetchManager.database_worker method."""
+
+    @pytest.mark.asyncio
+    async def test_import_csv_success(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config,
+        temp_csv_file,
+    ):
+        """Test successful CSV import."""
+        # Setup mock connection - table doesn't exist
+        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=[False])
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )  # All integers
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.database_queue.put(temp_csv_file)
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+            # Verify SQL operations were called
+            assert mock_asyncpg_connection.execute.called
+            assert mock_asyncpg_connection.copy_to_table.called
+
+    @pytest.mark.asyncio
+    async def test_skip_existing_table_no_drop(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config,
+        temp_csv_file,
+    ):
+        """Test skipping existing table when drop_existing=False."""
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=True)  # Table exists
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,  # drop_existing=False
+            )
+
+            await manager.database_queue.put(temp_csv_file)
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
             # copy_to_table should NOT be called since we skip
             # Note: The table existence check happens within transaction
             # so this tests the continue path
 
     @pytest.mark.asyncio
-    async def test_drop_existing_table(
+    async def test_drop_existing_table(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config_drop_existing,
+        temp_csv_file,
+    ):
+        """Test dropping existing table when drop_existing=True."""
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=True)  # Table exists
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config_drop_existing,
+            )
+
+            await manager.database_queue.put(temp_csv_file)
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+            # Should have called execute with DROP TABLE
+            drop_calls = [
+                call
+                for call in mock_asyncpg_connection.execute.call_args_list
+                if "DROP TABLE" in str(call)
+            ]
+            assert len(drop_calls) > 0
+
+    @pytest.mark.asyncio
+    async def test_geometry_column_created(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config,
+        temp_csv_file,
+    ):
+        """Test that geometry column is created when coordinates present."""
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.database_queue.put(temp_csv_file)
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+            # Check for geometry-related SQL
+            execute_calls = [str(call) for call in mock_asyncpg_connection.execute.call_args_list]
+            has_geometry = any(
+                "GEOMETRY" in call or "ST_MakePoint" in call for call in execute_calls
+            )
+            has_gist_index = any("GIST" in call for call in execute_calls)
+
+            # The CSV file has x_mp and y_mp columns, so geometry should be created
+            assert has_geometry or has_gist_index
+
+    @pytest.mark.asyncio
+    async def test_no_geometry_without_coords(
         self,
         mock_httpx_client,
         mock_asyncpg_pool,
         mock_asyncpg_connection,
         mock_progress,
-        database_config_drop_existing,
+        database_config,
+        sample_csv_content_no_coords,
+    ):
+        """Test that no geometry is created without coordinate columns."""
+        # Create temp CSV without coordinates
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix="_Gitter.csv", delete=False, encoding="utf-8"
+        ) as f:
+            f.write(sample_csv_content_no_coords)
+            csv_path = Path(f.name)
+
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.database_queue.put(csv_path)
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+            # Check that no GIST index was created (no geometry)
+            execute_calls = [str(call) for call in mock_asyncpg_connection.execute.call_args_list]
+            has_gist = any("GIST" in call for call in execute_calls)
+            # Without coordinates, no GIST index should be created
+            assert not has_gist
+
+    @pytest.mark.asyncio
+    async def test_custom_srid_used(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config_custom_srid,
         temp_csv_file,
     ):
-        """Test dropping existing table when drop_existing=True."""
-        mock_asyncpg_connection.fetchval = AsyncMock(return_value=True)  # Table exists
-        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
+        """Test that custom SRID is used in geometry creation."""
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -809,7 +1646,7 @@ class TestDatabaseWorker:
                 output_folder=Path(tmpdir),
                 progress=mock_progress,
                 db_pool=mock_asyncpg_pool,
-                db_config=database_config_drop_existing,
+                db_config=database_config_custom_srid,  # SRID=4326
             )
 
             await manager.database_queue.put(temp_csv_file)
@@ -817,16 +1654,13 @@ class TestDatabaseWorker:
 
             await manager.database_worker()
 
-            # Should have called execute with DROP TABLE
-            drop_calls = [
-                call
-                for call in mock_asyncpg_connection.execute.call_args_list
-                if "DROP TABLE" in str(call)
-            ]
-            assert len(drop_calls) > 0
+            # Check for custom SRID in SQL
+            execute_calls = [str(call) for call in mock_asyncpg_connection.execute.call_args_list]
+            has_custom_srid = any("4326" in call for call in execute_calls)
+            assert has_custom_srid
 
     @pytest.mark.asyncio
-    async def test_geometry_column_created(
+    async def test_error_handling(
         self,
         mock_httpx_client,
         mock_asyncpg_pool,
@@ -835,9 +1669,237 @@ class TestDatabaseWorker:
         database_config,
         temp_csv_file,
     ):
-        """Test that geometry column is created when coordinates present."""
+        """Test that errors during import are caught and logged."""
+        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=Exception("Database error"))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.database_queue.put(temp_csv_file)
+            await manager.database_queue.put(None)
+
+            # Should not raise - error is caught
+            await manager.database_worker()
+
+    @pytest.mark.asyncio
+    async def test_sentinel_shutdown(
+        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config
+    ):
+        """Test that worker shuts down on receiving sentinel."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.database_queue.put(None)
+
+            await asyncio.wait_for(manager.database_worker(), timeout=5.0)
+
+    @pytest.mark.asyncio
+    async def test_text_column_detection(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config,
+        sample_csv_content_text_column,
+    ):
+        """Test that text columns are correctly detected."""
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix="_Gitter.csv", delete=False, encoding="utf-8"
+        ) as f:
+            f.write(sample_csv_content_text_column)
+            csv_path = Path(f.name)
+
+        # Return values indicating TEXT type (not all values are numeric)
+        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 0, 0)
+        )  # TEXT
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.database_queue.put(csv_path)
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+    @pytest.mark.asyncio
+    async def test_double_precision_column_detection(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config,
+        sample_csv_content_german_decimals,
+    ):
+        """Test that decimal columns are correctly detected."""
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix="_Gitter.csv", delete=False, encoding="utf-8"
+        ) as f:
+            f.write(sample_csv_content_german_decimals)
+            csv_path = Path(f.name)
+
         mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
-        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
+        # non_empty=100, integer_count=50, numeric_count=100 -> DOUBLE PRECISION
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 50, 100)
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+            )
+
+            await manager.database_queue.put(csv_path)
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+
+class TestDatabaseWorkerDirectLoad:
+    """Tests for FetchManager.database_worker with LoadMode.direct."""
+
+    @pytest.mark.asyncio
+    async def test_copies_typed_records_to_final_table(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config_direct,
+        temp_csv_file,
+    ):
+        """Test that rows are converted client-side and COPYed into the final table."""
+        # Table doesn't exist, geometry type lives in "public"
+        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=[False, "public"])
+        copied = []
+
+        async def consume_records(table_name, records, columns, schema_name):
+            async for record in records:
+                copied.append(record)
+            return f"COPY {len(copied)}"
+
+        mock_asyncpg_connection.copy_records_to_table = AsyncMock(side_effect=consume_records)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config_direct,
+            )
+
+            await manager.database_queue.put(temp_csv_file)
+            await manager.database_queue.put(None)
+
+            await manager.database_worker()
+
+        # No staging table and no server-side conversion
+        mock_asyncpg_connection.copy_to_table.assert_not_called()
+        execute_calls = [str(call) for call in mock_asyncpg_connection.execute.call_args_list]
+        assert not any("INSERT INTO" in call for call in execute_calls)
+        assert any(
+            "gitter_id_100m TEXT, einwohner INTEGER, alter INTEGER, geom GEOMETRY(Point, 3035)"
+            in call
+            for call in execute_calls
+        )
+
+        copy_call = mock_asyncpg_connection.copy_records_to_table.call_args
+        assert copy_call.kwargs["columns"] == ["gitter_id_100m", "einwohner", "alter", "geom"]
+        assert copy_call.kwargs["schema_name"] == "test_schema"
+        assert copied[0] == (
+            "100mN26680E43341",
+            42,
+            35,
+            encode_point_ewkb(4334150.0, 2668050.0, 3035),
+        )
+        assert copied[2][1] is None
+        mock_asyncpg_connection.set_type_codec.assert_called_once()
+
+
+class TestFastLoad:
+    """Tests for the --fast-load profile, UNLOGGED tables and the WAL report."""
+
+    @pytest.mark.asyncio
+    async def test_fast_load_stages_unlogged_without_synchronous_commit(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config,
+        temp_csv_file,
+    ):
+        """Test that the staging table is UNLOGGED and commits are not waited for."""
+        # WAL position, table doesn't exist, WAL position after the import
+        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=["0/1000", False, "0/3800"])
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config._replace(fast_load=True),
+            )
+            await manager.import_csv(mock_asyncpg_connection, temp_csv_file)
+
+        execute_calls = [call.args[0] for call in mock_asyncpg_connection.execute.call_args_list]
+        assert "SET LOCAL synchronous_commit = off;" in execute_calls
+        # Index builds get more memory
+        assert manager.index_memory == FAST_LOAD_MAINTENANCE_WORK_MEM
+        assert any(call.startswith("CREATE UNLOGGED TABLE test_schema.") for call in execute_calls)
+        # Only the staging table is UNLOGGED
+        assert not any("SET LOGGED" in call for call in execute_calls)
+        assert manager.wal_bytes == {
+            f"test_schema.{sanitize_table_name(temp_csv_file.stem)}": 0x2800
+        }
+        assert (manager.wal_start, manager.wal_end) == (0x1000, 0x3800)
+
+    @pytest.mark.asyncio
+    async def test_unlogged_tables_are_set_logged_once_loaded(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config,
+        temp_csv_file,
+    ):
+        """Test that the final table is created UNLOGGED and switched to LOGGED."""
+        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=[False])
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
+        table_name = f"test_schema.{sanitize_table_name(temp_csv_file.stem)}"
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -845,44 +1907,58 @@ class TestDatabaseWorker:
                 output_folder=Path(tmpdir),
                 progress=mock_progress,
                 db_pool=mock_asyncpg_pool,
-                db_config=database_config,
+                db_config=database_config._replace(unlogged_tables=True),
             )
+            await manager.import_csv(mock_asyncpg_connection, temp_csv_file)
 
-            await manager.database_queue.put(temp_csv_file)
-            await manager.database_queue.put(None)
-
-            await manager.database_worker()
+        execute_calls = [call.args[0] for call in mock_asyncpg_connection.execute.call_args_list]
+        assert any(
+            call.startswith(f"CREATE UNLOGGED TABLE {table_name} (") for call in execute_calls
+        )
+        assert f"ALTER TABLE {table_name} SET LOGGED;" in execute_calls
+        assert not any("synchronous_commit" in call for call in execute_calls)
+        # The WAL is not measured unless asked for
+        assert manager.wal_bytes == {}
 
-            # Check for geometry-related SQL
-            execute_calls = [str(call) for call in mock_asyncpg_connection.execute.call_args_list]
-            has_geometry = any(
-                "GEOMETRY" in call or "ST_MakePoint" in call for call in execute_calls
+    def test_wal_summary(self, mock_httpx_client, mock_progress, database_config, capsys):
+        """Test that the summary shows the WAL of the run and of each import."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=None,
+                db_config=database_config._replace(report_wal=True),
             )
-            has_gist_index = any("GIST" in call for call in execute_calls)
+            manager.record_wal("test_schema.a", 0, 3 * 2**20)
+            manager.record_wal("test_schema.b", 2**20, 5 * 2**20)
 
-            # The CSV file has x_mp and y_mp columns, so geometry should be created
-            assert has_geometry or has_gist_index
+            print_download_summary(manager, None)
+
+        output = capsys.readouterr().out
+        assert "WAL written: 5.0 MiB" in output
+        assert "test_schema.a: 3.0 MiB" in output
+        assert "test_schema.b: 4.0 MiB" in output
+
+
+class TestBuildIndexes:
+    """Tests for the spatial index phase after the load stage."""
 
     @pytest.mark.asyncio
-    async def test_no_geometry_without_coords(
+    async def test_import_defers_the_index_build(
         self,
         mock_httpx_client,
         mock_asyncpg_pool,
         mock_asyncpg_connection,
         mock_progress,
         database_config,
-        sample_csv_content_no_coords,
+        temp_csv_file,
     ):
-        """Test that no geometry is created without coordinate columns."""
-        # Create temp CSV without coordinates
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix="_Gitter.csv", delete=False, encoding="utf-8"
-        ) as f:
-            f.write(sample_csv_content_no_coords)
-            csv_path = Path(f.name)
-
-        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
-        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
+        """Test that importing a file with coordinates only queues its index."""
+        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=[False])
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -892,31 +1968,34 @@ class TestDatabaseWorker:
                 db_pool=mock_asyncpg_pool,
                 db_config=database_config,
             )
+            await manager.import_csv(mock_asyncpg_connection, temp_csv_file)
 
-            await manager.database_queue.put(csv_path)
-            await manager.database_queue.put(None)
-
-            await manager.database_worker()
-
-            # Check that no GIST index was created (no geometry)
-            execute_calls = [str(call) for call in mock_asyncpg_connection.execute.call_args_list]
-            has_gist = any("GIST" in call for call in execute_calls)
-            # Without coordinates, no GIST index should be created
-            assert not has_gist
+        execute_calls = [call.args[0] for call in mock_asyncpg_connection.execute.call_args_list]
+        assert not any("GIST" in call for call in execute_calls)
+        assert manager.pending_indexes == [f"test_schema.{sanitize_table_name(temp_csv_file.stem)}"]
 
     @pytest.mark.asyncio
-    async def test_custom_srid_used(
+    async def test_indexes_are_built_concurrently(
         self,
         mock_httpx_client,
         mock_asyncpg_pool,
         mock_asyncpg_connection,
         mock_progress,
-        database_config_custom_srid,
-        temp_csv_file,
+        database_config,
     ):
-        """Test that custom SRID is used in geometry creation."""
-        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
-        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
+        """Test that index builds run `index_workers` at a time with their own memory."""
+        running = 0
+        most_running = 0
+
+        async def execute(query, *args):
+            nonlocal running, most_running
+            if "CREATE INDEX" in query:
+                running += 1
+                most_running = max(most_running, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        mock_asyncpg_connection.execute = AsyncMock(side_effect=execute)
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -924,31 +2003,48 @@ class TestDatabaseWorker:
                 output_folder=Path(tmpdir),
                 progress=mock_progress,
                 db_pool=mock_asyncpg_pool,
-                db_config=database_config_custom_srid,  # SRID=4326
+                db_config=database_config,
+                index_workers=2,
+                index_memory="256MB",
             )
-
-            await manager.database_queue.put(temp_csv_file)
-            await manager.database_queue.put(None)
-
-            await manager.database_worker()
-
-            # Check for custom SRID in SQL
-            execute_calls = [str(call) for call in mock_asyncpg_connection.execute.call_args_list]
-            has_custom_srid = any("4326" in call for call in execute_calls)
-            assert has_custom_srid
+            manager.pending_indexes = ["test_schema.a", "test_schema.b", "test_schema.c"]
+
+            await manager.build_indexes()
+
+        assert most_running == 2
+        assert manager.pending_indexes == []
+        assert list(manager.index_times) == ["test_schema.a", "test_schema.b", "test_schema.c"]
+        assert manager.index_elapsed is not None
+        execute_calls = mock_asyncpg_connection.execute.call_args_list
+        assert (
+            execute_calls.count(
+                call("SELECT set_config('maintenance_work_mem', $1, true);", "256MB")
+            )
+            == 3
+        )
+        assert (
+            call("CREATE INDEX IF NOT EXISTS b_geom_idx ON test_schema.b USING GIST (geom);")
+            in execute_calls
+        )
+        # Every build runs in its own transaction
+        assert len(mock_asyncpg_connection.transactions) == 3
 
     @pytest.mark.asyncio
-    async def test_error_handling(
+    async def test_failed_index_build_does_not_stop_the_others(
         self,
         mock_httpx_client,
         mock_asyncpg_pool,
         mock_asyncpg_connection,
         mock_progress,
         database_config,
-        temp_csv_file,
     ):
-        """Test that errors during import are caught and logged."""
-        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=Exception("Database error"))
+        """Test that a failed build is logged and the other indexes are still built."""
+
+        async def execute(query, *args):
+            if "ON test_schema.a " in query:
+                raise asyncpg.PostgresError("out of memory")
+
+        mock_asyncpg_connection.execute = AsyncMock(side_effect=execute)
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -958,51 +2054,63 @@ class TestDatabaseWorker:
                 db_pool=mock_asyncpg_pool,
                 db_config=database_config,
             )
+            manager.pending_indexes = ["test_schema.a", "test_schema.b"]
 
-            await manager.database_queue.put(temp_csv_file)
-            await manager.database_queue.put(None)
+            await manager.build_indexes()
 
-            # Should not raise - error is caught
-            await manager.database_worker()
+        assert list(manager.index_times) == ["test_schema.b"]
+        assert manager.index_errors == {"test_schema.a": "out of memory"}
+        # No memory setting unless asked for
+        assert not any(
+            "maintenance_work_mem" in c.args[0]
+            for c in mock_asyncpg_connection.execute.call_args_list
+        )
 
     @pytest.mark.asyncio
-    async def test_sentinel_shutdown(
-        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config
+    @pytest.mark.parametrize(
+        ("spatial_index", "method"),
+        [(SpatialIndex.gist, "GIST"), (SpatialIndex.spgist, "SPGIST"), (SpatialIndex.brin, "BRIN")],
+    )
+    async def test_index_method(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_asyncpg_connection,
+        mock_progress,
+        database_config,
+        spatial_index,
+        method,
     ):
-        """Test that worker shuts down on receiving sentinel."""
+        """Test that the index is built with the chosen access method."""
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
                 client=mock_httpx_client,
                 output_folder=Path(tmpdir),
                 progress=mock_progress,
                 db_pool=mock_asyncpg_pool,
-                db_config=database_config,
+                db_config=database_config._replace(spatial_index=spatial_index),
             )
+            await manager.build_index(mock_asyncpg_connection, "test_schema.a")
 
-            await manager.database_queue.put(None)
-
-            await asyncio.wait_for(manager.database_worker(), timeout=5.0)
+        mock_asyncpg_connection.execute.assert_called_once_with(
+            f"CREATE INDEX IF NOT EXISTS a_geom_idx ON test_schema.a USING {method} (geom);"
+        )
 
     @pytest.mark.asyncio
-    async def test_text_column_detection(
+    async def test_no_index(
         self,
         mock_httpx_client,
         mock_asyncpg_pool,
         mock_asyncpg_connection,
         mock_progress,
         database_config,
-        sample_csv_content_text_column,
+        temp_csv_file,
     ):
-        """Test that text columns are correctly detected."""
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix="_Gitter.csv", delete=False, encoding="utf-8"
-        ) as f:
-            f.write(sample_csv_content_text_column)
-            csv_path = Path(f.name)
-
-        # Return values indicating TEXT type (not all values are numeric)
-        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
-        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=(100, 100, 0, 0))  # TEXT
+        """Test that no index is queued with --index none."""
+        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=[False])
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -1010,34 +2118,28 @@ class TestDatabaseWorker:
                 output_folder=Path(tmpdir),
                 progress=mock_progress,
                 db_pool=mock_asyncpg_pool,
-                db_config=database_config,
+                db_config=database_config._replace(spatial_index=SpatialIndex.none),
             )
+            await manager.import_csv(mock_asyncpg_connection, temp_csv_file)
 
-            await manager.database_queue.put(csv_path)
-            await manager.database_queue.put(None)
-
-            await manager.database_worker()
+        assert manager.pending_indexes == []
 
     @pytest.mark.asyncio
-    async def test_double_precision_column_detection(
+    @pytest.mark.parametrize("has_index", [False, True])
+    async def test_existing_table_gets_missing_index(
         self,
         mock_httpx_client,
         mock_asyncpg_pool,
         mock_asyncpg_connection,
         mock_progress,
         database_config,
-        sample_csv_content_german_decimals,
+        temp_csv_file,
+        has_index,
     ):
-        """Test that decimal columns are correctly detected."""
-        with tempfile.NamedTemporaryFile(
-            mode="w", suffix="_Gitter.csv", delete=False, encoding="utf-8"
-        ) as f:
-            f.write(sample_csv_content_german_decimals)
-            csv_path = Path(f.name)
-
-        mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
-        # non_empty=100, integer_count=50, numeric_count=100 -> DOUBLE PRECISION
-        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=(100, 100, 50, 100))
+        """Test that a skipped table is indexed if an earlier run did not build its index."""
+        # Table exists, then whether its index exists
+        mock_asyncpg_connection.fetchval = AsyncMock(side_effect=[True, has_index])
+        table_name = f"test_schema.{sanitize_table_name(temp_csv_file.stem)}"
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -1045,13 +2147,43 @@ class TestDatabaseWorker:
                 output_folder=Path(tmpdir),
                 progress=mock_progress,
                 db_pool=mock_asyncpg_pool,
+                db_config=database_config,  # drop_existing=False
+            )
+            await manager.import_csv(mock_asyncpg_connection, temp_csv_file)
+            assert manager.pending_indexes == [table_name]
+
+            await manager.build_indexes()
+
+        mock_asyncpg_connection.copy_to_table.assert_not_called()
+        index_builds = [
+            c.args[0]
+            for c in mock_asyncpg_connection.execute.call_args_list
+            if "CREATE INDEX" in c.args[0]
+        ]
+        assert len(index_builds) == (0 if has_index else 1)
+        assert list(manager.index_times) == ([] if has_index else [table_name])
+
+    def test_index_summary(self, mock_httpx_client, mock_progress, database_config, capsys):
+        """Test that the summary shows how long each index build took and which failed."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=None,
                 db_config=database_config,
+                index_workers=3,
             )
+            manager.index_times = {"test_schema.a": 12.34, "test_schema.b": 1.0}
+            manager.index_errors = {"test_schema.c": "out of memory"}
+            manager.index_elapsed = 12.5
 
-            await manager.database_queue.put(csv_path)
-            await manager.database_queue.put(None)
+            print_download_summary(manager, None)
 
-            await manager.database_worker()
+        output = capsys.readouterr().out
+        assert "Index builds (3 at a time, 12.5s):" in output
+        assert "test_schema.a: 12.3s" in output
+        assert "✗ test_schema.c: out of memory" in output
 
 
 # =============================================================================
@@ -1059,6 +2191,43 @@ class TestDatabaseWorker:
 # =============================================================================
 
 
+class TestDatasetTimes:
+    """Tests for recording how long each dataset took."""
+
+    @pytest.mark.asyncio
+    async def test_dataset_finishes_with_its_last_csv_file(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_progress,
+        database_config,
+        temp_zip_with_multiple_csvs,
+        tmp_path,
+    ):
+        """Test that a dataset is finished once all its CSV files are imported."""
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+        )
+        name = temp_zip_with_multiple_csvs.name
+        manager.dataset_times.start(name)
+
+        await manager.extract_queue.put(temp_zip_with_multiple_csvs)
+        await manager.extract_queue.put(None)
+        await manager.extract_worker()
+        assert manager.dataset_times.pending == {name: 2}
+
+        await manager.database_queue.put(None)
+        await manager.database_worker()
+
+        assert name in manager.dataset_times.finished
+        assert not manager.csv_datasets
+        manager.remove_temp_dir()
+
+
 class TestCoordinator:
     """Tests for FetchManager.coordinator method."""
 
@@ -1075,6 +2244,7 @@ class TestCoordinator:
                 db_pool=mock_asyncpg_pool,
                 db_config=database_config,
                 num_workers=3,
+                extract_workers=1,
             )
 
             # Start workers that will consume sentinels
@@ -1107,6 +2277,73 @@ class TestCoordinator:
                 manager.coordinator(),
             )
 
+    @pytest.mark.asyncio
+    async def test_sends_extract_sentinels(
+        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config
+    ):
+        """Test that coordinator stops every extract worker."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+                num_workers=1,
+                extract_workers=3,
+            )
+
+            async def mock_worker(queue):
+                while True:
+                    item = await queue.get()
+                    queue.task_done()
+                    if item is None:
+                        break
+
+            await asyncio.wait_for(
+                asyncio.gather(
+                    mock_worker(manager.fetch_queue),
+                    *[mock_worker(manager.extract_queue) for _ in range(3)],
+                    mock_worker(manager.database_queue),
+                    manager.coordinator(),
+                ),
+                timeout=5,
+            )
+
+    @pytest.mark.asyncio
+    async def test_sends_database_sentinels(
+        self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config
+    ):
+        """Test that coordinator stops every database worker when there are more of them."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manager = FetchManager(
+                client=mock_httpx_client,
+                output_folder=Path(tmpdir),
+                progress=mock_progress,
+                db_pool=mock_asyncpg_pool,
+                db_config=database_config,
+                num_workers=1,
+                db_workers=4,
+                extract_workers=1,
+            )
+
+            async def mock_worker(queue):
+                while True:
+                    item = await queue.get()
+                    queue.task_done()
+                    if item is None:
+                        break
+
+            await asyncio.wait_for(
+                asyncio.gather(
+                    mock_worker(manager.fetch_queue),
+                    mock_worker(manager.extract_queue),
+                    *[mock_worker(manager.database_queue) for _ in range(4)],
+                    manager.coordinator(),
+                ),
+                timeout=5,
+            )
+
     @pytest.mark.asyncio
     async def test_proper_shutdown_order(
         self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config
@@ -1120,6 +2357,7 @@ class TestCoordinator:
                 db_pool=mock_asyncpg_pool,
                 db_config=database_config,
                 num_workers=2,
+                extract_workers=1,
             )
 
             shutdown_order = []
@@ -1218,6 +2456,8 @@ class TestCollectCommand:
             mock_manager.success = 3
             mock_manager.skipped = 0
             mock_manager.failed = 0
+            mock_manager.wal_start = None
+            mock_manager.index_elapsed = None
             mock_manager_class.return_value = mock_manager
 
             await collect_wrapper(["all"], skip_existing=True, db_config=database_config)
@@ -1250,6 +2490,8 @@ class TestCollectCommand:
             mock_manager.success = 1
             mock_manager.skipped = 0
             mock_manager.failed = 0
+            mock_manager.wal_start = None
+            mock_manager.index_elapsed = None
             mock_manager_class.return_value = mock_manager
 
             await collect_wrapper(["test_dataset1"], skip_existing=True, db_config=database_config)
@@ -1281,6 +2523,8 @@ class TestCollectCommand:
             mock_manager.success = 0
             mock_manager.skipped = 0
             mock_manager.failed = 0
+            mock_manager.wal_start = None
+            mock_manager.index_elapsed = None
             mock_manager_class.return_value = mock_manager
 
             with pytest.raises(Exception, match="Test error"):
@@ -1313,6 +2557,7 @@ class TestFullPipeline:
                 db_pool=mock_asyncpg_pool,
                 db_config=database_config,
                 num_workers=1,  # Use 1 worker for simpler testing
+                extract_workers=1,
             )
 
             # Mock the worker methods to track calls
@@ -1347,6 +2592,7 @@ class TestFullPipeline:
 
             async def mock_coord():
                 coordinator_called.append(True)
+                await manager.fetch_items_queued.wait()
                 for _ in range(manager.num_workers):
                     await manager.fetch_queue.put(None)
                 await manager.fetch_queue.join()
@@ -1361,6 +2607,7 @@ class TestFullPipeline:
                 patch.object(manager, "extract_worker", mock_extract),
                 patch.object(manager, "database_worker", mock_db),
                 patch.object(manager, "coordinator", mock_coord),
+                patch.object(manager, "build_indexes", AsyncMock()) as mock_build_indexes,
             ):
                 await manager.start([], ["all"])
 
@@ -1368,6 +2615,8 @@ class TestFullPipeline:
             assert len(extract_called) == 1
             assert len(db_called) == 1
             assert len(coordinator_called) == 1
+            # Indexes are built once everything is loaded
+            mock_build_indexes.assert_awaited_once()
 
     def test_remove_temp_dir(
         self, mock_httpx_client, mock_asyncpg_pool, mock_progress, database_config
@@ -1403,6 +2652,7 @@ class TestFullPipeline:
                 db_pool=mock_asyncpg_pool,
                 db_config=database_config,
                 num_workers=1,
+                extract_workers=1,
             )
 
             files_to_import = [
@@ -1434,6 +2684,7 @@ class TestFullPipeline:
                         break
 
             async def coord():
+                await manager.fetch_items_queued.wait()
                 await manager.fetch_queue.put(None)
                 await manager.fetch_queue.join()
                 await manager.extract_queue.put(None)
@@ -1451,6 +2702,57 @@ class TestFullPipeline:
                 await manager.start(files_to_import, ["all"])
 
 
+class TestBackpressure:
+    """Tests for the bounded queues between the pipeline stages."""
+
+    @pytest.mark.asyncio
+    async def test_extracted_files_in_flight_are_capped(
+        self,
+        mock_httpx_client,
+        mock_asyncpg_pool,
+        mock_progress,
+        database_config,
+        sample_csv_content,
+        tmp_path,
+    ):
+        """Test that a slow database stage keeps extraction from running far ahead."""
+        files_to_import = []
+        for idx in range(10):
+            with zipfile.ZipFile(tmp_path / f"dataset{idx}.zip", "w") as zf:
+                zf.writestr(f"Data{idx}_1km-Gitter.csv", sample_csv_content)
+                zf.writestr(f"Data{idx}_10km-Gitter.csv", sample_csv_content)
+            files_to_import.append((f"dataset{idx}", f"https://example.com/{idx}.zip"))
+
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=mock_asyncpg_pool,
+            db_config=database_config,
+            num_workers=1,
+            extract_workers=1,
+            queue_depth=1,
+        )
+
+        peak = 0
+        imported = []
+
+        async def slow_import(conn, csv_file):
+            nonlocal peak
+            peak = max(peak, len(manager.extract_dirs))
+            await asyncio.sleep(0.01)
+            imported.append(csv_file.name)
+
+        with patch.object(manager, "import_csv", slow_import):
+            await asyncio.wait_for(manager.start(files_to_import, ["all"]), timeout=10)
+        manager.remove_temp_dir()
+
+        assert len(imported) == 20
+        # One file being imported, one in the database queue and the two files of the
+        # archive the extract worker is handing over
+        assert peak <= 4
+
+
 class TestEncodingInDatabaseWorker:
     """Tests for encoding handling in database worker."""
 
@@ -1466,7 +2768,9 @@ class TestEncodingInDatabaseWorker:
     ):
         """Test that UTF-8 encoding maps to PostgreSQL UTF8."""
         mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
-        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -1501,7 +2805,9 @@ class TestEncodingInDatabaseWorker:
     ):
         """Test that ISO-8859-1 encoding maps to PostgreSQL LATIN1."""
         mock_asyncpg_connection.fetchval = AsyncMock(return_value=False)
-        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(3, 100, 100, 100)
+        )
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -1593,6 +2899,68 @@ class TestCollectCLI:
             assert captured_coro is not None
 
 
+class TestEstimateSize:
+    """Tests for FetchManager.estimate_size."""
+
+    @pytest.mark.asyncio
+    async def test_head_requests_share_the_download_concurrency(
+        self, mock_httpx_client, mock_progress, tmp_path
+    ):
+        """Test that HEAD requests are limited by the scheduler like downloads."""
+        running = 0
+        most_running = 0
+
+        async def head(url, **kwargs):
+            nonlocal running, most_running
+            running += 1
+            most_running = max(most_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            response = MockStreamResponse()
+            response.headers = httpx.Headers({"Content-Length": "1234"})
+            return response
+
+        mock_httpx_client.head = AsyncMock(side_effect=head)
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=None,
+            db_config=None,
+            scheduler=DownloadScheduler(max_concurrency=2),
+        )
+
+        sizes = await asyncio.gather(
+            *(manager.estimate_size(f"https://example.com/{i}.zip", f"{i}.zip") for i in range(6))
+        )
+
+        assert sizes == [1234] * 6
+        assert most_running == 2
+        manager.remove_temp_dir()
+
+    @pytest.mark.asyncio
+    async def test_failed_head_request_is_not_retried(
+        self, mock_httpx_client, mock_progress, tmp_path
+    ):
+        """Test that a failing HEAD request leaves the size unknown without retries."""
+        mock_httpx_client.head = AsyncMock(side_effect=httpx.ConnectError("refused"))
+        manager = FetchManager(
+            client=mock_httpx_client,
+            output_folder=tmp_path,
+            progress=mock_progress,
+            db_pool=None,
+            db_config=None,
+            scheduler=DownloadScheduler(failure_threshold=1),
+        )
+
+        assert await manager.estimate_size("https://example.com/a.zip", "a.zip") is None
+        assert mock_httpx_client.head.call_count == 1
+        # The circuit breaker is open now, so no more requests are sent to the host
+        assert await manager.estimate_size("https://example.com/b.zip", "b.zip") is None
+        assert mock_httpx_client.head.call_count == 1
+        manager.remove_temp_dir()
+
+
 class TestStartMethodFiltering:
     """Tests for file filtering in FetchManager.start method."""
 
@@ -1609,6 +2977,7 @@ class TestStartMethodFiltering:
                 db_pool=mock_asyncpg_pool,
                 db_config=database_config,
                 num_workers=1,
+                extract_workers=1,
             )
 
             files_to_import = [
@@ -1643,6 +3012,7 @@ class TestStartMethodFiltering:
                         break
 
             async def coord():
+                await manager.fetch_items_queued.wait()
                 await manager.fetch_queue.put(None)
                 await manager.fetch_queue.join()
                 await manager.extract_queue.put(None)
@@ -1692,7 +3062,9 @@ data1;4334150;2668050;100
         mock_asyncpg_connection.fetchval = AsyncMock(
             side_effect=[False, 100]
         )  # Table doesn't exist, row count
-        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(2, 100, 100, 100)
+        )
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -1743,7 +3115,9 @@ a;b;c;d;e;f;g
             csv_path = Path(f.name)
 
         mock_asyncpg_connection.fetchval = AsyncMock(side_effect=[False, 100])
-        mock_asyncpg_connection.fetchrow = AsyncMock(return_value=(100, 100, 0, 0))  # TEXT columns
+        mock_asyncpg_connection.fetchrow = AsyncMock(
+            return_value=type_detection_row(7, 100, 0, 0)
+        )  # TEXT columns
 
         with tempfile.TemporaryDirectory() as tmpdir:
             manager = FetchManager(
@@ -1766,3 +3140,37 @@ a;b;c;d;e;f;g
                 await manager.database_worker()
             finally:
                 logger.setLevel(original_level)
+
+
+class TestResolveSourceUrl:
+    """Tests for resolving datasets to a local directory or mirror."""
+
+    URL = "https://www.destatis.de/static/DE/zensus/gitterdaten/Zensus2022_Alter.zip"
+
+    def test_default(self):
+        """Test that the destatis.de URL is used by default."""
+        assert resolve_source_url("alter", self.URL) == self.URL
+
+    def test_source_dir(self, tmp_path):
+        """Test that files in the source directory are found by their published name."""
+        (tmp_path / "Zensus2022_Alter.zip").touch()
+
+        url = resolve_source_url("alter", self.URL, source_dir=tmp_path)
+
+        assert url == (tmp_path / "Zensus2022_Alter.zip").resolve().as_uri()
+
+    def test_source_dir_with_cache_names(self, tmp_path):
+        """Test that a copy of a cache directory can be used as source directory."""
+        (tmp_path / "alter.zip").touch()
+
+        url = resolve_source_url("alter", self.URL, source_dir=tmp_path)
+
+        assert url == (tmp_path / "alter.zip").resolve().as_uri()
+
+    def test_source_dir_falls_back_to_mirror(self, tmp_path):
+        """Test that files missing from the source directory come from the mirror."""
+        url = resolve_source_url(
+            "alter", self.URL, source_dir=tmp_path, mirror_url="http://mirror.lan/zensus"
+        )
+
+        assert url == "http://mirror.lan/zensus/Zensus2022_Alter.zip"
@@ -0,0 +1,122 @@
+"""Tests for the fetch command."""
+
+from unittest.mock import patch
+
+import pytest
+from typer.testing import CliRunner
+
+from zensus2pgsql.cache import CacheManifest
+from zensus2pgsql.cli import app
+from zensus2pgsql.commands.fetch import fetch_wrapper
+from zensus2pgsql.planning import DOWNLOAD_SECONDS_PER_BYTE
+
+
+@pytest.fixture
+def datasets(http_server):
+    """Serve two datasets from the stand-in server and point GITTERDATEN_FILES at them."""
+    http_server.files["a.zip"] = b"PK\x03\x04" + b"a" * 100
+    http_server.files["b.zip"] = b"PK\x03\x04" + b"b" * 100
+    files = (
+        {"name": "dataset_a", "url": http_server.url("a.zip")},
+        {"name": "dataset_b", "url": http_server.url("b.zip")},
+    )
+    with patch("zensus2pgsql.commands.create.GITTERDATEN_FILES", files):
+        yield files
+
+
+@pytest.mark.asyncio
+async def test_fetch_fills_cache_without_database(datasets, http_server, tmp_path):
+    """Test that fetch downloads all datasets into the cache and records them."""
+    with patch("zensus2pgsql.commands.create.get_db_pool") as mock_get_db_pool:
+        fetch_manager = await fetch_wrapper(["all"], tmp_path, workers=4)
+
+    mock_get_db_pool.assert_not_called()
+    assert fetch_manager.success == 2
+    assert fetch_manager.extract_queue.empty()
+    assert (tmp_path / "dataset_a.zip").read_bytes() == http_server.files["a.zip"]
+    assert (tmp_path / "dataset_b.zip").read_bytes() == http_server.files["b.zip"]
+    assert set(CacheManifest.load(tmp_path).entries) == {"dataset_a.zip", "dataset_b.zip"}
+    assert fetch_manager.download_throughput.total == 2 * 104
+
+
+@pytest.mark.asyncio
+async def test_largest_datasets_are_fetched_first(datasets, http_server, tmp_path):
+    """Test that datasets are downloaded in order of the sizes their servers report."""
+    http_server.files["b.zip"] = b"PK\x03\x04" + b"b" * 1000
+
+    fetch_manager = await fetch_wrapper(["all"], tmp_path, workers=1)
+
+    assert [path for path, _ in http_server.requests] == ["/b.zip", "/a.zip"]
+    times = fetch_manager.dataset_times.report()
+    assert [(time.name, time.size) for time in times] == [
+        ("dataset_b.zip", 1004),
+        ("dataset_a.zip", 104),
+    ]
+    assert all(time.actual is not None for time in times)
+    # The first download is estimated with the default download rate
+    assert times[0].estimated == pytest.approx(1004 * DOWNLOAD_SECONDS_PER_BYTE)
+    assert times[1].estimated is not None
+
+
+@pytest.mark.asyncio
+async def test_fetch_selected_datasets(datasets, tmp_path):
+    """Test that only the named datasets are downloaded, and existing files are skipped."""
+    fetch_manager = await fetch_wrapper(["dataset_b"], tmp_path)
+    assert fetch_manager.success == 1
+    assert not (tmp_path / "dataset_a.zip").exists()
+
+    fetch_manager = await fetch_wrapper(["dataset_b"], tmp_path)
+    assert (fetch_manager.success, fetch_manager.skipped) == (0, 1)
+
+
+def test_fetch_command(datasets, tmp_path):
+    """Test the fetch command through the CLI."""
+    result = CliRunner().invoke(app, ["fetch", "--cache-dir", str(tmp_path / "cache"), "all"])
+
+    assert result.exit_code == 0
+    assert "Downloaded: 2" in result.stdout
+    assert "Throughput:" in result.stdout
+    assert "Dataset times" in result.stdout
+    assert (tmp_path / "cache" / "dataset_a.zip").exists()
+
+
+@pytest.mark.asyncio
+async def test_fetch_from_source_dir(datasets, http_server, tmp_path):
+    """Test that datasets found in --source-dir are copied instead of downloaded."""
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+    (source_dir / "a.zip").write_bytes(b"local a")
+    (source_dir / "dataset_b.zip").write_bytes(b"local b")
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+
+    fetch_manager = await fetch_wrapper(["all"], cache_dir, source_dir=source_dir)
+
+    assert fetch_manager.success == 2
+    assert http_server.requests == []
+    assert (cache_dir / "dataset_a.zip").read_bytes() == b"local a"
+    assert (cache_dir / "dataset_b.zip").read_bytes() == b"local b"
+
+
+@pytest.mark.asyncio
+async def test_fetch_from_mirror(datasets, http_server, tmp_path):
+    """Test that --mirror-url replaces the URL prefix of every dataset."""
+    http_server.files["mirror/a.zip"] = b"mirrored a"
+    http_server.files["mirror/b.zip"] = b"mirrored b"
+
+    fetch_manager = await fetch_wrapper(["all"], tmp_path, mirror_url=http_server.url("mirror/"))
+
+    assert fetch_manager.success == 2
+    assert sorted(path for path, _ in http_server.requests) == ["/mirror/a.zip", "/mirror/b.zip"]
+    assert (tmp_path / "dataset_a.zip").read_bytes() == b"mirrored a"
+
+
+@pytest.mark.asyncio
+async def test_fetch_missing_from_source_dir(datasets, tmp_path):
+    """Test that datasets missing from --source-dir fail without a mirror."""
+    source_dir = tmp_path / "source"
+    source_dir.mkdir()
+
+    fetch_manager = await fetch_wrapper(["dataset_a"], tmp_path, source_dir=source_dir)
+
+    assert (fetch_manager.success, fetch_manager.failed) == (0, 1)
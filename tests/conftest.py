@@ -1,14 +1,20 @@
 """Shared fixtures and mocks for zensus2pgsql tests."""
 
 import asyncio
+import hashlib
+import re
+import socket
 import tempfile
+import threading
 import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock
 
+import httpx
 import pytest
 
-from zensus2pgsql.commands.create import DatabaseConfig
+from zensus2pgsql.commands.create import DatabaseConfig, LoadMode
 
 
 @pytest.fixture
@@ -56,9 +62,37 @@ def database_config_custom_srid() -> DatabaseConfig:
     )
 
 
+@pytest.fixture
+def database_config_direct() -> DatabaseConfig:
+    """Create a test DatabaseConfig using the direct load mode."""
+    return DatabaseConfig(
+        host="localhost",
+        port=5432,
+        database="test_db",
+        user="test_user",
+        password="test_pass",
+        schema="test_schema",
+        srid=3035,
+        drop_existing=False,
+        load_mode=LoadMode.direct,
+    )
+
+
 class MockTransaction:
     """Mock asyncpg transaction context manager."""
 
+    def __init__(self):
+        self.state = "new"
+
+    async def start(self):
+        self.state = "started"
+
+    async def commit(self):
+        self.state = "committed"
+
+    async def rollback(self):
+        self.state = "rolled back"
+
     async def __aenter__(self):
         return self
 
@@ -74,10 +108,14 @@ class MockAsyncpgConnection:
         self.fetchval = AsyncMock(return_value=True)
         self.fetchrow = AsyncMock(return_value=(100, 100, 100, 0))  # All integers
         self.copy_to_table = AsyncMock(return_value=None)
+        self.copy_records_to_table = AsyncMock(return_value="COPY 0")
+        self.set_type_codec = AsyncMock(return_value=None)
         self.close = AsyncMock(return_value=None)
+        self.transactions: list[MockTransaction] = []
 
     def transaction(self):
-        return MockTransaction()
+        self.transactions.append(MockTransaction())
+        return self.transactions[-1]
 
 
 class MockPoolAcquireContext:
@@ -96,13 +134,17 @@ class MockPoolAcquireContext:
 class MockAsyncpgPool:
     """Mock asyncpg pool with proper acquire context manager."""
 
-    def __init__(self, connection):
+    def __init__(self, connection, max_size: int = 10):
         self.connection = connection
+        self.max_size = max_size
         self.close = AsyncMock(return_value=None)
 
     def acquire(self):
         return MockPoolAcquireContext(self.connection)
 
+    def get_max_size(self):
+        return self.max_size
+
 
 @pytest.fixture
 def mock_asyncpg_connection() -> MockAsyncpgConnection:
@@ -139,6 +181,8 @@ class MockStreamResponse:
 
     def __init__(self):
         self.chunks = [b"PK\x03\x04", b"\x00" * 100]
+        self.status_code = 200
+        self.headers = httpx.Headers()
 
     def raise_for_status(self):
         pass
@@ -182,6 +226,7 @@ def mock_httpx_client() -> MagicMock:
         return MockStreamContextManager()
 
     client.stream = MagicMock(side_effect=stream_side_effect)
+    client.head = AsyncMock(return_value=MockStreamResponse())
     client.aclose = AsyncMock(return_value=None)
 
     return client
@@ -334,6 +379,133 @@ def create_type_detection_fetchrow(
     return (total, non_empty, integer_count, numeric_count)
 
 
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves the files of a `StandInServer` with Range support and injected faults."""
+
+    protocol_version = "HTTP/1.1"
+    server: "StandInServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        # Not recorded in `requests`: only announces the size of a file
+        body = self.server.files.get(self.path.lstrip("/"))
+        self.send_response(404 if body is None else 200)
+        self.send_header("Content-Length", str(len(body or b"")))
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, dict(self.headers)))
+
+        with server.lock:
+            status = server.fail_statuses.pop(0) if server.fail_statuses else None
+        if status is not None:
+            # Injected failure
+            self.send_response(status)
+            if server.retry_after is not None:
+                self.send_header("Retry-After", server.retry_after)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = server.files.get(self.path.lstrip("/"))
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        start, end, status = 0, len(body) - 1, 200
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match and server.accept_ranges and self.headers.get("If-Range", etag) == etag:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(body) - 1
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+
+        payload = body[start : end + 1]
+        self.send_response(status)
+        if server.accept_ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", server.last_modified)
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        self.end_headers()
+
+        with server.lock:
+            drop = server.drops > 0 and len(payload) > server.drop_after
+            server.drops -= drop
+
+        if drop:
+            # Send part of the body, then drop the connection
+            self.wfile.write(payload[: server.drop_after])
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+            self.close_connection = True
+            return
+
+        self.wfile.write(payload)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Local HTTP server standing in for the Destatis download server."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+
+        #: Files served by path (without leading slash)
+        self.files: dict[str, bytes] = {}
+
+        #: Received requests as (path, headers)
+        self.requests: list[tuple[str, dict[str, str]]] = []
+
+        #: Whether Range requests are supported
+        self.accept_ranges = True
+
+        #: Last-Modified header sent for all files
+        self.last_modified = "Wed, 01 Oct 2025 08:00:00 GMT"
+
+        #: Number of responses that drop the connection after `drop_after` body bytes
+        self.drops = 0
+        self.drop_after = 0
+        self.lock = threading.Lock()
+
+        #: Statuses returned (in order) instead of the next responses, e.g. [503, 503]
+        self.fail_statuses: list[int] = []
+        self.retry_after: str | None = None
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/{path}"
+
+
+@pytest.fixture
+def http_server():
+    """Run a local HTTP stand-in server for download tests."""
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
 # Async test event loop configuration
 @pytest.fixture
 def event_loop():
@@ -0,0 +1,242 @@
+"""Tests for the application cache."""
+
+import hashlib
+import os
+import zipfile
+
+from zensus2pgsql.cache import (
+    EXTRACTED_DIR,
+    MANIFEST_FILE,
+    QUARANTINE_DIR,
+    CacheEntry,
+    CacheManifest,
+    archive_sha256,
+    evict_cached_files,
+    extracted_dir,
+    hash_file,
+    link_cached_file,
+    list_cached_files,
+    quarantine_file,
+    verify_cached_file,
+)
+
+URL = "https://example.com/a.zip"
+
+
+class TestCacheManifest:
+    """Tests for CacheManifest."""
+
+    def test_missing_manifest_is_empty(self, tmp_path):
+        """Test that a cache without a manifest loads as empty."""
+        manifest = CacheManifest.load(tmp_path)
+
+        assert manifest.entries == {}
+        assert manifest.path == tmp_path / MANIFEST_FILE
+
+    def test_save_and_load(self, tmp_path):
+        """Test that saved entries are loaded again."""
+        entry = CacheEntry("https://example.com/a.zip", '"abc"', None, 10, "0" * 64)
+        manifest = CacheManifest.load(tmp_path)
+        manifest.set("a.zip", entry)
+        manifest.save()
+
+        loaded = CacheManifest.load(tmp_path)
+
+        assert loaded.get("a.zip") == entry
+        assert not (tmp_path / f"{MANIFEST_FILE}.tmp").exists()
+
+    def test_remove(self, tmp_path):
+        """Test that entries can be removed."""
+        manifest = CacheManifest.load(tmp_path)
+        manifest.set("a.zip", CacheEntry("https://example.com/a.zip"))
+
+        manifest.remove("a.zip")
+        manifest.remove("missing.zip")
+
+        assert manifest.get("a.zip") is None
+
+    def test_touch_records_last_used(self, tmp_path):
+        """Test that touch updates last_used of existing entries only."""
+        manifest = CacheManifest.load(tmp_path)
+        manifest.set("a.zip", CacheEntry(URL))
+
+        manifest.touch("a.zip")
+        manifest.touch("missing.zip")
+
+        assert manifest.get("a.zip").last_used is not None
+        assert manifest.get("missing.zip") is None
+
+    def test_unreadable_manifest_is_ignored(self, tmp_path):
+        """Test that a corrupt manifest is treated as empty instead of failing the run."""
+        (tmp_path / MANIFEST_FILE).write_text("{not json")
+
+        assert CacheManifest.load(tmp_path).entries == {}
+
+
+def test_hash_file(tmp_path):
+    """Test that hash_file returns the sha256 of the file contents."""
+    path = tmp_path / "a.zip"
+    path.write_bytes(b"zensus" * 1000)
+
+    assert hash_file(path).hexdigest() == hashlib.sha256(b"zensus" * 1000).hexdigest()
+
+
+class TestVerifyCachedFile:
+    """Tests for verify_cached_file."""
+
+    def test_matching_hash(self, tmp_path):
+        """Test that a file matching its recorded hash is valid and gets its mtime recorded."""
+        path = tmp_path / "a.zip"
+        path.write_bytes(b"data")
+        entry = CacheEntry(URL, size=4, sha256=hashlib.sha256(b"data").hexdigest())
+
+        verified = verify_cached_file(path, entry, URL)
+
+        assert verified == entry._replace(mtime=path.stat().st_mtime)
+
+    def test_changed_contents(self, tmp_path):
+        """Test that a file no longer matching its recorded hash is corrupt."""
+        path = tmp_path / "a.zip"
+        path.write_bytes(b"date")
+        entry = CacheEntry(URL, size=4, sha256=hashlib.sha256(b"data").hexdigest())
+
+        assert verify_cached_file(path, entry, URL) is None
+
+    def test_truncated_file(self, tmp_path):
+        """Test that a file with the wrong size is corrupt even if its mtime matches."""
+        path = tmp_path / "a.zip"
+        path.write_bytes(b"dat")
+        entry = CacheEntry(URL, size=4, sha256="0" * 64, mtime=path.stat().st_mtime)
+
+        assert verify_cached_file(path, entry, URL) is None
+
+    def test_without_entry_requires_zip(self, tmp_path):
+        """Test that files without a recorded hash are checked to be zip archives."""
+        path = tmp_path / "a.zip"
+        path.write_bytes(b"not a zip")
+        assert verify_cached_file(path, None, URL) is None
+
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("a.csv", "a;b")
+        verified = verify_cached_file(path, None, URL)
+        assert verified.sha256 == hash_file(path).hexdigest()
+        assert verified.size == path.stat().st_size
+
+
+def test_quarantine_file(tmp_path):
+    """Test that quarantined files are moved into the quarantine directory."""
+    path = tmp_path / "a.zip"
+    path.write_bytes(b"data")
+
+    destination = quarantine_file(path)
+
+    assert not path.exists()
+    assert destination.parent == tmp_path / QUARANTINE_DIR
+    assert destination.read_bytes() == b"data"
+
+
+class TestArchiveSha256:
+    """Tests for archive_sha256."""
+
+    def test_uses_recorded_hash(self, tmp_path):
+        """Test that an unchanged file is not hashed again."""
+        path = tmp_path / "a.zip"
+        path.write_bytes(b"data")
+        entry = CacheEntry(URL, size=4, sha256="recorded", mtime=path.stat().st_mtime)
+
+        assert archive_sha256(path, entry) == "recorded"
+
+    def test_hashes_changed_file(self, tmp_path):
+        """Test that a file changed since its entry was recorded is hashed."""
+        path = tmp_path / "a.zip"
+        path.write_bytes(b"data")
+        entry = CacheEntry(URL, size=4, sha256="recorded", mtime=0.0)
+
+        assert archive_sha256(path, entry) == hashlib.sha256(b"data").hexdigest()
+
+
+def test_link_cached_file(tmp_path):
+    """Test that cached files are hard linked to their destination."""
+    source = tmp_path / "cache" / "a.csv"
+    source.parent.mkdir()
+    source.write_text("a;b")
+
+    linked = link_cached_file(source, tmp_path / "work" / "a.csv")
+
+    assert linked == tmp_path / "work" / "a.csv"
+    assert linked.stat().st_ino == source.stat().st_ino
+
+
+def make_cache(tmp_path):
+    """Create a cache with three 100 byte files used at different times and a quarantined file."""
+    manifest = CacheManifest.load(tmp_path)
+    for name, last_used in (("old.zip", 100.0), ("new.zip", 300.0), ("middle.zip", 200.0)):
+        (tmp_path / name).write_bytes(b"x" * 100)
+        manifest.set(name, CacheEntry(URL, size=100, last_used=last_used))
+    manifest.save()
+    (tmp_path / QUARANTINE_DIR).mkdir()
+    (tmp_path / QUARANTINE_DIR / "bad.zip.20250101T000000").write_bytes(b"x" * 10)
+    return manifest
+
+
+class TestEviction:
+    """Tests for least recently used eviction."""
+
+    def test_eviction_order(self, tmp_path):
+        """Test that quarantined files come first, then the least recently used."""
+        manifest = make_cache(tmp_path)
+
+        files = list_cached_files(tmp_path, manifest)
+
+        assert [file.path.name for file in files] == [
+            "bad.zip.20250101T000000",
+            "old.zip",
+            "middle.zip",
+            "new.zip",
+        ]
+
+    def test_lists_only_own_files(self, tmp_path):
+        """Test that files not put there by zensus2pgsql are not listed."""
+        manifest = make_cache(tmp_path)
+        (tmp_path / "old.zip.part").write_bytes(b"x")
+        (tmp_path / "unrelated.zip").write_bytes(b"x")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "old.zip").write_bytes(b"x")
+
+        names = {file.path.name for file in list_cached_files(tmp_path, manifest)}
+
+        assert "old.zip.part" in names
+        assert "unrelated.zip" not in names
+        assert len(names) == 5
+
+    def test_evict_to_budget(self, tmp_path):
+        """Test that files are removed until the cache fits in its budget."""
+        manifest = make_cache(tmp_path)
+
+        evicted = evict_cached_files(tmp_path, manifest, max_size=200)
+
+        assert [file.path.name for file in evicted] == ["bad.zip.20250101T000000", "old.zip"]
+        assert sorted(p.name for p in tmp_path.glob("*.zip")) == ["middle.zip", "new.zip"]
+        assert CacheManifest.load(tmp_path).get("old.zip") is None
+
+    def test_dry_run(self, tmp_path):
+        """Test that a dry run removes nothing."""
+        manifest = make_cache(tmp_path)
+
+        evicted = evict_cached_files(tmp_path, manifest, max_size=0, dry_run=True)
+
+        assert len(evicted) == 4
+        assert len(list(tmp_path.glob("*.zip"))) == 3
+
+    def test_evicted_extracted_files_leave_no_directories(self, tmp_path):
+        """Test that directories of evicted extracted files are removed."""
+        manifest = make_cache(tmp_path)
+        member = extracted_dir(tmp_path, "abc") / "data" / "a.csv"
+        member.parent.mkdir(parents=True)
+        member.write_bytes(b"x" * 100)
+        os.utime(member, (50.0, 50.0))
+
+        evicted = evict_cached_files(tmp_path, manifest, max_size=300)
+
+        assert [file.path.name for file in evicted] == ["bad.zip.20250101T000000", "a.csv"]
+        assert not (tmp_path / EXTRACTED_DIR).exists()
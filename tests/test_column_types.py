@@ -0,0 +1,151 @@
+"""Tests for detecting and converting the column types of the CSV files."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from zensus2pgsql.column_types import (
+    detect_column_type,
+    detect_column_types,
+    infer_column_types,
+    iter_record_batches,
+)
+from zensus2pgsql.csv import CsvLayout
+from zensus2pgsql.geometry import encode_point_ewkb
+
+
+class TestDetectColumnType:
+    """Tests for detect_column_type async function."""
+
+    @pytest.mark.asyncio
+    async def test_detects_integer_type(self):
+        """Test detection of INTEGER type columns."""
+        conn = AsyncMock()
+        conn.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
+
+        result = await detect_column_type(conn, "test_table", "test_col")
+        assert result == "INTEGER"
+
+    @pytest.mark.asyncio
+    async def test_detects_double_precision_type(self):
+        """Test detection of DOUBLE PRECISION type columns."""
+        conn = AsyncMock()
+        # non_empty=100, integer_count=50, numeric_count=100 (all are numeric but not all integers)
+        conn.fetchrow = AsyncMock(return_value=(100, 100, 50, 100))
+
+        result = await detect_column_type(conn, "test_table", "test_col")
+        assert result == "DOUBLE PRECISION"
+
+    @pytest.mark.asyncio
+    async def test_detects_text_type(self):
+        """Test detection of TEXT type columns."""
+        conn = AsyncMock()
+        # Some values are not numeric
+        conn.fetchrow = AsyncMock(return_value=(100, 100, 50, 50))
+
+        result = await detect_column_type(conn, "test_table", "test_col")
+        assert result == "TEXT"
+
+    @pytest.mark.asyncio
+    async def test_empty_column_returns_text(self):
+        """Test that empty columns return TEXT type."""
+        conn = AsyncMock()
+        # non_empty=0
+        conn.fetchrow = AsyncMock(return_value=(100, 0, 0, 0))
+
+        result = await detect_column_type(conn, "test_table", "test_col")
+        assert result == "TEXT"
+
+    @pytest.mark.asyncio
+    async def test_all_null_returns_text(self):
+        """Test that all-NULL columns return TEXT type."""
+        conn = AsyncMock()
+        conn.fetchrow = AsyncMock(return_value=(0, 0, 0, 0))
+
+        result = await detect_column_type(conn, "test_table", "test_col")
+        assert result == "TEXT"
+
+    @pytest.mark.asyncio
+    async def test_negative_integers_detected(self):
+        """Test that negative integers are correctly detected."""
+        conn = AsyncMock()
+        # All values are integers including negatives
+        conn.fetchrow = AsyncMock(return_value=(100, 100, 100, 100))
+
+        result = await detect_column_type(conn, "test_table", "test_col")
+        assert result == "INTEGER"
+
+    @pytest.mark.asyncio
+    async def test_german_decimal_format_detected(self):
+        """Test that German decimal format is detected as numeric."""
+        conn = AsyncMock()
+        # Numeric regex handles German format via REPLACE
+        conn.fetchrow = AsyncMock(return_value=(100, 100, 0, 100))
+
+        result = await detect_column_type(conn, "test_table", "test_col")
+        assert result == "DOUBLE PRECISION"
+
+
+class TestDetectColumnTypes:
+    """Tests for detect_column_types async function."""
+
+    @pytest.mark.asyncio
+    async def test_single_query_for_all_columns(self):
+        """Test that every column is classified from one aggregate query."""
+        conn = AsyncMock()
+        conn.fetchrow = AsyncMock(
+            return_value=(100, 100, 100, 100, 100, 50, 100, 100, 0, 0, 0, 0, 0)
+        )
+
+        result = await detect_column_types(conn, "test_table", ["a", "b", "c", "d"])
+
+        assert result == {"a": "INTEGER", "b": "DOUBLE PRECISION", "c": "TEXT", "d": "TEXT"}
+        conn.fetchrow.assert_called_once()
+        query = conn.fetchrow.call_args.args[0]
+        assert query.count("FROM test_table") == 1
+        for col in ["a", "b", "c", "d"]:
+            assert f"REPLACE({col}, ',', '.')" in query
+
+    @pytest.mark.asyncio
+    async def test_no_columns_skips_query(self):
+        """Test that no query is issued when there is nothing to classify."""
+        conn = AsyncMock()
+
+        result = await detect_column_types(conn, "test_table", [])
+
+        assert result == {}
+        conn.fetchrow.assert_not_called()
+
+
+class TestInferColumnTypes:
+    """Tests for infer_column_types function."""
+
+    def test_detects_types_in_one_pass(self):
+        """Test that all columns are classified from a single iteration of the rows."""
+        rows = iter([["1", "1,5", "a", "-"], ["-2", "3", "b", ""], ["", "-", "c", "-"]])
+
+        assert infer_column_types(rows, 4) == ["INTEGER", "DOUBLE PRECISION", "TEXT", "TEXT"]
+
+    def test_german_decimals_are_not_integers(self):
+        """Test that a value with a decimal comma makes the column DOUBLE PRECISION."""
+        assert infer_column_types([["10"], ["10,0"]], 1) == ["DOUBLE PRECISION"]
+
+
+class TestIterRecordBatches:
+    """Tests for iter_record_batches function."""
+
+    def test_converts_and_batches_rows(self):
+        """Test that rows are converted to typed records and split into batches."""
+        layout = CsvLayout(
+            ["id", "x_mp", "y_mp", "wert"], ["id", "x_mp", "y_mp", "wert"], "x_mp", "y_mp"
+        )
+        rows = [["a", "1", "2", "1,5"], ["b", "3", "4", "-"], ["c", "-", "5", "2"]]
+
+        batches = list(
+            iter_record_batches(rows, layout, {"id": "TEXT", "wert": "DOUBLE PRECISION"}, 3035, 2)
+        )
+
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert batches[0][0] == ("a", 1.5, encode_point_ewkb(1.0, 2.0, 3035))
+        assert batches[0][1] == ("b", None, encode_point_ewkb(3.0, 4.0, 3035))
+        assert batches[1][0] == ("c", 2.0, None)
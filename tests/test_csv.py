@@ -0,0 +1,182 @@
+"""Tests for reading the Gitterdaten CSV files."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from zensus2pgsql.csv import (
+    ZipMember,
+    detect_csv_encoding,
+    detect_file_encoding,
+    detect_file_encoding_old,
+    sanitize_column_name,
+    sanitize_table_name,
+)
+
+
+class TestSanitizeColumnName:
+    """Tests for sanitize_column_name function."""
+
+    def test_lowercase_conversion(self):
+        """Test that column names are converted to lowercase."""
+        assert sanitize_column_name("ColumnName") == "columnname"
+        assert sanitize_column_name("UPPERCASE") == "uppercase"
+        assert sanitize_column_name("MixedCase") == "mixedcase"
+
+    def test_digit_prefix_gets_underscore(self):
+        """Test that names starting with digits get underscore prefix."""
+        assert sanitize_column_name("1column") == "_1column"
+        assert sanitize_column_name("123abc") == "_123abc"
+        assert sanitize_column_name("9test") == "_9test"
+
+    def test_already_sanitized_unchanged(self):
+        """Test that already sanitized names remain unchanged."""
+        assert sanitize_column_name("column_name") == "column_name"
+        assert sanitize_column_name("lowercase") == "lowercase"
+        assert sanitize_column_name("_prefixed") == "_prefixed"
+
+    def test_empty_string(self):
+        """Test that empty string returns empty string."""
+        assert sanitize_column_name("") == ""
+
+    def test_underscore_prefix_preserved(self):
+        """Test that existing underscore prefix is preserved."""
+        assert sanitize_column_name("_existing") == "_existing"
+        assert sanitize_column_name("__double") == "__double"
+
+
+class TestSanitizeTableName:
+    """Tests for sanitize_table_name function."""
+
+    def test_removes_zensus2022_prefix(self):
+        """Test that zensus2022_ prefix is removed."""
+        assert sanitize_table_name("zensus2022_bevoelkerung") == "bevoelkerung"
+        assert sanitize_table_name("Zensus2022_Test") == "test"
+
+    def test_removes_gitter_suffix(self):
+        """Test that _gitter suffix is removed."""
+        assert sanitize_table_name("test_gitter") == "test"
+        assert sanitize_table_name("data_gitter.csv") == "data.csv"
+
+    def test_replaces_hyphens_with_underscores(self):
+        """Test that hyphens are replaced with underscores."""
+        assert sanitize_table_name("test-name") == "test_name"
+        assert sanitize_table_name("multi-part-name") == "multi_part_name"
+
+    def test_replaces_spaces_with_underscores(self):
+        """Test that spaces are replaced with underscores."""
+        assert sanitize_table_name("test name") == "test_name"
+        assert sanitize_table_name("multi part name") == "multi_part_name"
+
+    def test_truncates_to_63_characters(self):
+        """Test that names are truncated to 63 characters."""
+        long_name = "a" * 100
+        result = sanitize_table_name(long_name)
+        assert len(result) == 63
+        assert result == "a" * 63
+
+    def test_lowercase_conversion(self):
+        """Test that names are converted to lowercase."""
+        assert sanitize_table_name("TestName") == "testname"
+        assert sanitize_table_name("UPPERCASE") == "uppercase"
+
+    def test_combined_transformations(self):
+        """Test multiple transformations applied together."""
+        result = sanitize_table_name("Zensus2022_Test-Data Name_gitter")
+        assert result == "test_data_name"
+
+    def test_csv_extension_preserved(self):
+        """Test that .csv extension is preserved in sanitization."""
+        # The function doesn't explicitly remove .csv, it stays
+        result = sanitize_table_name("Zensus2022_Data_Gitter.csv")
+        assert ".csv" in result
+
+
+class TestDetectFileEncoding:
+    """Tests for detect_file_encoding async function."""
+
+    @pytest.mark.asyncio
+    async def test_detects_utf8_encoding(self, temp_csv_file):
+        """Test that UTF-8 files are correctly detected."""
+        encoding = await detect_file_encoding(temp_csv_file)
+        assert encoding == "utf-8"
+
+    @pytest.mark.asyncio
+    async def test_detects_latin1_encoding(self, temp_csv_file_latin1):
+        """Test that ISO-8859-1 files are correctly detected."""
+        encoding = await detect_file_encoding(temp_csv_file_latin1)
+        # UTF-8 can read ISO-8859-1 in many cases, so we accept either
+        assert encoding in ["utf-8", "iso-8859-1"]
+
+    @pytest.mark.asyncio
+    async def test_detects_windows1252_encoding(self, temp_csv_file_windows1252):
+        """Test that Windows-1252 files are correctly detected."""
+        encoding = await detect_file_encoding(temp_csv_file_windows1252)
+        # May detect as utf-8 if content is compatible
+        assert encoding in ["utf-8", "windows-1252", "iso-8859-1"]
+
+    @pytest.mark.asyncio
+    async def test_fallback_to_iso8859(self):
+        """Test fallback to ISO-8859-1 for unknown encodings."""
+        # Create a file with invalid UTF-8 bytes
+        with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=".csv") as f:
+            # Write bytes that are invalid UTF-8
+            f.write(b"\xff\xfe" + "test".encode("utf-16-le"))
+            temp_path = Path(f.name)
+
+        encoding = await detect_file_encoding(temp_path)
+        # Should fallback to iso-8859-1 or detect one of the encodings
+        assert encoding in ["utf-8", "iso-8859-1", "windows-1252", "cp1252"]
+
+    @pytest.mark.asyncio
+    async def test_empty_file(self):
+        """Test encoding detection on empty file."""
+        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".csv") as f:
+            temp_path = Path(f.name)
+
+        encoding = await detect_file_encoding(temp_path)
+        assert encoding == "utf-8"  # Empty file should be valid UTF-8
+
+
+class TestDetectFileEncodingOld:
+    """Tests for detect_file_encoding_old sync function."""
+
+    def test_detects_utf8_encoding(self, temp_csv_file):
+        """Test that UTF-8 files are correctly detected."""
+        encoding = detect_file_encoding_old(temp_csv_file)
+        assert encoding == "utf-8"
+
+    def test_detects_latin1_encoding(self, temp_csv_file_latin1):
+        """Test that ISO-8859-1 files are correctly detected."""
+        encoding = detect_file_encoding_old(temp_csv_file_latin1)
+        assert encoding in ["utf-8", "iso-8859-1"]
+
+    def test_empty_file(self):
+        """Test encoding detection on empty file."""
+        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".csv") as f:
+            temp_path = Path(f.name)
+
+        encoding = detect_file_encoding_old(temp_path)
+        assert encoding == "utf-8"
+
+
+class TestDetectCsvEncoding:
+    """Tests for detect_csv_encoding async function."""
+
+    @pytest.mark.asyncio
+    async def test_detects_encoding_of_zip_member(self, tmp_path):
+        """Test that the encoding of a zip member is detected from its first bytes."""
+        import zipfile
+
+        zip_path = tmp_path / "latin1.zip"
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("Test_Gitter.csv", "id;stadt\n1;München\n".encode("iso-8859-1"))
+
+        encoding = await detect_csv_encoding(ZipMember(zip_path, "Test_Gitter.csv"))
+        assert encoding == "iso-8859-1"
+
+    @pytest.mark.asyncio
+    async def test_extracted_file_uses_file_detection(self, temp_csv_file):
+        """Test that extracted files are still detected by reading their lines."""
+        assert await detect_csv_encoding(temp_csv_file) == "utf-8"
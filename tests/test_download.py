@@ -0,0 +1,399 @@
+"""Tests for downloading files into the cache."""
+
+import hashlib
+import os
+
+import httpx
+import pytest
+
+from zensus2pgsql.cache import CacheEntry
+from zensus2pgsql.download import (
+    conditional_headers,
+    download_file,
+    part_path,
+    store_part_validator,
+    validator_path,
+)
+
+PAYLOAD = os.urandom(256 * 1024)
+
+
+def etag(body: bytes) -> str:
+    """ETag the stand-in server sends for `body`."""
+    return f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+
+@pytest.fixture
+async def client():
+    """Create an HTTP client for the stand-in server."""
+    async with httpx.AsyncClient() as client:
+        yield client
+
+
+class TestDownloadFile:
+    """Tests for download_file against a local stand-in server."""
+
+    @pytest.mark.asyncio
+    async def test_complete_download(self, http_server, client, tmp_path):
+        """Test that an uninterrupted download is renamed into place."""
+        http_server.files["test.zip"] = PAYLOAD
+        output_path = tmp_path / "test.zip"
+
+        result = await download_file(client, http_server.url("test.zip"), output_path)
+
+        assert output_path.read_bytes() == PAYLOAD
+        assert result.transferred == len(PAYLOAD)
+        assert result.size == len(PAYLOAD)
+        assert result.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+        assert result.etag is not None
+        assert result.last_modified == http_server.last_modified
+        assert not part_path(output_path).exists()
+
+    @pytest.mark.asyncio
+    async def test_reports_progress(self, http_server, client, tmp_path):
+        """Test that every chunk written is reported to on_progress."""
+        http_server.files["test.zip"] = PAYLOAD
+        chunks: list[int] = []
+
+        await download_file(
+            client, http_server.url("test.zip"), tmp_path / "test.zip", on_progress=chunks.append
+        )
+
+        assert sum(chunks) == len(PAYLOAD)
+
+    @pytest.mark.asyncio
+    async def test_resumes_after_dropped_connections(self, http_server, client, tmp_path):
+        """Test that dropped connections are resumed with Range requests."""
+        http_server.files["test.zip"] = PAYLOAD
+        http_server.drops = 2
+        http_server.drop_after = 100_000
+        output_path = tmp_path / "test.zip"
+
+        result = await download_file(client, http_server.url("test.zip"), output_path)
+
+        assert output_path.read_bytes() == PAYLOAD
+        # Only the missing bytes were transferred again
+        assert result.transferred == len(PAYLOAD)
+        assert result.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+        ranges = [headers.get("Range") for _, headers in http_server.requests]
+        assert ranges == [None, "bytes=100000-", "bytes=200000-"]
+        assert all("If-Range" in headers for _, headers in http_server.requests[1:])
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_retries(self, http_server, client, tmp_path):
+        """Test that the partial file is kept when all retries fail."""
+        http_server.files["test.zip"] = PAYLOAD
+        http_server.drops = 10
+        http_server.drop_after = 1000
+        output_path = tmp_path / "test.zip"
+
+        with pytest.raises(httpx.TransportError):
+            await download_file(client, http_server.url("test.zip"), output_path, retries=2)
+
+        assert not output_path.exists()
+        assert part_path(output_path).stat().st_size == 3000
+        assert validator_path(output_path).read_text() == etag(PAYLOAD)
+
+    @pytest.mark.asyncio
+    async def test_resumes_partial_file_from_earlier_run(self, http_server, client, tmp_path):
+        """Test that an existing .part file is resumed instead of downloaded again."""
+        http_server.files["test.zip"] = PAYLOAD
+        output_path = tmp_path / "test.zip"
+        part_path(output_path).write_bytes(PAYLOAD[:5000])
+        store_part_validator(output_path, etag(PAYLOAD))
+
+        result = await download_file(client, http_server.url("test.zip"), output_path)
+
+        assert output_path.read_bytes() == PAYLOAD
+        assert result.transferred == len(PAYLOAD) - 5000
+        assert result.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+        assert http_server.requests[0][1]["If-Range"] == etag(PAYLOAD)
+        assert not validator_path(output_path).exists()
+
+    @pytest.mark.asyncio
+    async def test_partial_file_of_changed_file_is_not_spliced(self, http_server, client, tmp_path):
+        """Test that a .part file from an earlier run of a since changed file is replaced."""
+        http_server.files["test.zip"] = PAYLOAD
+        output_path = tmp_path / "test.zip"
+        part_path(output_path).write_bytes(b"old" * 1000)
+        store_part_validator(output_path, etag(b"old contents"))
+
+        result = await download_file(client, http_server.url("test.zip"), output_path)
+
+        assert output_path.read_bytes() == PAYLOAD
+        assert result.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_partial_file_without_validator_is_discarded(self, http_server, client, tmp_path):
+        """Test that a .part file that cannot be resumed safely is downloaded again."""
+        http_server.files["test.zip"] = PAYLOAD
+        output_path = tmp_path / "test.zip"
+        part_path(output_path).write_bytes(PAYLOAD[:5000])
+
+        result = await download_file(client, http_server.url("test.zip"), output_path)
+
+        assert output_path.read_bytes() == PAYLOAD
+        assert result.transferred == len(PAYLOAD)
+        assert "Range" not in http_server.requests[0][1]
+
+    @pytest.mark.asyncio
+    async def test_complete_partial_file_is_renamed(self, http_server, client, tmp_path):
+        """Test that a .part file holding the whole file is finished without a body."""
+        http_server.files["test.zip"] = PAYLOAD
+        output_path = tmp_path / "test.zip"
+        part_path(output_path).write_bytes(PAYLOAD)
+        store_part_validator(output_path, etag(PAYLOAD))
+
+        result = await download_file(client, http_server.url("test.zip"), output_path)
+
+        assert output_path.read_bytes() == PAYLOAD
+        assert result.transferred == 0
+        assert result.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_http_error_is_not_retried(self, http_server, client, tmp_path):
+        """Test that HTTP errors are raised immediately."""
+        with pytest.raises(httpx.HTTPStatusError):
+            await download_file(client, http_server.url("missing.zip"), tmp_path / "x.zip")
+
+        assert len(http_server.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_changed_file_restarts_download(self, http_server, client, tmp_path):
+        """Test that a file changed between attempts is downloaded again from the start."""
+        http_server.files["test.zip"] = PAYLOAD
+        http_server.drops = 1
+        http_server.drop_after = 100_000
+        output_path = tmp_path / "test.zip"
+
+        original_handle = http_server.RequestHandlerClass.do_GET
+
+        def change_after_first_request(handler):
+            original_handle(handler)
+            http_server.files["test.zip"] = PAYLOAD[::-1]
+
+        http_server.RequestHandlerClass = type(
+            "ChangingHandler",
+            (http_server.RequestHandlerClass,),
+            {"do_GET": change_after_first_request},
+        )
+
+        await download_file(client, http_server.url("test.zip"), output_path)
+
+        assert output_path.read_bytes() == PAYLOAD[::-1]
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self, http_server, client, tmp_path):
+        """Test that a 304 response leaves the cached file untouched."""
+        http_server.files["test.zip"] = PAYLOAD
+        output_path = tmp_path / "test.zip"
+        first = await download_file(client, http_server.url("test.zip"), output_path)
+        output_path.write_bytes(b"cached")
+
+        result = await download_file(
+            client, http_server.url("test.zip"), output_path, headers={"If-None-Match": first.etag}
+        )
+
+        assert result.not_modified
+        assert result.transferred == 0
+        assert output_path.read_bytes() == b"cached"
+
+    @pytest.mark.asyncio
+    async def test_modified_file_is_downloaded(self, http_server, client, tmp_path):
+        """Test that a conditional request for a changed file downloads it again."""
+        http_server.files["test.zip"] = PAYLOAD
+        output_path = tmp_path / "test.zip"
+        first = await download_file(client, http_server.url("test.zip"), output_path)
+        http_server.files["test.zip"] = PAYLOAD[::-1]
+
+        result = await download_file(
+            client, http_server.url("test.zip"), output_path, headers={"If-None-Match": first.etag}
+        )
+
+        assert not result.not_modified
+        assert result.etag != first.etag
+        assert output_path.read_bytes() == PAYLOAD[::-1]
+
+
+class TestConditionalHeaders:
+    """Tests for conditional_headers."""
+
+    def test_uses_manifest_validators(self, tmp_path):
+        """Test that the recorded ETag and Last-Modified are sent."""
+        entry = CacheEntry("https://example.com/a.zip", '"abc"', "Wed, 01 Oct 2025 08:00:00 GMT")
+
+        headers = conditional_headers(entry, "https://example.com/a.zip", tmp_path / "a.zip")
+
+        assert headers == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Wed, 01 Oct 2025 08:00:00 GMT",
+        }
+
+    def test_falls_back_to_modification_time(self, tmp_path):
+        """Test that files without a manifest entry use their modification time."""
+        output_path = tmp_path / "a.zip"
+        output_path.write_bytes(b"data")
+        os.utime(output_path, (0, 0))
+
+        headers = conditional_headers(None, "https://example.com/a.zip", output_path)
+
+        assert headers == {"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}
+
+    def test_entry_for_other_url_is_ignored(self, tmp_path):
+        """Test that validators recorded for a different URL are not sent."""
+        output_path = tmp_path / "a.zip"
+        output_path.write_bytes(b"data")
+        entry = CacheEntry("https://example.com/old.zip", '"abc"')
+
+        assert conditional_headers(entry, "https://example.com/a.zip", output_path) == {}
+
+
+class TestDownloadParts:
+    """Tests for downloading a file in parallel byte ranges."""
+
+    @pytest.fixture(autouse=True)
+    def small_parts(self, monkeypatch):
+        """Use 16 KiB parts so the test payload is split."""
+        monkeypatch.setattr("zensus2pgsql.download.MIN_PART_SIZE", 16 * 1024)
+
+    @pytest.mark.asyncio
+    async def test_parts_are_fetched_by_range(self, http_server, client, tmp_path):
+        """Test that the file is assembled from concurrent range requests."""
+        http_server.files["test.zip"] = PAYLOAD
+        output_path = tmp_path / "test.zip"
+
+        result = await download_file(client, http_server.url("test.zip"), output_path, parts=4)
+
+        assert output_path.read_bytes() == PAYLOAD
+        assert result.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+        assert result.size == len(PAYLOAD)
+        # The one byte probe is not counted; the range requests cover the file exactly
+        assert result.transferred == len(PAYLOAD)
+        ranges = sorted(headers["Range"] for _, headers in http_server.requests[1:])
+        assert ranges == [
+            "bytes=0-65535",
+            "bytes=131072-196607",
+            "bytes=196608-262143",
+            "bytes=65536-131071",
+        ]
+        assert not part_path(output_path).exists()
+
+    @pytest.mark.asyncio
+    async def test_part_count_is_capped_by_part_size(self, http_server, client, tmp_path):
+        """Test that no part is smaller than MIN_PART_SIZE."""
+        http_server.files["test.zip"] = PAYLOAD[: 40 * 1024]
+
+        await download_file(client, http_server.url("test.zip"), tmp_path / "test.zip", parts=8)
+
+        # Probe plus two parts
+        assert len(http_server.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_dropped_part_is_resumed(self, http_server, client, tmp_path):
+        """Test that a part whose connection drops resumes its own range."""
+        http_server.files["test.zip"] = PAYLOAD
+        http_server.drops = 1
+        http_server.drop_after = 1000
+        output_path = tmp_path / "test.zip"
+
+        result = await download_file(client, http_server.url("test.zip"), output_path, parts=4)
+
+        assert output_path.read_bytes() == PAYLOAD
+        assert result.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+        assert len(http_server.requests) == 6
+
+    @pytest.mark.asyncio
+    async def test_failed_part_removes_partial_file(self, http_server, client, tmp_path):
+        """Test that a part failing all retries removes the preallocated file."""
+        http_server.files["test.zip"] = PAYLOAD
+        http_server.drops = 100
+        http_server.drop_after = 1000
+        output_path = tmp_path / "test.zip"
+
+        with pytest.raises(httpx.TransportError):
+            await download_file(
+                client, http_server.url("test.zip"), output_path, retries=1, parts=4
+            )
+
+        assert not output_path.exists()
+        assert not part_path(output_path).exists()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_without_range_support(self, http_server, client, tmp_path):
+        """Test that servers without range support get a single stream."""
+        http_server.files["test.zip"] = PAYLOAD
+        http_server.accept_ranges = False
+        output_path = tmp_path / "test.zip"
+
+        result = await download_file(client, http_server.url("test.zip"), output_path, parts=4)
+
+        assert output_path.read_bytes() == PAYLOAD
+        assert result.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+        assert len(http_server.requests) == 2
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self, http_server, client, tmp_path):
+        """Test that the probe request answers conditional requests."""
+        http_server.files["test.zip"] = PAYLOAD
+        output_path = tmp_path / "test.zip"
+        first = await download_file(client, http_server.url("test.zip"), output_path)
+
+        result = await download_file(
+            client,
+            http_server.url("test.zip"),
+            output_path,
+            headers={"If-None-Match": first.etag},
+            parts=4,
+        )
+
+        assert result.not_modified
+        assert len(http_server.requests) == 2
+
+
+class TestLocalFiles:
+    """Tests for copying file:// URLs into the cache."""
+
+    @pytest.mark.asyncio
+    async def test_copy_local_file(self, client, tmp_path):
+        """Test that a file:// URL is copied and hashed like a download."""
+        source = tmp_path / "source" / "A.zip"
+        source.parent.mkdir()
+        source.write_bytes(PAYLOAD)
+        output_path = tmp_path / "a.zip"
+
+        result = await download_file(client, source.as_uri(), output_path)
+
+        assert output_path.read_bytes() == PAYLOAD
+        assert result.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+        assert result.last_modified is not None
+        assert not part_path(output_path).exists()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_local_file_is_not_copied(self, client, tmp_path):
+        """Test that If-Modified-Since skips sources that did not change."""
+        source = tmp_path / "A.zip"
+        source.write_bytes(PAYLOAD)
+        first = await download_file(client, source.as_uri(), tmp_path / "a.zip")
+
+        result = await download_file(
+            client,
+            source.as_uri(),
+            tmp_path / "a.zip",
+            headers={"If-Modified-Since": first.last_modified},
+        )
+        assert result.not_modified
+
+        os.utime(source, (source.stat().st_atime, source.stat().st_mtime + 10))
+        result = await download_file(
+            client,
+            source.as_uri(),
+            tmp_path / "a.zip",
+            headers={"If-Modified-Since": first.last_modified},
+        )
+        assert not result.not_modified
+
+    @pytest.mark.asyncio
+    async def test_missing_local_file(self, client, tmp_path):
+        """Test that a missing source raises."""
+        with pytest.raises(FileNotFoundError):
+            await download_file(client, (tmp_path / "A.zip").as_uri(), tmp_path / "a.zip")
@@ -0,0 +1,34 @@
+"""Tests for encoding point geometries for PostGIS."""
+
+from zensus2pgsql.geometry import encode_point_ewkb, encode_points_ewkb
+
+
+class TestEncodePointEwkb:
+    """Tests for encode_point_ewkb function."""
+
+    def test_encodes_point_with_srid(self):
+        """Test that the EWKB header, SRID and coordinates are encoded little-endian."""
+        import struct
+
+        ewkb = encode_point_ewkb(4334150.0, 2668050.0, 3035)
+
+        assert ewkb is not None
+        assert struct.unpack("<BIIdd", ewkb) == (1, 0x20000001, 3035, 4334150.0, 2668050.0)
+
+    def test_missing_coordinate_returns_none(self):
+        """Test that a NULL coordinate produces a NULL geometry."""
+        assert encode_point_ewkb(None, 1.0, 3035) is None
+        assert encode_point_ewkb(1.0, None, 3035) is None
+
+    def test_batch_encoding_matches_single_points(self):
+        """Test that encoding a batch gives the same bytes as encoding points one by one."""
+        xs = [4334150.0, None, -1.5, 0.0, 4334350.25]
+        ys = [2668050.0, 2668050.0, 2.5, None, 2668050.75]
+
+        assert encode_points_ewkb(xs, ys, 4326) == [
+            encode_point_ewkb(x, y, 4326) for x, y in zip(xs, ys)
+        ]
+
+    def test_empty_batch(self):
+        """Test that an empty batch encodes to an empty list."""
+        assert encode_points_ewkb([], [], 3035) == []
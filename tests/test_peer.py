@@ -0,0 +1,164 @@
+"""Tests for sharing the cache between hosts."""
+
+import threading
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from zensus2pgsql.cache import CacheManifest
+from zensus2pgsql.commands.fetch import fetch_wrapper
+from zensus2pgsql.peer import SHA256_HEADER, CacheServer, fetch_peer_manifest
+
+
+@pytest.fixture
+def datasets(http_server):
+    """Serve two datasets from the stand-in origin server."""
+    http_server.files["a.zip"] = b"PK\x03\x04" + b"a" * 1000
+    http_server.files["b.zip"] = b"PK\x03\x04" + b"b" * 1000
+    files = (
+        {"name": "dataset_a", "url": http_server.url("a.zip")},
+        {"name": "dataset_b", "url": http_server.url("b.zip")},
+    )
+    with patch("zensus2pgsql.commands.create.GITTERDATEN_FILES", files):
+        yield files
+
+
+@pytest.fixture
+async def peer(datasets, tmp_path):
+    """Fill a first cache directory from the origin and serve it."""
+    cache_dir = tmp_path / "peer"
+    cache_dir.mkdir()
+    await fetch_wrapper(["all"], cache_dir)
+
+    server = CacheServer(cache_dir, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+async def client():
+    """Create an HTTP client for the peer server."""
+    async with httpx.AsyncClient() as client:
+        yield client
+
+
+class TestCacheServer:
+    """Tests for serving a cache directory."""
+
+    @pytest.mark.asyncio
+    async def test_manifest(self, peer, client):
+        """Test that the peer's manifest lists its files with their hashes."""
+        entries = await fetch_peer_manifest(client, peer.url)
+
+        assert set(entries) == {"dataset_a.zip", "dataset_b.zip"}
+        assert entries["dataset_a.zip"].sha256 is not None
+
+    @pytest.mark.asyncio
+    async def test_range_request(self, peer, client, http_server):
+        """Test that cached files are served with Range support and their validators."""
+        response = await client.get(f"{peer.url}/dataset_a.zip", headers={"Range": "bytes=4-9"})
+
+        entry = CacheManifest.load(peer.cache_dir).get("dataset_a.zip")
+        assert response.status_code == 206
+        assert response.content == b"aaaaaa"
+        assert response.headers["Content-Range"] == "bytes 4-9/1004"
+        assert response.headers["ETag"] == entry.etag
+        assert response.headers[SHA256_HEADER] == entry.sha256
+
+    @pytest.mark.asyncio
+    async def test_not_modified(self, peer, client):
+        """Test that conditional requests are answered with 304."""
+        entry = CacheManifest.load(peer.cache_dir).get("dataset_a.zip")
+
+        response = await client.get(
+            f"{peer.url}/dataset_a.zip", headers={"If-None-Match": entry.etag}
+        )
+
+        assert response.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_only_manifest_files_are_served(self, peer, client):
+        """Test that files not recorded in the manifest are not exposed."""
+        (peer.cache_dir / "other.zip").write_bytes(b"secret")
+
+        for path in ("other.zip", "quarantine/x.zip", "../peer/dataset_a.zip"):
+            response = await client.get(f"{peer.url}/{path}")
+            assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_invalid_range_is_ignored(self, peer, client):
+        """Test that a range ending before it starts is answered with the whole file."""
+        response = await client.get(f"{peer.url}/dataset_a.zip", headers={"Range": "bytes=10-5"})
+
+        assert response.status_code == 200
+        assert len(response.content) == 1004
+        assert response.headers["Content-Length"] == "1004"
+
+    @pytest.mark.asyncio
+    async def test_unreachable_peer_is_ignored(self, client):
+        """Test that an unreachable peer has no files."""
+        assert await fetch_peer_manifest(client, "http://127.0.0.1:9") == {}
+
+
+class TestFetchFromPeer:
+    """Tests for downloading from cache peers before the origin."""
+
+    @pytest.mark.asyncio
+    async def test_files_come_from_peer(self, peer, http_server, tmp_path):
+        """Test that a second host downloads nothing from the origin."""
+        origin_requests = len(http_server.requests)
+
+        fetch_manager = await fetch_wrapper(["all"], tmp_path, peers=[peer.url])
+
+        assert fetch_manager.success == 2
+        assert len(http_server.requests) == origin_requests
+        assert (tmp_path / "dataset_a.zip").read_bytes() == http_server.files["a.zip"]
+        entry = CacheManifest.load(tmp_path).get("dataset_a.zip")
+        assert entry.url == http_server.url("a.zip")
+
+    @pytest.mark.asyncio
+    async def test_corrupt_peer_file_falls_back_to_origin(self, peer, http_server, tmp_path):
+        """Test that a file not matching the peer's sha256 is downloaded from the origin."""
+        (peer.cache_dir / "dataset_a.zip").write_bytes(b"PK\x03\x04" + b"x" * 1000)
+
+        fetch_manager = await fetch_wrapper(["dataset_a"], tmp_path, peers=[peer.url])
+
+        assert fetch_manager.success == 1
+        assert (tmp_path / "dataset_a.zip").read_bytes() == http_server.files["a.zip"]
+        assert http_server.requests[-1][0] == "/a.zip"
+
+    @pytest.mark.asyncio
+    async def test_corrupt_peer_file_is_not_kept_when_revalidating(
+        self, peer, http_server, tmp_path
+    ):
+        """Test that a mismatching peer file is quarantined and not revalidated at the origin."""
+        await fetch_wrapper(["dataset_a"], tmp_path)
+        manifest = CacheManifest.load(peer.cache_dir)
+        manifest.set("dataset_a.zip", manifest.get("dataset_a.zip")._replace(etag='"other"'))
+        manifest.save()
+        (peer.cache_dir / "dataset_a.zip").write_bytes(b"PK\x03\x04" + b"x" * 1000)
+
+        fetch_manager = await fetch_wrapper(
+            ["dataset_a"], tmp_path, peers=[peer.url], revalidate=True
+        )
+
+        assert fetch_manager.success == 1
+        assert (tmp_path / "dataset_a.zip").read_bytes() == http_server.files["a.zip"]
+        assert "If-None-Match" not in http_server.requests[-1][1]
+        assert len(list((tmp_path / "quarantine").iterdir())) == 1
+
+    @pytest.mark.asyncio
+    async def test_missing_peer_file_falls_back_to_origin(self, peer, http_server, tmp_path):
+        """Test that files the peer does not have are downloaded from the origin."""
+        http_server.files["c.zip"] = b"PK\x03\x04c"
+        files = ({"name": "dataset_c", "url": http_server.url("c.zip")},)
+
+        with patch("zensus2pgsql.commands.create.GITTERDATEN_FILES", files):
+            fetch_manager = await fetch_wrapper(["all"], tmp_path, peers=[peer.url])
+
+        assert fetch_manager.success == 1
+        assert (tmp_path / "dataset_c.zip").read_bytes() == b"PK\x03\x04c"
@@ -0,0 +1,56 @@
+"""Tests for planning the order datasets are imported in."""
+
+from unittest.mock import patch
+
+from zensus2pgsql.planning import IMPORT_SECONDS_PER_BYTE, DatasetTime, DatasetTimes, largest_first
+
+
+def test_largest_first_keeps_order_of_equal_and_unknown_sizes():
+    """Test that the sort is stable and puts unknown sizes last."""
+    items = ["a", "b", "c", "d", "e"]
+    assert largest_first(items, [None, 5, 5, None, 9]) == ["e", "b", "c", "a", "d"]
+
+
+class TestDatasetTimes:
+    """Tests for DatasetTimes."""
+
+    def test_estimates_from_finished_datasets(self):
+        """Test that a dataset's time is estimated from the seconds per byte of earlier ones."""
+        times = DatasetTimes(default_seconds_per_byte=0.002)
+        times.sizes = {"a.zip": 1000, "b.zip": 500, "c.zip": None}
+        with patch(
+            "zensus2pgsql.planning.time.monotonic", side_effect=[0.0, 1.0, 10.0, 11.0, 13.0, 14.0]
+        ):
+            times.start("a.zip")
+            times.start("c.zip")
+            times.add_pending("a.zip", 2)
+            times.finish_one("a.zip")
+            times.finish_one("a.zip")
+            times.finish("c.zip")
+            times.start("b.zip")
+            times.add_pending("b.zip", 0)
+
+        assert times.report() == [
+            DatasetTime("a.zip", 1000, 2.0, 10.0),
+            DatasetTime("c.zip", None, None, 10.0),
+            DatasetTime("b.zip", 500, 5.0, 1.0),
+        ]
+
+    def test_first_dataset_is_estimated_with_the_default_rate(self):
+        """Test that datasets starting before any has finished still get an estimate."""
+        times = DatasetTimes()
+        times.sizes = {"a.zip": 4 * 2**20, "b.zip": 2**20}
+        times.start("a.zip")
+        times.start("b.zip")
+
+        assert times.estimates == {
+            "a.zip": 4 * 2**20 * IMPORT_SECONDS_PER_BYTE,
+            "b.zip": 2**20 * IMPORT_SECONDS_PER_BYTE,
+        }
+
+    def test_unfinished_dataset_has_no_actual_time(self):
+        """Test that a dataset still running is reported without an actual time."""
+        times = DatasetTimes()
+        times.start("a.zip")
+
+        assert times.report() == [DatasetTime("a.zip", None, None, None)]
@@ -0,0 +1,244 @@
+"""Tests for download scheduling: retries, backoff, AIMD concurrency and circuit breakers."""
+
+import asyncio
+import random
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from zensus2pgsql.commands.fetch import fetch_wrapper
+from zensus2pgsql.download import download_file
+from zensus2pgsql.errors import CircuitOpenError
+from zensus2pgsql.scheduler import (
+    AimdLimiter,
+    CircuitBreaker,
+    DownloadScheduler,
+    RetryBudget,
+    backoff_delay,
+)
+
+
+@pytest.fixture
+async def client():
+    """Create an HTTP client for the stand-in server."""
+    async with httpx.AsyncClient() as client:
+        yield client
+
+
+def fast_scheduler(**kwargs) -> DownloadScheduler:
+    """Create a scheduler with millisecond backoff."""
+    return DownloadScheduler(backoff_base=0.001, backoff_cap=0.01, rng=random.Random(1), **kwargs)
+
+
+class TestBackoff:
+    """Tests for backoff_delay."""
+
+    def test_delays_grow_exponentially_within_cap(self):
+        """Test that the ceiling doubles per attempt up to the cap."""
+        rng = random.Random(0)
+        for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 4.0), (10, 8.0)):
+            delays = [backoff_delay(attempt, base=1.0, cap=8.0, rng=rng) for _ in range(200)]
+            assert all(0 <= delay <= ceiling for delay in delays)
+            assert max(delays) > ceiling / 2
+
+
+class TestAimdLimiter:
+    """Tests for AimdLimiter."""
+
+    def test_multiplicative_decrease_with_cooldown(self):
+        """Test that the limit halves once per burst of failures."""
+        limiter = AimdLimiter(max_limit=8, cooldown=60.0)
+
+        limiter.decrease()
+        limiter.decrease()
+
+        assert limiter.limit == 4
+
+    def test_additive_increase(self):
+        """Test that the limit grows by one after a window of successes."""
+        limiter = AimdLimiter(max_limit=8, initial=2)
+
+        limiter.increase()
+        assert limiter.limit == 2
+        limiter.increase()
+        assert limiter.limit == 3
+
+    def test_limit_stays_in_bounds(self):
+        """Test that the limit never leaves [min_limit, max_limit]."""
+        limiter = AimdLimiter(max_limit=2, cooldown=0.0)
+        for _ in range(10):
+            limiter.decrease()
+        assert limiter.limit == 1
+        for _ in range(10):
+            limiter.increase()
+        assert limiter.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_limited(self):
+        """Test that no more than `limit` tasks run at once."""
+        limiter = AimdLimiter(max_limit=3)
+        running = peak = 0
+
+        async def task():
+            nonlocal running, peak
+            async with limiter:
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(task() for _ in range(10)))
+
+        assert peak == 3
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker."""
+
+    def test_opens_after_threshold_and_half_opens(self):
+        """Test the closed, open, half-open cycle."""
+        breaker = CircuitBreaker("example.com", failure_threshold=2, reset_timeout=0.05)
+
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+        # After the timeout, one trial request is let through
+        asyncio.run(asyncio.sleep(0.06))
+        breaker.before_request()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+        breaker.record_success()
+        breaker.before_request()
+
+    def test_failed_trial_reopens(self):
+        """Test that a failing trial request opens the circuit again."""
+        breaker = CircuitBreaker("example.com", failure_threshold=1, reset_timeout=0.0)
+        breaker.record_failure()
+
+        breaker.before_request()
+        breaker.record_failure()
+
+        assert breaker.opened_at is not None
+        assert not breaker.trial_running
+
+
+def test_retry_budget():
+    """Test that retries are limited to a fraction of requests plus an allowance."""
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    for _ in range(4):
+        budget.record_request()
+
+    assert [budget.try_spend() for _ in range(4)] == [True, True, True, False]
+
+
+class TestDownloadScheduler:
+    """Tests for DownloadScheduler against a fault-injecting stand-in server."""
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried(self, http_server, client, tmp_path):
+        """Test that 503 responses are retried and lower the concurrency limit."""
+        http_server.files["a.zip"] = b"data"
+        http_server.fail_statuses = [503, 503]
+        scheduler = fast_scheduler(max_concurrency=8)
+        url = http_server.url("a.zip")
+
+        await scheduler.run(url, lambda: download_file(client, url, tmp_path / "a.zip"))
+
+        assert (tmp_path / "a.zip").read_bytes() == b"data"
+        assert len(http_server.requests) == 3
+        assert scheduler.limiter.limit == 4
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self, http_server, client, tmp_path):
+        """Test that a 404 fails immediately."""
+        scheduler = fast_scheduler()
+        url = http_server.url("missing.zip")
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await scheduler.run(url, lambda: download_file(client, url, tmp_path / "a.zip"))
+
+        assert len(http_server.requests) == 1
+        assert scheduler.breaker(url).failures == 0
+
+    @pytest.mark.asyncio
+    async def test_retries_are_limited(self, http_server, client, tmp_path):
+        """Test that a persistently failing download gives up after its retries."""
+        http_server.files["a.zip"] = b"data"
+        http_server.fail_statuses = [500] * 10
+        scheduler = fast_scheduler(retries=2, failure_threshold=100)
+        url = http_server.url("a.zip")
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await scheduler.run(url, lambda: download_file(client, url, tmp_path / "a.zip"))
+
+        assert len(http_server.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honoured(self, http_server, client, tmp_path):
+        """Test that the Retry-After header sets the backoff delay."""
+        http_server.files["a.zip"] = b"data"
+        http_server.fail_statuses = [429]
+        http_server.retry_after = "7"
+        scheduler = DownloadScheduler(backoff_cap=10.0)
+        url = http_server.url("a.zip")
+
+        with patch("zensus2pgsql.scheduler.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+            await scheduler.run(url, lambda: download_file(client, url, tmp_path / "a.zip"))
+
+        mock_sleep.assert_awaited_once_with(7.0)
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_capped(self, http_server, client, tmp_path):
+        """Test that a Retry-After longer than the backoff cap is not waited for."""
+        http_server.files["a.zip"] = b"data"
+        http_server.fail_statuses = [503]
+        http_server.retry_after = "86400"
+        scheduler = DownloadScheduler(backoff_cap=10.0)
+        url = http_server.url("a.zip")
+
+        with patch("zensus2pgsql.scheduler.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+            await scheduler.run(url, lambda: download_file(client, url, tmp_path / "a.zip"))
+
+        mock_sleep.assert_awaited_once_with(10.0)
+
+    @pytest.mark.asyncio
+    async def test_circuit_breaker_stops_requests_to_failing_host(
+        self, http_server, client, tmp_path
+    ):
+        """Test that requests fail fast once a host's circuit is open."""
+        http_server.files["a.zip"] = b"data"
+        http_server.fail_statuses = [502] * 3
+        scheduler = fast_scheduler(failure_threshold=3, reset_timeout=60.0)
+        url = http_server.url("a.zip")
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await scheduler.run(
+                url, lambda: download_file(client, url, tmp_path / "a.zip"), retries=2
+            )
+        with pytest.raises(CircuitOpenError):
+            await scheduler.run(
+                url, lambda: download_file(client, url, tmp_path / "a.zip"), retries=0
+            )
+
+        assert len(http_server.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_fetch_survives_transient_failures(self, http_server, tmp_path):
+        """Test that a dataset answered with transient errors is still downloaded."""
+        http_server.files["a.zip"] = b"PK\x03\x04a"
+        http_server.fail_statuses = [503, 504]
+        files = ({"name": "dataset_a", "url": http_server.url("a.zip")},)
+
+        with (
+            patch("zensus2pgsql.commands.create.GITTERDATEN_FILES", files),
+            patch("zensus2pgsql.scheduler.asyncio.sleep", new=AsyncMock()),
+        ):
+            fetch_manager = await fetch_wrapper(["all"], tmp_path)
+
+        assert (fetch_manager.success, fetch_manager.failed) == (1, 0)
+        assert (tmp_path / "dataset_a.zip").read_bytes() == b"PK\x03\x04a"
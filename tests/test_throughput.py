@@ -0,0 +1,41 @@
+"""Tests for the pipeline throughput counters."""
+
+from unittest.mock import patch
+
+from zensus2pgsql.throughput import Throughput
+
+
+class TestThroughput:
+    """Tests for Throughput."""
+
+    def test_totals_and_average(self):
+        """Test that the total and average rate span the first to the last addition."""
+        throughput = Throughput()
+        with patch("zensus2pgsql.throughput.time.monotonic", side_effect=[10.0, 12.0, 14.0]):
+            throughput.add(1024)
+            throughput.add(1024)
+            throughput.add(2048)
+
+        assert throughput.total == 4096
+        assert throughput.elapsed() == 4.0
+        assert throughput.average() == 1024
+        assert throughput.summary() == "4.0 KiB in 4.0s (1.0 KiB/s)"
+
+    def test_rolling_rate_forgets_old_samples(self):
+        """Test that only additions within the window count towards the rolling rate."""
+        throughput = Throughput("rows", window=5.0)
+        with patch("zensus2pgsql.throughput.time.monotonic", side_effect=[0.0, 1.0, 6.0, 20.0]):
+            throughput.add(1000)
+            throughput.add(500)
+            assert throughput.rate() == 100.0
+            assert throughput.rate() == 0.0
+
+        assert throughput.total == 1500
+
+    def test_empty(self):
+        """Test that an unused counter reports no throughput."""
+        throughput = Throughput()
+
+        assert throughput.rate() == 0.0
+        assert throughput.average() == 0.0
+        assert throughput.format_rate() == "0 B/s"
@@ -0,0 +1,29 @@
+"""Tests for sizing the workers to the database server."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from zensus2pgsql.tuning import ServerLimits, auto_worker_settings, read_server_limits
+
+
+@pytest.mark.asyncio
+async def test_read_server_limits():
+    """Test that the settings and open connections are read in one query."""
+    conn = AsyncMock()
+    conn.fetchrow = AsyncMock(return_value=(100, 3, 10, 8))
+
+    limits = await read_server_limits(conn)
+
+    assert limits == ServerLimits(100, 3, 10, 8)
+    assert limits.free_connections == 87
+
+
+def test_busy_server_gets_one_worker():
+    """Test that a server without free connections still gets a single database worker."""
+    limits = ServerLimits(
+        max_connections=20, reserved_connections=3, connections=25, max_worker_processes=8
+    )
+
+    assert limits.free_connections == 0
+    assert auto_worker_settings(limits, cpu_count=8).db_workers == 1